@@ -0,0 +1,382 @@
+"""
+Local YouTube Data API v3 emulator for offline development, load and perf testing.
+
+Serves `channels`, `playlistItems`, `videos` and `search` from a seeded dataset
+(channels_export.json by default), honours `part`, `fields` and `If-None-Match`,
+and can inject latency, 5xx errors and per-key `quotaExceeded` responses while
+counting quota units the way Google does.
+
+Run it and point the backend at it:
+    python -m emulator.youtube_api --port 8002 --latency-ms 40 --error-rate 0.01
+    YOUTUBE_API_BASE=http://127.0.0.1:8002/youtube/v3 uvicorn server:app
+
+Control endpoints:
+    GET  /emulator/stats    quota units per key, requests per endpoint, injected errors
+    POST /emulator/config   {"latency_ms", "jitter_ms", "error_rate", "daily_quota"}
+    POST /emulator/drift    {"rate": 0.1} - bump subscriber/view counts on a share of channels
+    POST /emulator/reset    clear quota and request counters
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+DEFAULT_DATASET = Path(__file__).parent.parent.parent / 'channels_export.json'
+DEFAULT_DAILY_QUOTA = 10000
+VIDEOS_PER_CHANNEL = 25
+
+QUOTA_COSTS = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "search": 100
+}
+
+
+# ==================== FIELD MASKS ====================
+
+def parse_fields(spec: str, pos: int = 0):
+    """Parse a YouTube `fields` mask into a nested dict ({name: subtree or None for everything})"""
+    tree = {}
+    while pos < len(spec):
+        end = pos
+        while end < len(spec) and spec[end] not in ',()':
+            end += 1
+        path = spec[pos:end].split('/')
+        node = tree
+        for name in path[:-1]:
+            if node.get(name) is None:
+                node[name] = {}
+            node = node[name]
+        pos = end
+        if pos < len(spec) and spec[pos] == '(':
+            subtree, pos = parse_fields(spec, pos + 1)
+            node[path[-1]] = subtree
+        else:
+            node.setdefault(path[-1], None)
+        if pos < len(spec) and spec[pos] == ')':
+            return tree, pos + 1
+        if pos < len(spec) and spec[pos] == ',':
+            pos += 1
+    return tree, pos
+
+
+def apply_fields(value, tree: Optional[Dict]):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_fields(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: apply_fields(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+def _etag(payload) -> str:
+    return hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+# ==================== DATASET ====================
+
+class EmulatorDataset:
+    def __init__(self, channels: List[Dict], seed: int = 42):
+        self.channels = {c["channel_id"]: dict(c) for c in channels if c.get("channel_id")}
+        self.videos = {}
+        self.uploads = {}
+        self._rng = random.Random(seed)
+
+        for channel_id, channel in self.channels.items():
+            playlist_id = "UU" + channel_id[2:]
+            rng = random.Random(f"{seed}:{channel_id}")
+            video_ids = []
+            for n in range(VIDEOS_PER_CHANNEL):
+                video_id = hashlib.sha1(f"{channel_id}:{n}".encode()).hexdigest()[:11]
+                views = int(channel.get("view_count", 0) / max(channel.get("video_count", 1), 1) * rng.uniform(0.1, 5))
+                self.videos[video_id] = {
+                    "channel_id": channel_id,
+                    "title": f"{channel.get('title', 'Video')} #{n + 1}",
+                    "description": f"Video {n + 1} from {channel.get('title', '')}. " * 5,
+                    "published_at": f"2024-{(n % 12) + 1:02d}-{(n % 28) + 1:02d}T12:00:00Z",
+                    "view_count": views,
+                    "like_count": views // 40,
+                    "comment_count": views // 900
+                }
+                video_ids.append(video_id)
+            self.uploads[playlist_id] = video_ids
+
+    @classmethod
+    def from_file(cls, path: Path, seed: int = 42) -> "EmulatorDataset":
+        return cls(json.loads(Path(path).read_text()), seed=seed)
+
+    def drift(self, rate: float) -> int:
+        """Grow counts on a random share of channels, as a real refresh window would"""
+        changed = 0
+        for channel in self.channels.values():
+            if self._rng.random() < rate:
+                subs = channel.get("subscriber_count", 0)
+                channel["subscriber_count"] = subs + max(int(subs * self._rng.uniform(0.0001, 0.002)), 1)
+                channel["view_count"] = channel.get("view_count", 0) + self._rng.randint(1000, 5000000)
+                changed += 1
+        return changed
+
+    def channel_item(self, channel_id: str, parts: List[str]) -> Dict:
+        channel = self.channels[channel_id]
+        thumb = channel.get("thumbnail_url", "")
+        item = {"kind": "youtube#channel", "id": channel_id}
+        if "snippet" in parts:
+            item["snippet"] = {
+                "title": channel.get("title", ""),
+                "description": channel.get("description", ""),
+                "customUrl": channel.get("custom_url", ""),
+                "publishedAt": channel.get("published_at", ""),
+                "thumbnails": {
+                    "default": {"url": thumb.replace("s800", "s88"), "width": 88, "height": 88},
+                    "medium": {"url": thumb.replace("s800", "s240"), "width": 240, "height": 240},
+                    "high": {"url": thumb, "width": 800, "height": 800}
+                },
+                "localized": {
+                    "title": channel.get("title", ""),
+                    "description": channel.get("description", "")
+                },
+                "country": channel.get("country_code", "")
+            }
+        if "statistics" in parts:
+            item["statistics"] = {
+                "viewCount": str(channel.get("view_count", 0)),
+                "subscriberCount": str(channel.get("subscriber_count", 0)),
+                "hiddenSubscriberCount": False,
+                "videoCount": str(channel.get("video_count", 0))
+            }
+        if "contentDetails" in parts:
+            item["contentDetails"] = {"relatedPlaylists": {"likes": "", "uploads": "UU" + channel_id[2:]}}
+        item["etag"] = _etag(item)
+        return item
+
+    def video_item(self, video_id: str, parts: List[str]) -> Dict:
+        video = self.videos[video_id]
+        item = {"kind": "youtube#video", "id": video_id}
+        if "snippet" in parts:
+            item["snippet"] = {
+                "publishedAt": video["published_at"],
+                "channelId": video["channel_id"],
+                "title": video["title"],
+                "description": video["description"],
+                "thumbnails": {
+                    size: {"url": f"https://i.ytimg.com/vi/{video_id}/{name}.jpg"}
+                    for size, name in (("default", "default"), ("medium", "mqdefault"), ("high", "hqdefault"))
+                }
+            }
+        if "statistics" in parts:
+            item["statistics"] = {
+                "viewCount": str(video["view_count"]),
+                "likeCount": str(video["like_count"]),
+                "commentCount": str(video["comment_count"])
+            }
+        item["etag"] = _etag(item)
+        return item
+
+    def search_channels(self, query: str, region_code: str, max_results: int) -> List[Dict]:
+        terms = [t for t in query.lower().split() if len(t) > 2]
+        candidates = [
+            c for c in self.channels.values()
+            if not region_code or c.get("country_code") == region_code
+        ]
+        matches = [
+            c for c in candidates
+            if any(t in (c.get("title", "") + " " + c.get("description", "")).lower() for t in terms)
+        ]
+        # Like the real API, generic queries in a region still return that region's popular channels
+        results = sorted(matches or candidates, key=lambda c: c.get("subscriber_count", 0), reverse=True)
+
+        items = []
+        for channel in results[:max_results]:
+            thumb = channel.get("thumbnail_url", "")
+            items.append({
+                "kind": "youtube#searchResult",
+                "id": {"kind": "youtube#channel", "channelId": channel["channel_id"]},
+                "snippet": {
+                    "channelId": channel["channel_id"],
+                    "title": channel.get("title", ""),
+                    "description": channel.get("description", "")[:160],
+                    "thumbnails": {"default": {"url": thumb.replace("s800", "s88")}},
+                    "publishedAt": channel.get("published_at", "")
+                }
+            })
+        return items
+
+
+# ==================== SERVER ====================
+
+class YouTubeEmulator:
+    def __init__(self, dataset: EmulatorDataset, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0, daily_quota: int = DEFAULT_DAILY_QUOTA, seed: int = 42):
+        self.dataset = dataset
+        self.config = {
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "error_rate": error_rate,
+            "daily_quota": daily_quota
+        }
+        self._rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.quota_used = {}
+        self.requests = {endpoint: 0 for endpoint in QUOTA_COSTS}
+        self.stats = {"not_modified": 0, "injected_errors": 0, "quota_rejections": 0, "bytes_sent": 0}
+
+    def _error(self, status: int, reason: str, message: str) -> web.Response:
+        body = {"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}}
+        return web.json_response(body, status=status)
+
+    async def _respond(self, request: web.Request, endpoint: str, payload_fn) -> web.Response:
+        self.requests[endpoint] += 1
+
+        latency = self.config["latency_ms"] + self._rng.uniform(-1, 1) * self.config["jitter_ms"]
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+        api_key = request.query.get("key")
+        if not api_key:
+            return self._error(403, "forbidden", "The request is missing a valid API key.")
+
+        cost = QUOTA_COSTS[endpoint]
+        used = self.quota_used.get(api_key, 0)
+        if used + cost > self.config["daily_quota"]:
+            self.stats["quota_rejections"] += 1
+            return self._error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        self.quota_used[api_key] = used + cost
+
+        if self._rng.random() < self.config["error_rate"]:
+            self.stats["injected_errors"] += 1
+            return self._error(503, "backendError", "Backend Error")
+
+        payload = payload_fn(request)
+        if isinstance(payload, web.Response):
+            return payload
+        payload["etag"] = _etag(payload)
+        if "fields" in request.query:
+            payload = apply_fields(payload, parse_fields(request.query["fields"])[0])
+
+        etag = f'"{_etag(payload)}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        body = json.dumps(payload).encode()
+        self.stats["bytes_sent"] += len(body)
+        return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+    def _id_list(self, request: web.Request) -> List[str]:
+        return [i for i in request.query.get("id", "").split(",") if i][:50]
+
+    def _channels(self, request: web.Request):
+        parts = request.query.get("part", "").split(",")
+        ids = [cid for cid in self._id_list(request) if cid in self.dataset.channels]
+        items = [self.dataset.channel_item(cid, parts) for cid in ids]
+        return {"kind": "youtube#channelListResponse", "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)}, "items": items}
+
+    def _playlist_items(self, request: web.Request):
+        playlist_id = request.query.get("playlistId", "")
+        if playlist_id not in self.dataset.uploads:
+            return self._error(404, "playlistNotFound", "The playlist identified with the request's playlistId parameter cannot be found.")
+        max_results = min(int(request.query.get("maxResults", 5)), 50)
+        items = [
+            {"kind": "youtube#playlistItem", "id": f"{playlist_id}.{vid}", "contentDetails": {"videoId": vid}}
+            for vid in self.dataset.uploads[playlist_id][:max_results]
+        ]
+        return {"kind": "youtube#playlistItemListResponse", "items": items}
+
+    def _videos(self, request: web.Request):
+        parts = request.query.get("part", "").split(",")
+        ids = [vid for vid in self._id_list(request) if vid in self.dataset.videos]
+        return {"kind": "youtube#videoListResponse", "items": [self.dataset.video_item(vid, parts) for vid in ids]}
+
+    def _search(self, request: web.Request):
+        max_results = min(int(request.query.get("maxResults", 5)), 50)
+        items = self.dataset.search_channels(request.query.get("q", ""), request.query.get("regionCode", ""), max_results)
+        return {"kind": "youtube#searchListResponse", "items": items}
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "config": self.config,
+            "channels": len(self.dataset.channels),
+            "quota_used": self.quota_used,
+            "total_quota_used": sum(self.quota_used.values()),
+            "requests": self.requests,
+            **self.stats
+        })
+
+    async def post_config(self, request: web.Request) -> web.Response:
+        updates = await request.json()
+        self.config.update({k: v for k, v in updates.items() if k in self.config})
+        return web.json_response(self.config)
+
+    async def post_drift(self, request: web.Request) -> web.Response:
+        body = await request.json() if request.can_read_body else {}
+        changed = self.dataset.drift(float(body.get("rate", 0.1)))
+        return web.json_response({"changed": changed})
+
+    async def post_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({"message": "Emulator counters reset"})
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        handlers = {
+            "channels": self._channels,
+            "playlistItems": self._playlist_items,
+            "videos": self._videos,
+            "search": self._search
+        }
+        for endpoint, payload_fn in handlers.items():
+            async def handler(request, endpoint=endpoint, payload_fn=payload_fn):
+                return await self._respond(request, endpoint, payload_fn)
+            app.router.add_get(f"/youtube/v3/{endpoint}", handler)
+
+        app.router.add_get("/emulator/stats", self.get_stats)
+        app.router.add_post("/emulator/config", self.post_config)
+        app.router.add_post("/emulator/drift", self.post_drift)
+        app.router.add_post("/emulator/reset", self.post_reset)
+        return app
+
+
+async def start_emulator(emulator: YouTubeEmulator, host: str = "127.0.0.1", port: int = 8002) -> web.AppRunner:
+    """Start the emulator inside the running event loop (for benchmarks and tests)"""
+    runner = web.AppRunner(emulator.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local YouTube Data API v3 emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET, help="Channel export JSON to serve")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform +/- jitter around the latency")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 503")
+    parser.add_argument("--daily-quota", type=int, default=DEFAULT_DAILY_QUOTA, help="Quota units per API key")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    emulator = YouTubeEmulator(
+        EmulatorDataset.from_file(args.dataset, seed=args.seed),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        daily_quota=args.daily_quota,
+        seed=args.seed
+    )
+    print(f"YouTube API emulator serving {len(emulator.dataset.channels)} channels on "
+          f"http://{args.host}:{args.port}/youtube/v3")
+    web.run_app(emulator.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+HTTP middleware for TopTube World Pro.
+"""
+import re
+import gzip
+import time
+import asyncio
+import logging
+from typing import List, Optional, Set
+from urllib.parse import parse_qsl, urlencode
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.response_cache import (
+    CacheEntry, ResponseCache, get_response_cache,
+    DEFAULT_TTL_SECONDS, DEFAULT_STALE_SECONDS, SURROGATE_KEY_HEADER
+)
+
+logger = logging.getLogger(__name__)
+
+# Responses passed through uncompressed: gzip would hold event-stream messages in its
+# buffer instead of delivering them as they're written
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class StreamingAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(UNCOMPRESSED_CONTENT_TYPES):
+                # Reuse the responder's pass-through path for pre-encoded bodies
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves Server-Sent Event streams uncompressed.
+
+    Responses that already carry Content-Encoding (pre-compressed snapshots, cached
+    responses) are passed through as-is by the responder.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = StreamingAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+# Headers recomputed when a cached body is served
+_UNCACHED_HEADERS = {b"content-length", b"content-encoding", b"vary", b"date", SURROGATE_KEY_HEADER.encode()}
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age=(\d+)")
+_STALE_WHILE_REVALIDATE = re.compile(r"stale-while-revalidate=(\d+)")
+
+
+class ResponseCacheMiddleware:
+    """
+    Caches GET /api responses whose handler set a Surrogate-Key header.
+
+    Add it before the gzip middleware so it sits inside it: cached bodies are kept
+    gzip-compressed and served with Content-Encoding set, which gzip passes through.
+    """
+
+    def __init__(self, app: ASGIApp, cache: Optional[ResponseCache] = None, prefix: str = "/api/"):
+        self.app = app
+        self.cache = cache or get_response_cache()
+        self.prefix = prefix
+        self._revalidating: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        key = self._cache_key(scope)
+        accepts_gzip = "gzip" in Headers(scope=scope).get("accept-encoding", "")
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            fresh = entry.is_fresh(time.time())
+            self.cache.record(entry.route, "hit" if fresh else "stale")
+            if not fresh:
+                self._revalidate(key, scope)
+            await self._send_entry(entry, send, accepts_gzip, "HIT" if fresh else "STALE")
+            return
+
+        await self._fetch(key, scope, receive, send, accepts_gzip)
+
+    @staticmethod
+    def _cache_key(scope: Scope) -> str:
+        query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        return f"{scope['method']} {scope['path']}?{urlencode(sorted(query))}"
+
+    async def _fetch(self, key: str, scope: Scope, receive: Receive, send: Optional[Send], accepts_gzip: bool = True):
+        """Run the app; tagged 200 responses are stored (and sent, unless revalidating)"""
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        # A purge while the app runs means the body may predate it: serve it, don't store it
+        generation = self.cache.generations.current
+
+        async def capture(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if self._cacheable(message):
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                entry = self._store(key, scope, start, b"".join(chunks), generation)
+                if send is not None:
+                    self.cache.record(entry.route, "miss")
+                    await self._send_entry(entry, send, accepts_gzip, "MISS")
+                return
+            if send is not None:
+                await send(message)
+
+        await self.app(scope, receive, capture)
+
+    @staticmethod
+    def _cacheable(message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        cache_control = headers.get("cache-control", "")
+        return (
+            message["status"] == 200
+            and SURROGATE_KEY_HEADER in headers
+            and "set-cookie" not in headers
+            and "content-encoding" not in headers
+            and "no-store" not in cache_control
+            and "private" not in cache_control
+        )
+
+    def _store(self, key: str, scope: Scope, start: Message, body: bytes, generation: int) -> CacheEntry:
+        headers = Headers(raw=start["headers"])
+        cache_control = headers.get("cache-control", "")
+        max_age = _MAX_AGE.search(cache_control)
+        stale = _STALE_WHILE_REVALIDATE.search(cache_control)
+        route = scope.get("route")
+
+        entry = CacheEntry(
+            status=start["status"],
+            headers=[(k, v) for k, v in start["headers"] if k.lower() not in _UNCACHED_HEADERS],
+            body=gzip.compress(body, compresslevel=6, mtime=0),
+            tags=set(headers[SURROGATE_KEY_HEADER].split()),
+            route=getattr(route, "path", scope["path"]),
+            ttl=int(max_age.group(1)) if max_age else DEFAULT_TTL_SECONDS,
+            stale=int(stale.group(1)) if stale else DEFAULT_STALE_SECONDS
+        )
+        self.cache.put(key, entry, generation)
+        return entry
+
+    async def _send_entry(self, entry: CacheEntry, send: Send, accepts_gzip: bool, status: str):
+        body = entry.body if accepts_gzip else gzip.decompress(entry.body)
+        headers = entry.headers + [
+            (b"content-length", str(len(body)).encode()),
+            (b"vary", b"Accept-Encoding"),
+            (b"age", str(int(time.time() - entry.created)).encode()),
+            (b"x-cache", status.encode())
+        ]
+        if accepts_gzip:
+            headers.append((b"content-encoding", b"gzip"))
+
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    def _revalidate(self, key: str, scope: Scope):
+        """Refresh a stale entry in the background, at most once at a time per key"""
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        task = asyncio.create_task(self._run_revalidation(key, dict(scope)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_revalidation(self, key: str, scope: Scope):
+        received = False
+
+        async def receive() -> Message:
+            nonlocal received
+            if received:
+                return {"type": "http.disconnect"}
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        try:
+            await self._fetch(key, scope, receive, None)
+        except Exception as e:
+            logger.warning(f"Revalidating {key} failed: {e}")
+        finally:
+            self._revalidating.discard(key)
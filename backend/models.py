@@ -2,7 +2,7 @@
 Pydantic models for TopTube World Pro.
 """
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 class CountryCreate(BaseModel):
     code: str
@@ -22,6 +22,12 @@ class ChannelCreate(BaseModel):
     channel_id: str
     country_code: str
 
+class ChannelBatchRequest(BaseModel):
+    ids: List[str]
+    history_days: int = Field(default=0, ge=0, le=90)
+    view: str = "full"
+    fields: Optional[str] = None
+
 class ChannelResponse(BaseModel):
     channel_id: str
     title: str
@@ -122,3 +128,6 @@ class BlogPostUpdate(BaseModel):
     tags: Optional[list] = None
     image: Optional[str] = None
     status: Optional[str] = None
+
+class SyncDocumentsRequest(BaseModel):
+    keys: List[str] = Field(default_factory=list, max_length=1000)
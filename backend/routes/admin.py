@@ -1,18 +1,31 @@
 import logging
 import asyncio
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from typing import List, Dict, Any, Optional
 from database import db
-from routes.utils import store_channel_stats
-from models import AdminStats
+from routes.utils import store_channel_stats, export_cursor, ndjson_response, EXPORT_CHUNK_SIZE
+from models import AdminStats, SyncDocumentsRequest
 from services.youtube_service import youtube_service
 from services.ranking_service import get_ranking_service
 from services.growth_analyzer import get_growth_analyzer
+from services.refresh_service import get_refresh_service
+from services.job_tracker import get_job_tracker
+from services.change_bus import get_change_bus
+from services.response_cache import get_response_cache
+from services.single_flight import get_single_flight_stats
+from services.snapshot_store import get_snapshot_store
+from services.search_index import get_search_index
+from services.history_downsampler import get_history_downsampler
+from services.channel_index import get_channel_index
+from services.content_hash import SYNC_COLLECTIONS, sync_hash, sync_projection
+from services.import_service import NdjsonBulkImporter, BLOG_POST_DATE_FIELDS, DEFAULT_IMPORT_BATCH_SIZE, MAX_IMPORT_BATCH_SIZE
 
 router = APIRouter(prefix="/api")
 ranking_service = get_ranking_service(db)
 growth_analyzer = get_growth_analyzer(db)
+refresh_service = get_refresh_service(db, youtube_service, ranking_service)
+job_tracker = get_job_tracker(db)
 
 logger = logging.getLogger(__name__)
 
@@ -73,43 +86,71 @@ async def refresh_channel(channel_id: str, background_tasks: BackgroundTasks):
     return {"message": "Channel refreshed", "data": update_data}
 
 @router.post("/admin/refresh-all")
-async def refresh_all_channels(background_tasks: BackgroundTasks):
-    """Refresh all tracked channels (use sparingly due to API quota)"""
-    channels = await db.channels.find({"is_active": True}, {"channel_id": 1}).to_list(1000)
-    channel_ids = [c["channel_id"] for c in channels]
-    
-    if not channel_ids:
+async def refresh_all_channels(include_snippet: bool = True):
+    """Refresh all tracked channels as a background job (use sparingly due to API quota)"""
+    if await db.channels.count_documents({"is_active": True}, limit=1) == 0:
         return {"message": "No channels to refresh"}
     
-    # Batch refresh
-    try:
-        results = await youtube_service.get_batch_channel_stats(channel_ids)
-        
-        for yt_data in results:
-            channel_id = yt_data["channel_id"]
-            
-            update_data = {
-                "title": yt_data.get("title", ""),
-                "description": yt_data.get("description", ""),
-                "thumbnail_url": yt_data.get("thumbnail_url", ""),
-                "subscriber_count": yt_data.get("subscriber_count", 0),
-                "view_count": yt_data.get("view_count", 0),
-                "video_count": yt_data.get("video_count", 0),
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            await db.channels.update_one({"channel_id": channel_id}, {"$set": update_data})
-            await store_channel_stats(channel_id, yt_data)
-        
-        # Update all rankings
-        countries = await db.countries.find({}, {"code": 1}).to_list(300)
-        for country in countries:
-            background_tasks.add_task(ranking_service.update_rankings, country["code"])
-        
-        return {"message": f"Refreshed {len(results)} channels"}
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    job = refresh_service.start_job(include_snippet=include_snippet, rank_after=True, trigger="admin")
+    message = "Refresh started" if job["started"] else "Refresh already running"
+    return {"message": message, "job_id": job["job_id"]}
+
+@router.get("/admin/change-bus")
+async def get_change_bus_stats():
+    """Change bus mode (change_stream/polling), subscribers and events published"""
+    return get_change_bus(db).get_stats()
+
+@router.get("/admin/response-cache")
+async def get_response_cache_stats():
+    """Response cache size and hit/stale/miss counts per route"""
+    return get_response_cache().get_stats()
+
+@router.get("/admin/single-flight")
+async def get_single_flight_metrics():
+    """Per-call-site counts of executed vs coalesced concurrent reads"""
+    return get_single_flight_stats()
+
+@router.get("/admin/snapshots")
+async def get_snapshot_stats():
+    """Pre-compressed snapshots with raw/gzip/brotli sizes and encodings served"""
+    return get_snapshot_store().get_stats()
+
+@router.get("/admin/search-index")
+async def get_search_index_stats():
+    """Search index size, build time and update counts"""
+    return get_search_index(db).get_stats()
+
+@router.get("/admin/history-cache")
+async def get_history_cache_stats():
+    """Downsampled chart history cache size and hit/miss counts"""
+    return get_history_downsampler(db).get_stats()
+
+@router.get("/admin/channel-index")
+async def get_channel_index_stats():
+    """In-memory channel index size, approximate memory footprint and update counts"""
+    index = get_channel_index(db)
+    return {**index.get_stats(), "memory_bytes": index.memory_bytes()}
+
+@router.post("/admin/response-cache/purge")
+async def purge_response_cache(tags: Optional[str] = None):
+    """Purge cached responses by comma-separated surrogate tags (everything if omitted)"""
+    cache = get_response_cache()
+    if not tags:
+        return {"purged": cache.clear()}
+    return {"purged": cache.purge(*[t.strip() for t in tags.split(",") if t.strip()])}
+
+@router.get("/admin/jobs")
+async def list_jobs(kind: str = None, limit: int = Query(default=20, le=100)):
+    """List recent background jobs"""
+    return {"jobs": await job_tracker.list_jobs(kind, limit)}
+
+@router.get("/admin/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status, progress and per-batch report of a background job"""
+    job = await job_tracker.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.delete("/admin/channel/{channel_id}")
 async def delete_channel(channel_id: str):
@@ -442,9 +483,10 @@ async def fix_channel_countries():
     
     updated_count = 0
     for channel_id, correction in corrections.items():
+        # Only channels that still need the fix, so updated_at moves only when they change
         result = await db.channels.update_one(
-            {"channel_id": channel_id},
-            {"$set": correction}
+            {"channel_id": channel_id, "$or": [{k: {"$ne": v}} for k, v in correction.items()]},
+            {"$set": {**correction, "updated_at": datetime.now(timezone.utc).isoformat()}}
         )
         if result.modified_count > 0:
             updated_count += 1
@@ -547,6 +589,17 @@ async def import_channels(channels: List[Dict[Any, Any]]):
     }
 
 
+@router.post("/admin/import-channels/stream")
+async def import_channels_stream(
+    request: Request,
+    batch_size: int = Query(default=DEFAULT_IMPORT_BATCH_SIZE, ge=1, le=MAX_IMPORT_BATCH_SIZE)
+):
+    """Upsert channels from a streamed NDJSON body (gzip with Content-Encoding: gzip)"""
+    importer = NdjsonBulkImporter(db.channels, "channel_id", batch_size)
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    return await importer.run(request.stream(), gzipped)
+
+
 @router.get("/admin/export-channels")
 async def export_channels():
     """Export all channels as JSON (used for syncing between environments)"""
@@ -559,6 +612,43 @@ async def export_channels():
     }
 
 
+@router.get("/admin/export-channels/stream")
+async def export_channels_stream(
+    after: Optional[str] = Query(default=None, description="Resume after this channel_id"),
+    gzip: bool = False
+):
+    """Stream all channels as NDJSON ordered by channel_id (resumable with after=)"""
+    return ndjson_response(export_cursor(db.channels, "channel_id", after), "channels", compress=gzip)
+
+
+@router.get("/admin/sync/{collection}/manifest")
+async def get_sync_manifest(collection: str):
+    """Compact {key: content hash} manifest of a collection for delta syncs"""
+    projection = sync_projection(collection)
+    if projection is None:
+        raise HTTPException(status_code=404, detail="Collection is not syncable")
+    
+    key = SYNC_COLLECTIONS[collection]["key"]
+    hashes = {}
+    async for doc in db[collection].find({}, projection).batch_size(EXPORT_CHUNK_SIZE):
+        if doc.get(key):
+            hashes[doc[key]] = sync_hash(collection, doc)
+    
+    return {"collection": collection, "key": key, "total": len(hashes), "hashes": hashes}
+
+
+@router.post("/admin/sync/{collection}/documents")
+async def get_sync_documents(collection: str, request: SyncDocumentsRequest):
+    """Stream the synced fields of the requested documents as NDJSON"""
+    projection = sync_projection(collection)
+    if projection is None:
+        raise HTTPException(status_code=404, detail="Collection is not syncable")
+    
+    key = SYNC_COLLECTIONS[collection]["key"]
+    cursor = db[collection].find({key: {"$in": request.keys}}, projection).batch_size(EXPORT_CHUNK_SIZE)
+    return ndjson_response(cursor, collection)
+
+
 @router.post("/admin/normalize-channels")
 async def normalize_channels():
     """Normalize all channel data - add title from name and country_name from country_code"""
@@ -577,7 +667,7 @@ async def normalize_channels():
     for channel in channels_missing_title:
         await db.channels.update_one(
             {"channel_id": channel["channel_id"]},
-            {"$set": {"title": channel["name"]}}
+            {"$set": {"title": channel["name"], "updated_at": datetime.now(timezone.utc).isoformat()}}
         )
         title_update_count += 1
     
@@ -593,7 +683,7 @@ async def normalize_channels():
         country_name = country_map.get(country_code, country_code)
         await db.channels.update_one(
             {"channel_id": channel["channel_id"]},
-            {"$set": {"country_name": country_name}}
+            {"$set": {"country_name": country_name, "updated_at": datetime.now(timezone.utc).isoformat()}}
         )
         country_name_update_count += 1
     
@@ -1009,6 +1099,17 @@ async def import_blog_posts(posts: List[Dict[Any, Any]]):
     }
 
 
+@router.post("/admin/import-blog-posts/stream")
+async def import_blog_posts_stream(
+    request: Request,
+    batch_size: int = Query(default=DEFAULT_IMPORT_BATCH_SIZE, ge=1, le=MAX_IMPORT_BATCH_SIZE)
+):
+    """Upsert blog posts by slug from a streamed NDJSON body (gzip with Content-Encoding: gzip)"""
+    importer = NdjsonBulkImporter(db.blog_posts, "slug", batch_size, BLOG_POST_DATE_FIELDS)
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    return await importer.run(request.stream(), gzipped)
+
+
 @router.get("/admin/export-blog-posts")
 async def export_blog_posts():
     """Export all blog posts as JSON (used for syncing between environments)"""
@@ -1027,3 +1128,12 @@ async def export_blog_posts():
     }
 
 
+@router.get("/admin/export-blog-posts/stream")
+async def export_blog_posts_stream(
+    after: Optional[str] = Query(default=None, description="Resume after this slug"),
+    gzip: bool = False
+):
+    """Stream all blog posts as NDJSON ordered by slug (resumable with after=)"""
+    return ndjson_response(export_cursor(db.blog_posts, "slug", after), "blog_posts", compress=gzip)
+
+
@@ -1,14 +1,25 @@
 import logging
 import os, uuid
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Request, Response
 from typing import List, Optional, Dict
 from database import db
-from routes.utils import verify_admin_key, format_number_simple
+from routes.utils import (
+    verify_admin_key, format_number_simple, export_cursor, ndjson_response, cache_tags,
+    encode_cursor, decode_cursor, keyset_after
+)
 from models import BlogPostCreate, BlogPostUpdate
+from services.import_service import NdjsonBulkImporter, BLOG_POST_DATE_FIELDS, DEFAULT_IMPORT_BATCH_SIZE, MAX_IMPORT_BATCH_SIZE
+from services.count_cache import get_count_cache
 
 router = APIRouter(prefix="/api")
 logger = logging.getLogger(__name__)
+count_cache = get_count_cache(db)
+
+# Blog list order; backed by the status, (category,) created_at, slug indexes
+BLOG_LIST_SORT = [("created_at", -1), ("slug", 1)]
+# created_at is an ISO string when written by the app, a Date when imported
+BLOG_CURSOR_TYPES = ((str, datetime, type(None)), (str,))
 
 # ==================== BLOG ADMIN ====================
 
@@ -23,12 +34,14 @@ async def get_blog_categories():
 
 @router.get("/blog/posts")
 async def get_blog_posts(
+    response: Response,
     status: Optional[str] = None,
     category: Optional[str] = None,
     limit: int = Query(default=20, le=100),
-    skip: int = 0
+    skip: int = 0,
+    cursor: Optional[str] = None
 ):
-    """Get all blog posts (public - only published unless admin)"""
+    """Get all blog posts (public - only published unless admin); page with next_cursor or skip"""
     query = {}
     if status:
         query["status"] = status
@@ -38,24 +51,35 @@ async def get_blog_posts(
     if category:
         query["category"] = category
     
-    posts = await db.blog_posts.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.blog_posts.count_documents(query)
+    page_query = query
+    if cursor:
+        created_at, slug = decode_cursor(cursor, BLOG_CURSOR_TYPES)
+        page_query = {**query, **keyset_after("created_at", created_at, "slug", slug)}
+        skip = 0
+    
+    posts = await db.blog_posts.find(page_query, {"_id": 0}).sort(BLOG_LIST_SORT).skip(skip).limit(limit).to_list(limit)
+    total = await count_cache.count("blog_posts", query)
+    next_cursor = encode_cursor([posts[-1].get("created_at"), posts[-1].get("slug")]) if len(posts) == limit else None
     
-    return {"posts": posts, "total": total}
+    if query["status"] == "published":
+        cache_tags(response, "blog")
+    return {"posts": posts, "total": total, "next_cursor": next_cursor}
 
 @router.get("/blog/posts/{slug}")
-async def get_blog_post(slug: str):
+async def get_blog_post(response: Response, slug: str):
     """Get a single blog post by slug"""
     post = await db.blog_posts.find_one({"slug": slug}, {"_id": 0})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
+    if post.get("status") == "published":
+        cache_tags(response, "blog")
     return post
 
 
 # ==================== AUTO-GENERATED COUNTRY BLOG POSTS ====================
 
 @router.get("/blog/country/{country_code}")
-async def get_country_blog_post(country_code: str):
+async def get_country_blog_post(response: Response, country_code: str):
     """Get auto-generated blog post for a country with top YouTubers"""
     try:
         country = await db.countries.find_one({"code": country_code.upper()}, {"_id": 0})
@@ -140,6 +164,7 @@ These are the top 10 most subscribed YouTube channels from {country_name} as of
         word_count = len(content.split())
         read_time = max(3, word_count // 200)
         
+        cache_tags(response, "blog", "leaderboard", f"country:{country_code.upper()}")
         return {
             "title": title,
             "slug": slug,
@@ -308,6 +333,19 @@ async def admin_import_blog_posts(admin_key: str = Query(...), posts: List[Dict]
     }
 
 
+@router.post("/admin/blog/import/stream")
+async def admin_import_blog_posts_stream(
+    request: Request,
+    admin_key: str = Query(...),
+    batch_size: int = Query(default=DEFAULT_IMPORT_BATCH_SIZE, ge=1, le=MAX_IMPORT_BATCH_SIZE)
+):
+    """Admin: Upsert blog posts by slug from a streamed NDJSON body"""
+    verify_admin_key(admin_key)
+    importer = NdjsonBulkImporter(db.blog_posts, "slug", batch_size, BLOG_POST_DATE_FIELDS)
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    return await importer.run(request.stream(), gzipped)
+
+
 @router.get("/admin/blog/export")
 async def admin_export_blog_posts(admin_key: str = Query(...)):
     """Admin: Export all blog posts as JSON - useful for backup and syncing"""
@@ -322,6 +360,17 @@ async def admin_export_blog_posts(admin_key: str = Query(...)):
     }
 
 
+@router.get("/admin/blog/export/stream")
+async def admin_export_blog_posts_stream(
+    admin_key: str = Query(...),
+    after: Optional[str] = Query(default=None, description="Resume after this slug"),
+    gzip: bool = False
+):
+    """Admin: Stream all blog posts as NDJSON ordered by slug (resumable with after=)"""
+    verify_admin_key(admin_key)
+    return ndjson_response(export_cursor(db.blog_posts, "slug", after), "blog_posts", compress=gzip)
+
+
 
 async def get_auto_generated_posts(limit: int = Query(10, ge=1, le=50)):
     """Get auto-generated blog posts"""
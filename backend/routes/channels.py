@@ -1,17 +1,55 @@
+import re
+import time
 import logging
+from bisect import bisect_right
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request, Response
 from typing import List, Optional
 from database import db
-from routes.utils import store_channel_stats
-from models import ChannelCreate, ChannelResponse, CountryCreate, CountryResponse
+from routes.utils import store_channel_stats, cache_tags, encode_cursor, decode_cursor, keyset_after, channel_view, negotiated
+from models import ChannelCreate, ChannelBatchRequest, ChannelResponse, CountryCreate, CountryResponse
 from services.youtube_service import youtube_service
 from services.growth_analyzer import get_growth_analyzer
 from services.ranking_service import get_ranking_service
+from services.single_flight import single_flight
+from services.snapshot_store import get_snapshot_store
+from services.search_index import get_search_index
+from services.count_cache import get_count_cache
+from services.channel_views import DEFAULT_VIEW, channel_projection
+from services.comparison_engine import get_comparison_engine, MAX_COMPARE_CHANNELS
+from services.history_downsampler import get_history_downsampler
+from services.leaderboard_versions import get_leaderboard_versions
+from services.channel_index import get_channel_index
+from services.columnar import FORMATS, ROW_FORMAT, COLUMNAR_FORMAT, rows_to_columnar, comparison_to_columnar
 
 router = APIRouter(prefix="/api")
 growth_analyzer = get_growth_analyzer(db)
 ranking_service = get_ranking_service(db)
+snapshot_store = get_snapshot_store()
+search_index = get_search_index(db)
+count_cache = get_count_cache(db)
+comparison_engine = get_comparison_engine(db)
+history_downsampler = get_history_downsampler(db)
+leaderboard_versions = get_leaderboard_versions(db)
+channel_index = get_channel_index(db)
+
+# Most channels one /channels/batch request may ask for
+BATCH_MAX_IDS = 50
+
+# Growth history points embedded in /channels/{id} (LTTB-downsampled beyond this)
+CHANNEL_HISTORY_POINTS = 200
+
+# Columns of the time-series endpoints' columnar format
+HISTORY_FIELDS = ("subscriber_count", "view_count", "video_count")
+RANK_HISTORY_FIELDS = ("old_rank", "new_rank", "change")
+SERIES_FORMAT_PATTERN = f"^({'|'.join(FORMATS)})$"
+
+# Fields of the /channels/{id}/related entries
+RELATED_FIELDS = ("title", "thumbnail_url", "subscriber_count", "country_code", "country_name")
+
+# Channel list order; backed by the (country_code,) is_active, subscriber_count, channel_id indexes
+CHANNEL_LIST_SORT = [("subscriber_count", -1), ("channel_id", 1)]
+CHANNEL_CURSOR_TYPES = ((int, float, type(None)), (str,))
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +71,11 @@ async def get_countries(response: Response):
     """Get all tracked countries with their top channel"""
     # Cache for 10 minutes
     response.headers["Cache-Control"] = "public, max-age=600"
-    
+    cache_tags(response, "countries", "leaderboard")
+    return await _load_countries()
+
+@single_flight("countries", method=False)
+async def _load_countries() -> List[dict]:
     countries = await db.countries.find({}, {"_id": 0}).to_list(300)
     
     result = []
@@ -57,21 +99,25 @@ async def get_countries(response: Response):
     return result
 
 @router.get("/countries/{country_code}")
-async def get_country(country_code: str):
-    """Get detailed country information with top channels"""
+async def get_country(country_code: str, view: str = DEFAULT_VIEW, fields: Optional[str] = None):
+    """Get detailed country information with top channels (view=compact or fields=a,b for lighter channels)"""
+    view, field_names = channel_view(view, fields)
     country = await db.countries.find_one({"code": country_code.upper()}, {"_id": 0})
     if not country:
         raise HTTPException(status_code=404, detail="Country not found")
     
     # Get all channels for this country
-    channels = await db.channels.find(
-        {"country_code": country_code.upper(), "is_active": True},
-        {"_id": 0}
-    ).sort("subscriber_count", -1).to_list(100)
-    
-    # Assign ranks
-    for idx, channel in enumerate(channels):
-        channel["rank"] = idx + 1
+    if channel_index.ready and channel_index.covers(view, field_names):
+        channels = channel_index.country_leaderboard(country_code.upper(), 100, field_names)
+    else:
+        channels = await db.channels.find(
+            {"country_code": country_code.upper(), "is_active": True},
+            channel_projection(view, field_names)
+        ).sort("subscriber_count", -1).to_list(100)
+        
+        # Assign ranks
+        for idx, channel in enumerate(channels):
+            channel["rank"] = idx + 1
     
     # Get recent ranking changes for this country
     recent_changes = await db.rank_history.find(
@@ -111,27 +157,106 @@ async def get_all_channels(
     country_code: Optional[str] = None,
     search: Optional[str] = None,
     limit: int = Query(default=100, le=500),
-    skip: int = 0
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    view: str = DEFAULT_VIEW,
+    fields: Optional[str] = None
 ):
-    """Get all tracked channels, optionally filtered by country or search query"""
+    """
+    Get all tracked channels, optionally filtered by country or search query.
+    Pass next_cursor from the previous page as cursor to page without skip.
+    view=compact or fields=a,b return only the fields list pages need.
+    """
+    # The cursor is built from the sort key, so explicit field lists always carry it
+    projection = channel_projection(*channel_view(view, fields), always=("subscriber_count",))
     query = {"is_active": True}
     if country_code:
         query["country_code"] = country_code.upper()
+    after = decode_cursor(cursor, CHANNEL_CURSOR_TYPES) if cursor else None
     
-    # Add search filter for channel title
     if search and len(search) >= 2:
-        query["title"] = {"$regex": search, "$options": "i"}
-    
-    channels = await db.channels.find(query, {"_id": 0}).sort(
-        "subscriber_count", -1
-    ).skip(skip).limit(limit).to_list(limit)
-    
-    total = await db.channels.count_documents(query)
-    
-    return {"channels": channels, "total": total, "limit": limit, "skip": skip}
+        if search_index.ready:
+            # Page through index matches; only the page itself is read from Mongo
+            ids = search_index.match(search, country_code.upper() if country_code else None)
+            start = bisect_right(ids, (-(after[0] or 0), after[1]), key=search_index.sort_key) if after else skip
+            page_ids = ids[start:start + limit]
+            docs = await db.channels.find({"channel_id": {"$in": page_ids}}, projection).to_list(len(page_ids))
+            by_id = {doc["channel_id"]: doc for doc in docs}
+            channels = [by_id[cid] for cid in page_ids if cid in by_id]
+            return _channel_page(channels, len(ids), limit, skip)
+        # Index still loading at startup
+        query["title"] = {"$regex": re.escape(search), "$options": "i"}
+        total = await db.channels.count_documents(query)
+    else:
+        total = await count_cache.count("channels", query)
+    
+    page_query = {**query, **keyset_after("subscriber_count", after[0], "channel_id", after[1])} if after else query
+    channels = await db.channels.find(page_query, projection).sort(
+        CHANNEL_LIST_SORT
+    ).skip(0 if after else skip).limit(limit).to_list(limit)
+    
+    return _channel_page(channels, total, limit, skip)
+
+def _channel_page(channels: List[dict], total: int, limit: int, skip: int) -> dict:
+    next_cursor = None
+    if len(channels) == limit:
+        last = channels[-1]
+        next_cursor = encode_cursor([last.get("subscriber_count"), last["channel_id"]])
+    return {"channels": channels, "total": total, "limit": limit, "skip": skip, "next_cursor": next_cursor}
+
+@router.get("/channels/batch")
+async def get_channels_batch(
+    ids: str = Query(..., description="Comma-separated channel ids"),
+    history_days: int = Query(default=0, ge=0, le=90),
+    view: str = DEFAULT_VIEW,
+    fields: Optional[str] = None
+):
+    """
+    Get several channels in one request (compare, favorites, race views).
+    history_days > 0 adds daily growth histories aligned on the same dates.
+    """
+    return await _channels_batch(ids.split(","), history_days, view, fields)
+
+@router.post("/channels/batch")
+async def post_channels_batch(batch: ChannelBatchRequest):
+    """Same as GET /channels/batch, for id lists too long for a query string"""
+    return await _channels_batch(batch.ids, batch.history_days, batch.view, batch.fields)
+
+async def _channels_batch(ids: List[str], history_days: int, view: str, fields: Optional[str]) -> dict:
+    # Stored data only: unlike /channels/{id}, nothing here calls the YouTube API
+    ids = list(dict.fromkeys(i.strip() for i in ids if i.strip()))
+    if not ids:
+        raise HTTPException(status_code=400, detail="ids is required")
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per batch")
+    projection = channel_projection(*channel_view(view, fields))
+    
+    docs = await db.channels.find({"channel_id": {"$in": ids}}, projection).to_list(len(ids))
+    by_id = {doc["channel_id"]: doc for doc in docs}
+    channels = [by_id[cid] for cid in ids if cid in by_id]
+    
+    # Normalize like /channels/{id}, with one country lookup for the whole batch
+    unnamed = {c["country_code"] for c in channels if "country_name" not in c and "country_code" in c}
+    if unnamed:
+        countries = await db.countries.find({"code": {"$in": list(unnamed)}}, {"_id": 0, "code": 1, "name": 1}).to_list(len(unnamed))
+        names = {c["code"]: c["name"] for c in countries}
+    for channel in channels:
+        if "title" not in channel and "name" in channel:
+            channel["title"] = channel["name"]
+        if unnamed and channel.get("country_code") in unnamed:
+            channel["country_name"] = names.get(channel["country_code"], channel["country_code"])
+    
+    result = {"channels": channels, "missing": [cid for cid in ids if cid not in by_id]}
+    if history_days and channels:
+        aligned = await growth_analyzer.get_aligned_growth_histories([c["channel_id"] for c in channels], history_days)
+        for channel in channels:
+            channel["growth_history"] = aligned["histories"][channel["channel_id"]]
+        result["dates"] = aligned["dates"]
+    return result
+
 
 @router.get("/channels/{channel_id}")
-async def get_channel(channel_id: str):
+async def get_channel(channel_id: str, points: int = Query(default=CHANNEL_HISTORY_POINTS, ge=3, le=1000)):
     """Get detailed channel information"""
     channel = await db.channels.find_one({"channel_id": channel_id}, {"_id": 0})
     if not channel:
@@ -145,8 +270,8 @@ async def get_channel(channel_id: str):
         country = await db.countries.find_one({"code": channel["country_code"]}, {"_id": 0, "name": 1})
         channel["country_name"] = country["name"] if country else channel["country_code"]
     
-    # Get growth history
-    growth_history = await growth_analyzer.get_growth_history(channel_id, days=30)
+    # Get growth history, downsampled to chart size
+    growth_history = (await history_downsampler.get_history(channel_id, days=30, points=points))["history"]
     
     # Get top videos
     try:
@@ -171,22 +296,28 @@ async def get_channel(channel_id: str):
 
 
 @router.get("/channels/{channel_id}/related")
-async def get_related_channels(channel_id: str, limit: int = Query(default=6, le=20)):
+async def get_related_channels(response: Response, channel_id: str, limit: int = Query(default=6, le=20)):
     """Get related channels from the same country for internal linking"""
-    channel = await db.channels.find_one({"channel_id": channel_id}, {"_id": 0})
+    channel = channel_index.get(channel_id) if channel_index.ready else None
+    if channel is None:
+        channel = await db.channels.find_one({"channel_id": channel_id}, {"_id": 0})
     if not channel:
         raise HTTPException(status_code=404, detail="Channel not found")
     
     # Get other channels from the same country, excluding current channel
-    related = await db.channels.find(
-        {
-            "country_code": channel["country_code"],
-            "channel_id": {"$ne": channel_id},
-            "is_active": True
-        },
-        {"_id": 0, "channel_id": 1, "title": 1, "thumbnail_url": 1, "subscriber_count": 1, "country_code": 1, "country_name": 1}
-    ).sort("subscriber_count", -1).limit(limit).to_list(limit)
-    
+    if channel_index.ready:
+        related = channel_index.related(channel_id, channel["country_code"], limit, RELATED_FIELDS)
+    else:
+        related = await db.channels.find(
+            {
+                "country_code": channel["country_code"],
+                "channel_id": {"$ne": channel_id},
+                "is_active": True
+            },
+            channel_projection(fields=RELATED_FIELDS)
+        ).sort("subscriber_count", -1).limit(limit).to_list(limit)
+    
+    cache_tags(response, f"channel:{channel_id}", f"country:{channel['country_code']}", "leaderboard")
     return {"related_channels": related, "country_code": channel["country_code"], "country_name": channel.get("country_name", "")}
 
 
@@ -281,25 +412,64 @@ async def add_channel(channel_data: ChannelCreate, background_tasks: BackgroundT
     return {"message": "Channel added", "channel": channel_doc}
 
 
+# ==================== SEARCH ====================
+
+@router.get("/search/autocomplete")
+async def search_autocomplete(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=8, ge=1, le=20),
+    country_code: Optional[str] = None
+):
+    """Prefix search over tracked channel titles and custom URLs, biggest channels first"""
+    if not search_index.ready:
+        raise HTTPException(status_code=503, detail="Search index is loading")
+    
+    started = time.perf_counter()
+    results = search_index.autocomplete(q, limit, country_code.upper() if country_code else None)
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return {"query": q, "results": results, "took_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
 # ==================== LEADERBOARDS ====================
 
 @router.get("/leaderboard/global")
-async def get_global_leaderboard(response: Response, limit: int = Query(default=200, le=1000)):
-    """Get global top channels leaderboard"""
-    channels = await ranking_service.get_global_top_100()
-    # Add SEO headers
-    response.headers["Last-Modified"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
-    response.headers["Cache-Control"] = "public, max-age=300"
-    return {"channels": channels[:limit], "total": len(channels)}
+async def get_global_leaderboard(request: Request, limit: int = Query(default=200, le=1000),
+                                 view: str = DEFAULT_VIEW, fields: Optional[str] = None):
+    """Get global top channels leaderboard (served from a pre-compressed snapshot)"""
+    view, field_names = channel_view(view, fields)
+    
+    async def build():
+        # Version first: changes recorded while the channels are read are replayed, not lost
+        version = await leaderboard_versions.current_version()
+        channels = await ranking_service.get_global_top_100(view, field_names)
+        return {"channels": channels[:limit], "total": len(channels), "version": version}
+    
+    name = f"leaderboard.global:{limit}:{','.join(field_names) if field_names else view}"
+    snapshot = await snapshot_store.get_json(name, build, ttl=300, tags=["leaderboard"])
+    # Last-Modified is the snapshot build time
+    return snapshot_store.response(snapshot, request, {"Cache-Control": "public, max-age=300"})
+
+@router.get("/leaderboard/global/changes")
+async def get_global_leaderboard_changes(response: Response, since: int = Query(..., ge=0)):
+    """
+    Rank moves, subscriber count changes, entries and exits since leaderboard `version`
+    (as returned by /leaderboard/global). full_reload=true means refetch the leaderboard.
+    """
+    response.headers["Cache-Control"] = "public, max-age=60"
+    cache_tags(response, "leaderboard")
+    return await leaderboard_versions.changes_since(since)
 
 @router.get("/leaderboard/country/{country_code}")
-async def get_country_leaderboard(response: Response, country_code: str, limit: int = Query(default=50, le=100)):
+async def get_country_leaderboard(response: Response, country_code: str, limit: int = Query(default=50, le=100),
+                                  view: str = DEFAULT_VIEW, fields: Optional[str] = None):
     """Get country-specific leaderboard"""
-    channels = await ranking_service.get_country_leaderboard(country_code.upper(), limit)
+    channels = await ranking_service.get_country_leaderboard(country_code.upper(), limit, *channel_view(view, fields))
     country = await db.countries.find_one({"code": country_code.upper()}, {"_id": 0})
     # Add SEO headers
     response.headers["Last-Modified"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
     response.headers["Cache-Control"] = "public, max-age=300"
+    cache_tags(response, "leaderboard", f"country:{country_code.upper()}")
     return {
         "country": country,
         "channels": channels,
@@ -307,17 +477,21 @@ async def get_country_leaderboard(response: Response, country_code: str, limit:
     }
 
 @router.get("/leaderboard/fastest-growing")
-async def get_fastest_growing(response: Response, limit: int = Query(default=20, le=100)):
+async def get_fastest_growing(response: Response, limit: int = Query(default=20, le=100),
+                              view: str = DEFAULT_VIEW, fields: Optional[str] = None):
     """Get fastest growing channels by daily growth percentage"""
-    channels = await ranking_service.get_fastest_growing(limit)
+    channels = await ranking_service.get_fastest_growing(limit, *channel_view(view, fields))
     response.headers["Last-Modified"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    cache_tags(response, "leaderboard")
     return {"channels": channels}
 
 @router.get("/leaderboard/biggest-gainers")
-async def get_biggest_gainers(response: Response, limit: int = Query(default=20, le=100)):
+async def get_biggest_gainers(response: Response, limit: int = Query(default=20, le=100),
+                              view: str = DEFAULT_VIEW, fields: Optional[str] = None):
     """Get channels with biggest subscriber gain in 24h"""
-    channels = await ranking_service.get_biggest_gainers_24h(limit)
+    channels = await ranking_service.get_biggest_gainers_24h(limit, *channel_view(view, fields))
     response.headers["Last-Modified"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    cache_tags(response, "leaderboard")
     return {"channels": channels}
 
 
@@ -328,16 +502,27 @@ async def get_map_data(response: Response):
     """Get data for world map visualization - top channel per country"""
     # Cache for 5 minutes
     response.headers["Cache-Control"] = "public, max-age=300"
-    
+    cache_tags(response, "countries", "leaderboard")
+    return await _load_map_data()
+
+@single_flight("map_data", method=False)
+async def _load_map_data() -> dict:
     countries = await db.countries.find({}, {"_id": 0}).to_list(300)
+    # Served from the channel index once loaded; a single snapshot for the whole map
+    indexed = channel_index.ready
+    if indexed:
+        top_channels, channel_counts = channel_index.top_per_country(), channel_index.channel_counts()
     
     map_data = []
     for country in countries:
-        top_channel = await db.channels.find_one(
-            {"country_code": country["code"], "is_active": True},
-            {"_id": 0},
-            sort=[("subscriber_count", -1)]
-        )
+        if indexed:
+            top_channel = top_channels.get(country["code"])
+        else:
+            top_channel = await db.channels.find_one(
+                {"country_code": country["code"], "is_active": True},
+                {"_id": 0},
+                sort=[("subscriber_count", -1)]
+            )
         
         if top_channel:
             # Handle both 'title' and 'name' field names
@@ -346,7 +531,8 @@ async def get_map_data(response: Response):
                 "country_code": country["code"],
                 "country_name": country["name"],
                 "flag_emoji": country.get("flag_emoji", ""),
-                "channel_count": await db.channels.count_documents({"country_code": country["code"]}),
+                "channel_count": (channel_counts.get(country["code"], 0) if indexed
+                                  else await db.channels.count_documents({"country_code": country["code"]})),
                 "top_channel": {
                     "channel_id": top_channel.get("channel_id", ""),
                     "title": channel_title,
@@ -359,10 +545,72 @@ async def get_map_data(response: Response):
     return {"map_data": map_data}
 
 @router.get("/stats/channel/{channel_id}/history")
-async def get_channel_stats_history(channel_id: str, days: int = Query(default=30, le=90)):
-    """Get historical stats for a channel"""
-    history = await growth_analyzer.get_growth_history(channel_id, days)
-    return {"channel_id": channel_id, "history": history, "days": days}
+async def get_channel_stats_history(
+    request: Request,
+    channel_id: str,
+    days: int = Query(default=30, le=90),
+    points: Optional[int] = Query(default=None, ge=3, le=1000),
+    format: str = Query(default=ROW_FORMAT, pattern=SERIES_FORMAT_PATTERN),
+    delta: bool = False
+):
+    """
+    Get historical stats for a channel; points=N downsamples to at most N snapshots (LTTB).
+    format=columnar returns parallel arrays (delta=true delta-encodes integer columns);
+    send Accept: application/msgpack for MessagePack instead of JSON.
+    """
+    result = {"channel_id": channel_id, "days": days}
+    if points:
+        downsampled = await history_downsampler.get_history(channel_id, days, points)
+        history = downsampled["history"]
+        result.update(points=len(history), raw_points=downsampled["raw_points"])
+    else:
+        history = await growth_analyzer.get_growth_history(channel_id, days)
+    
+    result["history"] = rows_to_columnar(history, HISTORY_FIELDS, delta) if format == COLUMNAR_FORMAT else history
+    return negotiated(request, result)
+
+@router.get("/stats/channel/{channel_id}/rank-history")
+async def get_channel_rank_history(
+    request: Request,
+    channel_id: str,
+    days: int = Query(default=30, le=90),
+    format: str = Query(default=ROW_FORMAT, pattern=SERIES_FORMAT_PATTERN),
+    delta: bool = False
+):
+    """Get rank changes of a channel (same format/delta/MessagePack options as history)"""
+    history = await ranking_service.get_rank_history(channel_id, days)
+    if format == COLUMNAR_FORMAT:
+        history = rows_to_columnar(history, RANK_HISTORY_FIELDS, delta)
+    return negotiated(request, {"channel_id": channel_id, "days": days, "history": history})
+
+@router.get("/stats/compare")
+async def compare_channels(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated channel ids"),
+    days: int = Query(default=30, ge=1, le=90),
+    points: int = Query(default=60, ge=2, le=500),
+    metric: str = "subscriber_count",
+    baseline: Optional[str] = None,
+    format: str = Query(default=ROW_FORMAT, pattern=SERIES_FORMAT_PATTERN),
+    delta: bool = False
+):
+    """
+    Channel histories resampled onto one time grid, with the gap to the baseline
+    channel (default: first id) and its velocity per day, ready for charting.
+    format=columnar sends epoch-second timestamps (delta=true delta-encodes integers).
+    """
+    channel_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not channel_ids:
+        raise HTTPException(status_code=400, detail="ids is required")
+    if len(channel_ids) > MAX_COMPARE_CHANNELS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPARE_CHANNELS} channels per comparison")
+    try:
+        comparison = await comparison_engine.compare(channel_ids, days, points, metric, baseline)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == COLUMNAR_FORMAT:
+        comparison = comparison_to_columnar(comparison, delta)
+    return negotiated(request, comparison)
 
 @router.get("/stats/ranking-changes")
 async def get_ranking_changes(limit: int = Query(default=20, le=100)):
@@ -3,7 +3,8 @@ from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, HTTPException, Request
 from typing import Optional
 from database import db
-from routes.utils import get_current_user
+from routes.utils import get_current_user, channel_view
+from services.channel_views import DEFAULT_VIEW, channel_projection
 from models import ChannelRequestCreate, PollCreate, PollVote, AlertCreate, AlertUpdate
 
 router = APIRouter(prefix="/api")
@@ -218,8 +219,9 @@ async def create_poll(poll_data: PollCreate, request: Request):
 # ==================== USER FAVORITES (Synced) ====================
 
 @router.get("/user/favorites")
-async def get_user_favorites(request: Request):
+async def get_user_favorites(request: Request, view: str = DEFAULT_VIEW, fields: Optional[str] = None):
     """Get user's synced favorites"""
+    projection = channel_projection(*channel_view(view, fields))
     user = await get_current_user(request)
     
     if not user:
@@ -234,7 +236,7 @@ async def get_user_favorites(request: Request):
     channel_ids = [f["channel_id"] for f in favorites]
     channels = await db.channels.find(
         {"channel_id": {"$in": channel_ids}},
-        {"_id": 0}
+        projection
     ).to_list(100)
     
     return {"favorites": channels}
@@ -1,15 +1,19 @@
 import os
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request, Response
 from fastapi.responses import PlainTextResponse
 from database import db
 from services.youtube_service import youtube_service
 from services.ranking_service import get_ranking_service
 from services.growth_analyzer import get_growth_analyzer
+from services.discovery_service import get_discovery_service
+from services.snapshot_store import get_snapshot_store
 
 router = APIRouter(prefix="/api")
 ranking_service = get_ranking_service(db)
 growth_analyzer = get_growth_analyzer(db)
+discovery_service = get_discovery_service(db, youtube_service)
+snapshot_store = get_snapshot_store()
 
 # Scheduler service - set by server.py after startup
 _scheduler_service = None
@@ -25,7 +29,16 @@ def get_scheduler():
 # ==================== SITEMAP ====================
 
 @router.get("/sitemap.xml", response_class=PlainTextResponse)
-async def get_sitemap():
+async def get_sitemap(request: Request):
+    """Serve the XML sitemap from a pre-compressed snapshot (rebuilt hourly or on purge)"""
+    snapshot = await snapshot_store.get(
+        "sitemap", build_sitemap, "application/xml; charset=utf-8",
+        ttl=3600, tags=["sitemap", "blog", "countries", "leaderboard"]
+    )
+    return snapshot_store.response(snapshot, request, {"Cache-Control": "public, max-age=3600"})
+
+
+async def build_sitemap() -> bytes:
     """Generate dynamic XML sitemap for SEO - Quality over quantity"""
     base_url = os.environ.get('SITE_URL', 'https://mostpopularyoutubechannel.com').rstrip('/')
     today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
@@ -130,14 +143,7 @@ async def get_sitemap():
     
     xml_parts.append('</urlset>')
     
-    return Response(
-        content='\n'.join(xml_parts),
-        media_type='application/xml',
-        headers={
-            'Content-Type': 'application/xml; charset=utf-8',
-            'Cache-Control': 'public, max-age=3600'
-        }
-    )
+    return '\n'.join(xml_parts).encode('utf-8')
 
 
 # ==================== SCHEDULER STATUS ====================
@@ -159,6 +165,15 @@ async def trigger_manual_refresh(background_tasks: BackgroundTasks):
     background_tasks.add_task(svc.refresh_all_channels)
     return {"message": "Channel refresh triggered"}
 
+@router.post("/scheduler/trigger-snippet-refresh")
+async def trigger_snippet_refresh(background_tasks: BackgroundTasks):
+    """Manually trigger a refresh of channel titles, descriptions and thumbnails (admin)"""
+    svc = get_scheduler()
+    if svc is None:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    background_tasks.add_task(svc.refresh_channel_snippets)
+    return {"message": "Channel snippet refresh triggered"}
+
 @router.post("/scheduler/trigger-ranking")
 async def trigger_manual_ranking(background_tasks: BackgroundTasks):
     """Manually trigger ranking update (admin)"""
@@ -223,17 +238,10 @@ async def get_quota_estimate():
     # Count channels
     channel_count = await db.channels.count_documents({"is_active": True})
     
-    # Count countries
-    countries = await db.countries.find({}, {"code": 1}).to_list(300)
-    empty_countries = 0
-    low_coverage = 0
-    
-    for country in countries:
-        count = await db.channels.count_documents({"country_code": country["code"]})
-        if count == 0:
-            empty_countries += 1
-        elif count <= 5:
-            low_coverage += 1
+    # Count countries by coverage (one aggregation over channels)
+    coverage = await discovery_service.find_countries_by_coverage(0, 5)
+    empty_countries = sum(1 for _, count in coverage if count == 0)
+    low_coverage = len(coverage) - empty_countries
     
     # Calculate quota usage
     # channels.list = 1 unit per request (batches of 50)
@@ -242,6 +250,7 @@ async def get_quota_estimate():
     refresh_per_day = 12  # Every 2 hours
     batches_per_refresh = (channel_count // 50) + 1
     refresh_quota = refresh_per_day * batches_per_refresh * 1  # 1 unit per batch
+    snippet_refresh_quota = batches_per_refresh * 1  # Once a day
     
     discovery_per_day = 3  # Every 8 hours
     discovery_searches = min(10, empty_countries)  # 10 countries per run max
@@ -256,18 +265,24 @@ async def get_quota_estimate():
     new_channel_fetches = (discovery_searches + expansion_searches) * avg_channels_per_search * (discovery_per_day + expansion_per_day) // 2
     fetch_quota = new_channel_fetches * 1  # 1 unit per channel
     
-    total_daily = refresh_quota + discovery_quota + expansion_quota + fetch_quota
+    total_daily = refresh_quota + snippet_refresh_quota + discovery_quota + expansion_quota + fetch_quota
+    daily_quota_limit = youtube_service.key_pool.total_daily_quota
     
     return {
-        "daily_quota_limit": 10000,
+        "daily_quota_limit": daily_quota_limit,
+        "api_keys": youtube_service.key_pool.size,
         "estimated_daily_usage": total_daily,
-        "quota_remaining": 10000 - total_daily,
+        "quota_remaining": daily_quota_limit - total_daily,
         "breakdown": {
             "channel_refresh": {
                 "runs_per_day": refresh_per_day,
                 "channels": channel_count,
                 "quota_per_day": refresh_quota
             },
+            "snippet_refresh": {
+                "runs_per_day": 1,
+                "quota_per_day": snippet_refresh_quota
+            },
             "channel_discovery": {
                 "runs_per_day": discovery_per_day,
                 "empty_countries": empty_countries,
@@ -286,6 +301,12 @@ async def get_quota_estimate():
     }
 
 
+@router.get("/scheduler/quota-usage")
+async def get_quota_usage():
+    """Get actual YouTube API quota usage per key for the current quota day"""
+    return youtube_service.get_quota_usage()
+
+
 @router.get("/blog/posts/auto-generated")
 async def get_auto_generated_posts(limit: int = Query(10, ge=1, le=50)):
     """Get auto-generated blog posts"""
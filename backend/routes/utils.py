@@ -2,10 +2,26 @@
 Shared utility functions for TopTube World Pro routes.
 """
 import os
+import json
+import zlib
+import base64
+import binascii
 from datetime import datetime, timezone
-from typing import Optional
-from fastapi import Request, HTTPException
+from typing import Any, List, Optional, AsyncIterator, Tuple
+from fastapi import Request, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from database import db
+from services.channel_views import parse_fields, channel_projection
+from services.columnar import accepts_msgpack
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are optional
+    msgpack = None
+
+# Documents serialized per chunk written to a streaming export
+EXPORT_CHUNK_SIZE = 500
 
 
 async def get_current_user(request: Request) -> Optional[dict]:
@@ -44,6 +60,85 @@ def verify_admin_key(admin_key: str):
         raise HTTPException(status_code=403, detail="Invalid admin key")
 
 
+def cache_tags(response: Response, *tags: str):
+    """Let the response cache store this response, purgeable by any of the tags"""
+    response.headers["Surrogate-Key"] = " ".join(tags)
+
+
+def negotiated(request: Request, content: dict) -> Response:
+    """content as MessagePack when the client's Accept header asks for it (and msgpack is installed), else JSON"""
+    content = jsonable_encoder(content)
+    if msgpack is not None and accepts_msgpack(request.headers.get("accept", "")):
+        body = msgpack.packb(content, use_bin_type=True)
+        return Response(content=body, media_type="application/msgpack", headers={"Vary": "Accept"})
+    return JSONResponse(content, headers={"Vary": "Accept"})
+
+
+def channel_view(view: str, fields: Optional[str]) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    """Validated view=/fields= params of a channel list endpoint; 400 if invalid"""
+    try:
+        parsed = parse_fields(fields)
+        channel_projection(view, parsed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return view, parsed
+
+
+def _cursor_default(value):
+    """Datetimes (BSON Dates) keep their type through a cursor as {"$date": iso}"""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return _json_default(value)
+
+
+def _cursor_object(obj: dict):
+    if set(obj) == {"$date"} and isinstance(obj["$date"], str):
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque pagination cursor for the sort key values of the last item on a page"""
+    raw = json.dumps(values, separators=(",", ":"), default=_cursor_default).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, types: Tuple[Tuple[type, ...], ...]) -> List[Any]:
+    """
+    Sort key values from a cursor made by encode_cursor, one per entry of types (the
+    types each value may have); 400 if it's malformed or a value has another type
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)), object_hook=_cursor_object)
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != len(types) or not all(
+        isinstance(value, allowed) and (type(value) is not bool or bool in allowed)
+        for value, allowed in zip(values, types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_after(field: str, value: Any, tiebreak: str, tiebreak_value: Any) -> dict:
+    """
+    Filter for documents after (value, tiebreak_value) in (field descending, tiebreak
+    ascending) order. Missing/null values sort last in that order.
+    """
+    if value is None:
+        return {field: None, tiebreak: {"$gt": tiebreak_value}}
+    after = [
+        {field: {"$lt": value}},
+        {field: value, tiebreak: {"$gt": tiebreak_value}},
+        {field: None}
+    ]
+    # $lt only compares within a BSON type; Dates sort above strings, so when a field
+    # holds both (imported vs app-written timestamps) every string comes after a Date
+    if isinstance(value, datetime):
+        after.append({field: {"$type": "string"}})
+    return {"$or": after}
+
+
 def format_number_simple(num):
     """Format number for display (e.g., 1234567 -> 1.23M)"""
     if num >= 1_000_000_000:
@@ -65,3 +160,48 @@ async def store_channel_stats(channel_id: str, yt_data: dict):
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
     await db.channel_stats.insert_one(stats_doc)
+
+
+def _json_default(value):
+    """JSON fallback for values Motor returns that json can't encode (datetimes, ObjectIds)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def ndjson_stream(cursor, compress: bool = False) -> AsyncIterator[bytes]:
+    """Serialize a Motor cursor as NDJSON chunks, optionally gzip-compressed on the fly"""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    lines = []
+    
+    async for doc in cursor:
+        lines.append(json.dumps(doc, default=_json_default, ensure_ascii=False))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            chunk = ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH) if compressor else chunk
+    
+    chunk = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+    yield compressor.compress(chunk) + compressor.flush() if compressor else chunk
+
+
+def export_cursor(collection, key: str, after: Optional[str] = None, query: Optional[dict] = None):
+    """Cursor over a collection in `key` order, resuming after the given key value"""
+    query = dict(query or {})
+    if after:
+        query[key] = {"$gt": after}
+    return collection.find(query, {"_id": 0}).sort(key, 1).batch_size(EXPORT_CHUNK_SIZE)
+
+
+def ndjson_response(cursor, filename: str, compress: bool = False) -> StreamingResponse:
+    """Stream a cursor as an NDJSON download (.ndjson.gz when compressed)"""
+    if compress:
+        media_type, filename = "application/gzip", f"{filename}.ndjson.gz"
+    else:
+        media_type, filename = "application/x-ndjson", f"{filename}.ndjson"
+    
+    return StreamingResponse(
+        ndjson_stream(cursor, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -2,15 +2,33 @@
 Widget Routes for TopTube World Pro
 Provides embeddable widgets for external sites
 """
+import json
+import asyncio
 import logging
-from fastapi import APIRouter, Query, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Response
 from typing import Optional
+from services.widget_hub import get_widget_hub
+from services.widget_renderer import get_widget_renderer
+from services.badge_renderer import get_badge_renderer, png_supported
+from routes.utils import format_number_simple
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/widgets", tags=["widgets"])
 
+# Server-Sent Events settings for /stream
+MAX_STREAM_CHANNELS = 50
+SSE_HEARTBEAT_SECONDS = 25
+SSE_RETRY_MS = 10000
+
+# Live widget pages: counts arrive over the stream, so the page itself can be cached briefly
+WIDGET_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=600"
+
+# Badges are fetched through image proxies (e.g. GitHub's camo) that honour these
+BADGE_CACHE_CONTROL = "public, max-age=600, stale-while-revalidate=3600"
+BADGE_MEDIA_TYPES = {"svg": "image/svg+xml", "png": "image/png"}
+
 def get_db():
     """Get database instance"""
     from database import db
@@ -57,6 +75,12 @@ async def get_widget_embed_code(
     js_code = f'''<div id="toptube-widget-{channel_id}"></div>
 <script src="{base_url}/api/widgets/script.js" data-channel="{channel_id}" data-theme="{theme}" data-size="{size}"></script>'''
 
+    # Badge image (no scripts needed)
+    badge_url = f"{base_url}/api/widgets/badge/{channel_id}.svg"
+    channel_url = f"{base_url}/channel/{channel_id}"
+    badge_markdown = f"[![{channel.get('title', 'Channel')} subscribers]({badge_url})]({channel_url})"
+    badge_html = f'<a href="{channel_url}"><img src="{badge_url}" alt="{channel.get("title", "Channel")} subscribers"></a>'
+
     return {
         "channel_id": channel_id,
         "channel_name": channel.get("title"),
@@ -64,7 +88,9 @@ async def get_widget_embed_code(
         "embed_codes": {
             "iframe": iframe_code,
             "javascript": js_code,
-            "direct_url": embed_url
+            "direct_url": embed_url,
+            "badge_markdown": badge_markdown,
+            "badge_html": badge_html
         },
         "customization_options": {
             "themes": ["dark", "light", "transparent"],
@@ -76,6 +102,7 @@ async def get_widget_embed_code(
 
 @router.get("/live/{channel_id}", response_class=HTMLResponse)
 async def get_live_widget(
+    request: Request,
     channel_id: str,
     theme: str = Query("dark", description="Widget theme"),
     size: str = Query("medium", description="Widget size"),
@@ -86,213 +113,58 @@ async def get_live_widget(
 ):
     """
     Returns an HTML widget showing live subscriber count
-    Auto-refreshes every 60 seconds
+    Updates are pushed over /api/widgets/stream (60 second polling without EventSource).
+    Rendered once per channel data version and served with an ETag.
     """
-    db = get_db()
-    channel = await db.channels.find_one({"channel_id": channel_id}, {"_id": 0})
+    renderer = get_widget_renderer(get_db())
+    rendered = await renderer.render_live(channel_id, theme, size, show_name, show_thumbnail, show_growth, animate)
     
-    if not channel:
+    if not rendered:
         return HTMLResponse(
             content="<div style='padding:20px;color:#ef4444;'>Channel not found</div>",
             status_code=404
         )
     
-    # Theme colors
-    themes = {
-        "dark": {
-            "bg": "#0a0a0a",
-            "text": "#ffffff",
-            "subtext": "#9ca3af",
-            "accent": "#ef4444",
-            "border": "#333333"
-        },
-        "light": {
-            "bg": "#ffffff",
-            "text": "#111827",
-            "subtext": "#6b7280",
-            "accent": "#dc2626",
-            "border": "#e5e7eb"
-        },
-        "transparent": {
-            "bg": "transparent",
-            "text": "#ffffff",
-            "subtext": "#9ca3af",
-            "accent": "#ef4444",
-            "border": "transparent"
-        }
-    }
-    
-    colors = themes.get(theme, themes["dark"])
-    
-    # Size configurations
-    sizes = {
-        "small": {"width": 280, "height": 70, "font_size": 18, "thumbnail": 36, "padding": 12},
-        "medium": {"width": 360, "height": 90, "font_size": 24, "thumbnail": 48, "padding": 16},
-        "large": {"width": 450, "height": 120, "font_size": 32, "thumbnail": 64, "padding": 20}
-    }
-    
-    s = sizes.get(size, sizes["medium"])
+    etag, html = rendered
+    headers = {"ETag": etag, "Cache-Control": WIDGET_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
     
-    # Format subscriber count
-    subs = channel.get("subscriber_count", 0)
-    growth = channel.get("daily_subscriber_gain", 0)
+    return HTMLResponse(content=html, headers=headers)
+
+
+@router.get("/badge/{channel_id}.{fmt}")
+async def get_subscriber_badge(
+    request: Request,
+    channel_id: str,
+    fmt: str,
+    label: str = Query("subscribers", max_length=40, description="Left-hand badge text"),
+    show_growth: bool = Query(True, description="Show 24h subscriber gain")
+):
+    """
+    Shields-style subscriber count badge as SVG (or PNG) for READMEs and forums
+    """
+    if fmt not in ("svg", "png"):
+        raise HTTPException(status_code=404, detail="Badge format must be svg or png")
+    if fmt == "png" and not png_supported():
+        raise HTTPException(status_code=501, detail="PNG badges are not available on this server")
     
-    # Build HTML content conditionally
-    thumbnail_html = f'<img class="thumbnail" src="{channel.get("thumbnail_url", "")}" alt="" loading="lazy">' if show_thumbnail else ""
-    name_html = f'<div class="name">{channel.get("title", "Channel")[:30]}</div>' if show_name else ""
-    growth_html = f'<div class="growth">+{growth:,} today</div>' if show_growth and growth > 0 else ""
+    data = await get_widget_renderer(get_db()).get_channel(channel_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    version, channel = data
     
-    # Build animation script
-    animation_script = ""
-    if animate:
-        animation_script = f'''
-        let currentCount = {subs};
-        const countEl = document.getElementById("subCount");
-        
-        function animateCount(start, end, duration) {{
-            const startTime = performance.now();
-            const diff = end - start;
-            
-            function update(currentTime) {{
-                const elapsed = currentTime - startTime;
-                const progress = Math.min(elapsed / duration, 1);
-                const easeOut = 1 - Math.pow(1 - progress, 3);
-                const current = Math.round(start + diff * easeOut);
-                countEl.textContent = current.toLocaleString();
-                
-                if (progress < 1) {{
-                    requestAnimationFrame(update);
-                }}
-            }}
-            
-            requestAnimationFrame(update);
-        }}
-        
-        async function refreshCount() {{
-            try {{
-                const res = await fetch("/api/widgets/data/{channel_id}");
-                const data = await res.json();
-                if (data.subscriber_count !== currentCount) {{
-                    animateCount(currentCount, data.subscriber_count, 1000);
-                    currentCount = data.subscriber_count;
-                }}
-            }} catch (e) {{
-                console.error("Refresh failed:", e);
-            }}
-        }}
-        
-        setInterval(refreshCount, 60000);
-        '''
+    gain = channel.get("daily_subscriber_gain") or 0
+    growth = f"+{format_number_simple(gain)} 24h" if show_growth and gain > 0 else None
+    etag, body = await get_badge_renderer(get_db()).render(
+        channel_id, version, fmt, label, format_number_simple(channel.get("subscriber_count", 0)), growth
+    )
     
-    html = f'''
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: {colors["bg"]};
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }}
-        .widget {{
-            background: {colors["bg"]};
-            border: 1px solid {colors["border"]};
-            border-radius: 12px;
-            padding: {s["padding"]}px;
-            display: flex;
-            align-items: center;
-            gap: {s["padding"]}px;
-            width: {s["width"]}px;
-            max-width: 100%;
-        }}
-        .thumbnail {{
-            width: {s["thumbnail"]}px;
-            height: {s["thumbnail"]}px;
-            border-radius: 50%;
-            object-fit: cover;
-            flex-shrink: 0;
-        }}
-        .info {{
-            flex: 1;
-            min-width: 0;
-            overflow: hidden;
-        }}
-        .name {{
-            color: {colors["text"]};
-            font-size: {s["font_size"] * 0.5}px;
-            font-weight: 600;
-            white-space: nowrap;
-            overflow: hidden;
-            text-overflow: ellipsis;
-            margin-bottom: 4px;
-        }}
-        .count {{
-            color: {colors["accent"]};
-            font-size: {s["font_size"]}px;
-            font-weight: 700;
-            line-height: 1.2;
-        }}
-        .growth {{
-            color: #22c55e;
-            font-size: {s["font_size"] * 0.4}px;
-            margin-top: 2px;
-        }}
-        .label {{
-            color: {colors["subtext"]};
-            font-size: {s["font_size"] * 0.35}px;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }}
-        .powered {{
-            color: {colors["subtext"]};
-            font-size: 9px;
-            text-align: right;
-            margin-top: 4px;
-            opacity: 0.7;
-        }}
-        .powered a {{
-            color: {colors["accent"]};
-            text-decoration: none;
-        }}
-        @keyframes pulse {{
-            0%, 100% {{ opacity: 1; }}
-            50% {{ opacity: 0.7; }}
-        }}
-        .live-indicator {{
-            display: inline-block;
-            width: 8px;
-            height: 8px;
-            background: #ef4444;
-            border-radius: 50%;
-            margin-right: 6px;
-            animation: pulse 2s infinite;
-        }}
-    </style>
-</head>
-<body>
-    <div class="widget">
-        {thumbnail_html}
-        <div class="info">
-            {name_html}
-            <div class="count" id="subCount">{subs:,}</div>
-            <div class="label"><span class="live-indicator"></span>Subscribers</div>
-            {growth_html}
-        </div>
-    </div>
-    <script>
-        {animation_script}
-    </script>
-</body>
-</html>
-'''
+    headers = {"ETag": etag, "Cache-Control": BADGE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
     
-    return HTMLResponse(content=html)
+    return Response(content=body, media_type=BADGE_MEDIA_TYPES[fmt], headers=headers)
 
 
 @router.get("/data/{channel_id}")
@@ -316,6 +188,57 @@ async def get_widget_data(channel_id: str):
     }
 
 
+@router.get("/stream")
+async def stream_widget_updates(
+    request: Request,
+    channels: str = Query(..., description="Comma-separated channel ids (max 50)")
+):
+    """
+    Server-Sent Events feed of subscriber count updates for one or more channels.
+    Sends the current data on connect, then an `update` event whenever a refresh
+    changes a channel's subscriber count.
+    """
+    channel_ids = list(dict.fromkeys(c.strip() for c in channels.split(",") if c.strip()))
+    if not channel_ids or len(channel_ids) > MAX_STREAM_CHANNELS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_STREAM_CHANNELS} channel ids")
+    
+    hub = get_widget_hub(get_db())
+    queue = await hub.open_stream(channel_ids)
+    
+    async def events():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                    yield f"event: update\ndata: {json.dumps(payload)}\n\n"
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+        finally:
+            hub.close_stream(channel_ids, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stream/stats")
+async def get_widget_stream_stats():
+    """
+    Open widget streams, subscribed channels and hub reads/pushes in this process,
+    plus live widget and badge render cache hits
+    """
+    return {
+        **get_widget_hub(get_db()).get_stats(),
+        "render_cache": get_widget_renderer(get_db()).get_stats(),
+        "badge_cache": get_badge_renderer(get_db()).get_stats()
+    }
+
+
 @router.get("/script.js", response_class=HTMLResponse)
 async def get_widget_script():
     """
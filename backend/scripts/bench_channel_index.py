@@ -0,0 +1,121 @@
+"""
+Benchmark: memory footprint and query time of the in-memory channel index.
+
+Loads synthetic channels (compact-view fields) into ChannelIndex and compares the
+memory it retains with the same channels held as a list of compact-view dicts, then
+times the leaderboard, country and map queries and a re-sort after an update.
+Memory is measured with tracemalloc as the bytes still allocated after loading.
+
+Usage:
+    python scripts/bench_channel_index.py [--channels 100000] [--repeat 50]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+from services.channel_index import ChannelIndex
+
+COUNTRIES = [("US", "United States"), ("IN", "India"), ("BR", "Brazil"), ("MX", "Mexico"),
+             ("KR", "South Korea"), ("JP", "Japan"), ("GB", "United Kingdom")]
+
+
+def synthetic_channels(count: int):
+    """Channel documents as read with the index projection, freshly allocated on every call"""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc).isoformat()
+    for i in range(count):
+        subscribers = int(300_000_000 / (i + 1) ** 0.7)
+        code, name = rng.choice(COUNTRIES)
+        yield {
+            "channel_id": f"UC{i:022d}",
+            "title": f"Channel {i}",
+            "custom_url": f"@channel{i}",
+            "thumbnail_url": f"https://yt3.ggpht.com/channel-{i}=s88-c-k-c0x00ffffff-no-rj",
+            "country_code": "".join(code),
+            "country_name": "".join(name),
+            "subscriber_count": subscribers,
+            "view_count": subscribers * rng.randint(100, 400),
+            "video_count": rng.randint(50, 20000),
+            "daily_subscriber_gain": rng.randint(-1000, 50000),
+            "weekly_subscriber_gain": rng.randint(-5000, 300000),
+            "monthly_subscriber_gain": rng.randint(-20000, 1000000),
+            "daily_growth_percent": round(rng.uniform(-0.1, 2.0), 4),
+            "weekly_growth_percent": round(rng.uniform(-0.5, 8.0), 4),
+            "monthly_growth_percent": round(rng.uniform(-1.0, 30.0), 4),
+            "viral_label": "".join(rng.choice(["Stable", "Rising Fast", "Exploding"])),
+            "viral_score": round(rng.uniform(0, 100), 2),
+            "current_rank": i + 1,
+            "previous_rank": i + 1 + rng.randint(-2, 2),
+            "updated_at": "".join(now),
+            "is_active": rng.random() < 0.97,
+        }
+
+
+def retained_bytes(load) -> tuple:
+    """(object returned by load(), bytes it keeps allocated)"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = load()
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before
+
+
+def timed_ms(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    docs, dict_bytes = retained_bytes(lambda: list(synthetic_channels(args.channels)))
+    del docs
+
+    def load_index():
+        index = ChannelIndex(db=None)
+        index.load(synthetic_channels(args.channels))
+        return index
+
+    index, index_bytes = retained_bytes(load_index)
+    tracemalloc.stop()
+    estimate = index.memory_bytes()
+
+    print(f"{args.channels:,} channels")
+    print(f"{'holder':>22} {'MiB':>8} {'bytes/channel':>14}")
+    for name, size in (("list of compact dicts", dict_bytes), ("channel index", index_bytes),
+                       ("  numpy columns", estimate["arrays"])):
+        print(f"{name:>22} {size / 2**20:>8.1f} {size / args.channels:>14,.0f}")
+
+    docs = list(synthetic_channels(args.channels))
+    queries = {
+        "global top 1000 (dicts)": lambda: sorted(
+            (d for d in docs if d["is_active"]), key=lambda d: d["subscriber_count"], reverse=True)[:1000],
+        "global top 1000 (index)": lambda: index.global_leaderboard(1000),
+        "fastest growing 100": lambda: index.fastest_growing(100),
+        "country top 100": lambda: index.country_leaderboard("IN", 100),
+        "map (top + counts)": lambda: (index.top_per_country(), index.channel_counts()),
+        "re-sort after update": index._resort,
+    }
+    print(f"\n{'query':>24} {'ms':>8}")
+    for name, fn in queries.items():
+        print(f"{name:>24} {timed_ms(fn, args.repeat):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: requests/sec on GET /api/leaderboard/global?limit=1000 through the gzip middleware.
+
+Compares the old handler (JSON encoded and gzip-compressed on every request) with the
+current snapshot-backed handler (pre-compressed gzip/brotli variants). Requests are
+driven straight through the ASGI app, so the numbers are event-loop CPU per request
+with the database read taken out of both sides.
+
+Usage:
+    python scripts/bench_leaderboard.py [--channels 1000] [--requests 500] [--encoding "gzip, deflate, br"]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+from fastapi import FastAPI, Query, Response
+
+import routes.channels as channels_routes
+from middleware import StreamingAwareGZipMiddleware
+
+
+def synthetic_channels(count: int):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc).isoformat()
+    channels = []
+    for i in range(count):
+        subscribers = int(300_000_000 / (i + 1) ** 0.7)
+        channels.append({
+            "channel_id": f"UC{i:022d}",
+            "title": f"Channel {i}",
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+            "thumbnail_url": f"https://yt3.ggpht.com/channel-{i}=s88-c-k-c0x00ffffff-no-rj",
+            "country_code": rng.choice(["US", "IN", "BR", "MX", "KR", "JP", "GB"]),
+            "country_name": "Country",
+            "subscriber_count": subscribers,
+            "view_count": subscribers * rng.randint(100, 400),
+            "video_count": rng.randint(50, 20000),
+            "daily_subscriber_gain": rng.randint(-1000, 50000),
+            "daily_growth_percent": round(rng.uniform(-0.1, 2.0), 4),
+            "weekly_growth_percent": round(rng.uniform(-0.5, 8.0), 4),
+            "viral_label": rng.choice(["Stable", "Rising Fast", "Exploding"]),
+            "current_rank": i + 1,
+            "previous_rank": i + 1 + rng.randint(-2, 2),
+            "is_active": True,
+            "updated_at": now,
+        })
+    return channels
+
+
+def legacy_app(ranking_service) -> FastAPI:
+    """The handler as it was before snapshots: a dict re-encoded and gzipped per request"""
+    app = FastAPI()
+    app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=500)
+
+    @app.get("/api/leaderboard/global")
+    async def get_global_leaderboard(response: Response, limit: int = Query(default=200, le=1000)):
+        channels = await ranking_service.get_global_top_100()
+        response.headers["Last-Modified"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+        response.headers["Cache-Control"] = "public, max-age=300"
+        return {"channels": channels[:limit], "total": len(channels)}
+
+    return app
+
+
+def snapshot_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=500)
+    app.include_router(channels_routes.router)
+    return app
+
+
+async def run(app, requests: int, encoding: str):
+    """(requests/sec, bytes of the last response body, content-encoding)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/leaderboard/global", "raw_path": b"/api/leaderboard/global",
+        "query_string": b"limit=1000", "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"accept-encoding", encoding.encode())],
+    }
+    result = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["encoding"] = dict(message["headers"]).get(b"content-encoding", b"identity").decode()
+        elif message["type"] == "http.response.body":
+            result["bytes"] = len(message.get("body", b""))
+
+    await app(dict(scope), receive, send)  # warm-up (builds the snapshot)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, result["bytes"], result["encoding"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--encoding", default="gzip, deflate, br", help="Accept-Encoding sent by the client")
+    args = parser.parse_args()
+
+    channels = synthetic_channels(args.channels)
+
+    async def get_global_top_100(*args):
+        return channels
+
+    ranking_service = channels_routes.ranking_service
+    ranking_service.get_global_top_100 = get_global_top_100
+
+    print(f"{args.channels} channels, {args.requests} requests, Accept-Encoding: {args.encoding}")
+    print(f"{'handler':>10} {'req/s':>10} {'bytes':>10} {'encoding':>10}")
+    for name, app in (("legacy", legacy_app(ranking_service)), ("snapshot", snapshot_app())):
+        rps, size, encoding = await run(app, args.requests, args.encoding)
+        print(f"{name:>10} {rps:>10,.0f} {size:>10,} {encoding:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
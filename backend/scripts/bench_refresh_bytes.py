@@ -0,0 +1,76 @@
+"""
+Benchmark: bytes transferred per channel refresh against the local YouTube API emulator.
+
+Compares the old refresh request (part=statistics,snippet, full payload every time)
+with the current statistics-only pass (fields mask + If-None-Match ETags).
+
+Usage:
+    python scripts/bench_refresh_bytes.py [--change-rate 0.02] [--refreshes 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import aiohttp
+
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault('YOUTUBE_API_KEYS', 'bench-key-1')
+
+import services.youtube_service as youtube_module
+from services.youtube_service import YouTubeService
+from emulator.youtube_api import DEFAULT_DATASET, EmulatorDataset, YouTubeEmulator, start_emulator
+
+EMULATOR_PORT = 8765
+
+
+# ==================== MEASUREMENTS ====================
+
+async def legacy_refresh(channel_ids) -> int:
+    """The pre-field-mask refresh: statistics+snippet, no fields, no ETags"""
+    total = 0
+    async with aiohttp.ClientSession() as session:
+        for i in range(0, len(channel_ids), 50):
+            params = {"key": "bench-key-1", "part": "statistics,snippet", "id": ",".join(channel_ids[i:i + 50])}
+            async with session.get(f"{youtube_module.YOUTUBE_API_BASE}/channels", params=params) as response:
+                total += len(await response.read())
+    return total
+
+
+async def current_refresh(service: YouTubeService, channel_ids) -> int:
+    before = service.get_transfer_stats()["bytes_received"]
+    await service.get_batch_channel_stats(channel_ids, include_snippet=False)
+    return service.get_transfer_stats()["bytes_received"] - before
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--change-rate", type=float, default=0.02, help="Fraction of channels whose counts change between refreshes")
+    parser.add_argument("--refreshes", type=int, default=3)
+    args = parser.parse_args()
+
+    emulator = YouTubeEmulator(EmulatorDataset.from_file(DEFAULT_DATASET))
+    channel_ids = sorted(emulator.dataset.channels)
+
+    runner = await start_emulator(emulator, port=EMULATOR_PORT)
+    youtube_module.YOUTUBE_API_BASE = f"http://127.0.0.1:{EMULATOR_PORT}/youtube/v3"
+
+    service = YouTubeService()
+    service._cache_ttl = 0  # Measure the wire, not the in-process cache
+
+    print(f"{len(channel_ids)} channels, {(len(channel_ids) + 49) // 50} batches, change rate {args.change_rate:.0%}")
+    print(f"{'refresh':>8} {'legacy bytes':>14} {'current bytes':>14} {'saved':>8}")
+    for n in range(1, args.refreshes + 1):
+        legacy = await legacy_refresh(channel_ids)
+        current = await current_refresh(service, channel_ids)
+        print(f"{n:>8} {legacy:>14,} {current:>14,} {1 - current / legacy:>8.1%}")
+        emulator.dataset.drift(args.change_rate)
+
+    stats = service.get_transfer_stats()
+    print(f"current: {stats['requests']} requests, {stats['not_modified']} answered 304")
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
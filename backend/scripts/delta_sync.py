@@ -0,0 +1,149 @@
+"""
+Delta sync of channels and blog posts between two TopTube environments.
+
+Both sides publish a {key: content hash} manifest; only documents that are new or
+whose hash differs are fetched from the source and upserted into the target, in
+chunks, with bounded parallelism and retries.
+
+Usage:
+    python scripts/delta_sync.py --source https://preview.example.com --target https://mostpopularyoutubechannel.com
+    python scripts/delta_sync.py --source ... --target ... --collection blog_posts --dry-run
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.content_hash import SYNC_COLLECTIONS, diff_manifests
+
+# Target endpoint that upserts a streamed NDJSON body, per collection
+IMPORT_PATHS = {
+    "channels": "/api/admin/import-channels/stream",
+    "blog_posts": "/api/admin/import-blog-posts/stream"
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SyncError(Exception):
+    pass
+
+
+async def request_with_retries(session: aiohttp.ClientSession, method: str, url: str, retries: int, **kwargs) -> bytes:
+    """Send a request, retrying connection errors and retryable statuses with exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                body = await response.read()
+                if response.status < 400:
+                    return body
+                if response.status not in RETRY_STATUSES:
+                    raise SyncError(f"{method} {url} -> {response.status}: {body[:200]!r}")
+                error = f"HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+
+        if attempt < retries:
+            await asyncio.sleep(2 ** attempt)
+    raise SyncError(f"{method} {url} failed after {retries + 1} attempts: {error}")
+
+
+async def fetch_manifest(session, base_url: str, collection: str, retries: int) -> dict:
+    body = await request_with_retries(session, "GET", f"{base_url}/api/admin/sync/{collection}/manifest", retries)
+    return json.loads(body)["hashes"]
+
+
+async def sync_chunk(session, args, collection: str, keys: list) -> dict:
+    """Copy one chunk of documents from source to target"""
+    ndjson = await request_with_retries(
+        session, "POST", f"{args.source}/api/admin/sync/{collection}/documents", args.retries,
+        json={"keys": keys}
+    )
+    body = await request_with_retries(
+        session, "POST", f"{args.target}{IMPORT_PATHS[collection]}", args.retries,
+        data=ndjson, headers={"Content-Type": "application/x-ndjson"}
+    )
+    return json.loads(body)
+
+
+async def sync_collection(session, args, collection: str) -> dict:
+    source, target = await asyncio.gather(
+        fetch_manifest(session, args.source, collection, args.retries),
+        fetch_manifest(session, args.target, collection, args.retries)
+    )
+    diff = diff_manifests(source, target)
+    keys = diff["new"] + diff["changed"]
+    print(
+        f"{collection}: {len(source)} in source, {len(target)} in target -> "
+        f"{len(diff['new'])} new, {len(diff['changed'])} changed, {diff['unchanged']} unchanged, "
+        f"{diff['only_in_target']} only in target (not deleted)"
+    )
+
+    report = {"collection": collection, "to_transfer": len(keys), "upserted": 0, "modified": 0, "errors": 0, "failed_chunks": 0}
+    if args.dry_run or not keys:
+        return report
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    chunks = [keys[i:i + args.chunk_size] for i in range(0, len(keys), args.chunk_size)]
+
+    async def run(n, chunk):
+        async with semaphore:
+            try:
+                result = await sync_chunk(session, args, collection, chunk)
+            except SyncError as e:
+                print(f"  chunk {n}/{len(chunks)} failed: {e}")
+                report["failed_chunks"] += 1
+                return
+            report["upserted"] += result["upserted"]
+            report["modified"] += result["modified"]
+            report["errors"] += result["error_count"]
+            print(f"  chunk {n}/{len(chunks)}: {result['received']} docs, {result['upserted']} added, {result['modified']} updated")
+
+    await asyncio.gather(*(run(n, chunk) for n, chunk in enumerate(chunks, 1)))
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="Base URL to copy from")
+    parser.add_argument("--target", required=True, help="Base URL to copy to")
+    parser.add_argument("--collection", choices=[*SYNC_COLLECTIONS, "all"], default="all")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Documents per transfer (max 1000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chunks transferred in parallel")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be transferred")
+    args = parser.parse_args()
+
+    args.source = args.source.rstrip('/')
+    args.target = args.target.rstrip('/')
+    args.chunk_size = max(1, min(args.chunk_size, 1000))
+    collections = list(SYNC_COLLECTIONS) if args.collection == "all" else [args.collection]
+
+    started = time.monotonic()
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        reports = [await sync_collection(session, args, c) for c in collections]
+
+    print()
+    for r in reports:
+        if args.dry_run:
+            print(f"[dry run] {r['collection']}: {r['to_transfer']} documents would be transferred")
+        else:
+            print(
+                f"{r['collection']}: {r['upserted']} added, {r['modified']} updated, "
+                f"{r['errors']} errors, {r['failed_chunks']} failed chunks"
+            )
+    print(f"Finished in {time.monotonic() - started:.1f}s")
+
+    if any(r["failed_chunks"] or r["errors"] for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,10 +2,9 @@
 TopTube World Pro - Main FastAPI Server
 Tracks, ranks, and predicts the most subscribed YouTube channels per country
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.gzip import GZipMiddleware
 import os
 import logging
 from datetime import datetime, timezone, timedelta
@@ -15,6 +14,16 @@ from services.youtube_service import youtube_service
 from services.ranking_service import get_ranking_service
 from services.growth_analyzer import get_growth_analyzer
 from services.scheduler_service import get_scheduler_service
+from services.change_bus import get_change_bus, POLL_WATERMARK_FIELDS
+from services.widget_hub import get_widget_hub
+from services.widget_renderer import get_widget_renderer
+from services.badge_renderer import get_badge_renderer
+from services.search_index import get_search_index
+from services.count_cache import get_count_cache
+from services.history_downsampler import get_history_downsampler
+from services.channel_index import get_channel_index
+from services.response_cache import get_response_cache
+from middleware import ResponseCacheMiddleware, StreamingAwareGZipMiddleware
 
 # Routes
 from routes.channels import router as channels_router
@@ -41,8 +50,11 @@ scheduler_service = None
 # Create the main app
 app = FastAPI(title="TopTube World Pro", version="1.0.0")
 
-# Add GZip compression
-app.add_middleware(GZipMiddleware, minimum_size=500)
+# Cache tagged public GET responses (added first so it sits inside gzip)
+app.add_middleware(ResponseCacheMiddleware)
+
+# Add GZip compression (event streams are left uncompressed)
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=500)
 
 # Include all route modules
 app.include_router(channels_router)
@@ -56,10 +68,10 @@ app.include_router(widgets_router)
 
 # Root-level sitemap (for Google Search Console - must be at /sitemap.xml)
 @app.get("/sitemap.xml", response_class=PlainTextResponse)
-async def root_sitemap():
+async def root_sitemap(request: Request):
     """Redirect root sitemap to API sitemap"""
     from routes.seo import get_sitemap
-    return await get_sitemap()
+    return await get_sitemap(request)
 
 # Root-level robots.txt
 @app.get("/robots.txt", response_class=PlainTextResponse)
@@ -92,13 +104,38 @@ async def startup():
     await db.countries.create_index("code", unique=True)
     await db.channel_stats.create_index("channel_id")
     await db.channel_stats.create_index([("timestamp", -1)])
+    await db.channel_stats.create_index([("channel_id", 1), ("timestamp", 1)])
     await db.rank_history.create_index("channel_id")
     await db.rank_history.create_index([("timestamp", -1)])
     await db.system_status.create_index("_id")
+    await db.blog_posts.create_index("slug")
+    # Keyset pagination for /api/channels and /api/blog/posts
+    await db.channels.create_index([("is_active", 1), ("subscriber_count", -1), ("channel_id", 1)])
+    await db.channels.create_index([("country_code", 1), ("is_active", 1), ("subscriber_count", -1), ("channel_id", 1)])
+    await db.blog_posts.create_index([("status", 1), ("created_at", -1), ("slug", 1)])
+    await db.blog_posts.create_index([("status", 1), ("category", 1), ("created_at", -1), ("slug", 1)])
+    await db.jobs.create_index("job_id", unique=True)
+    await db.leaderboard_diffs.create_index("version", unique=True)
+    await db.jobs.create_index([("started_at", -1)])
+    # Watermark fields the change bus polls when change streams are unavailable
+    for collection, fields in POLL_WATERMARK_FIELDS.items():
+        for field in fields:
+            await db[collection].create_index(field)
     
     # Check if we need to seed historical data
     await seed_historical_data_if_needed()
     
+    # Start publishing channel/country/blog post changes to cache subscribers
+    get_change_bus(db).start()
+    get_widget_hub(db).start()
+    get_widget_renderer(db).start()
+    get_badge_renderer(db).start()
+    get_response_cache().start(get_change_bus(db))
+    get_search_index(db).start()
+    get_count_cache(db).start()
+    get_history_downsampler(db).start()
+    get_channel_index(db).start()
+    
     # Initialize and start the background scheduler
     scheduler_service = get_scheduler_service(db, youtube_service, ranking_service, growth_analyzer)
     scheduler_service.start()
@@ -193,4 +230,5 @@ async def shutdown_db_client():
     global scheduler_service
     if scheduler_service:
         scheduler_service.stop()
+    await get_change_bus(db).stop()
     client.close()
@@ -0,0 +1,122 @@
+"""
+API Key Pool - Routes YouTube Data API requests across multiple keys by remaining quota
+"""
+import os
+import logging
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# Each Google Cloud project gets 10,000 units per day, reset at midnight Pacific Time
+DEFAULT_DAILY_QUOTA = 10000
+QUOTA_RESET_TZ = ZoneInfo("America/Los_Angeles")
+
+
+class ApiKeyPool:
+    def __init__(self, keys: List[str], daily_quota: int = DEFAULT_DAILY_QUOTA):
+        self.daily_quota = daily_quota
+        self._keys = [self._new_key_state(key) for key in dict.fromkeys(k for k in keys if k)]
+        self._quota_day = self._current_quota_day()
+
+    @staticmethod
+    def _new_key_state(key: str) -> Dict:
+        return {
+            "key": key,
+            "units_used": 0,
+            "requests": 0,
+            "exhausted": False,
+            "exhausted_at": None
+        }
+
+    @staticmethod
+    def _current_quota_day() -> str:
+        return datetime.now(QUOTA_RESET_TZ).strftime("%Y-%m-%d")
+
+    def _roll_quota_day(self):
+        """Reset usage counters once the YouTube quota day has rolled over"""
+        today = self._current_quota_day()
+        if today != self._quota_day:
+            logger.info(f"YouTube quota day rolled over to {today}, resetting {len(self._keys)} keys")
+            self._keys = [self._new_key_state(state["key"]) for state in self._keys]
+            self._quota_day = today
+
+    def _remaining(self, state: Dict) -> int:
+        if state["exhausted"]:
+            return 0
+        return max(self.daily_quota - state["units_used"], 0)
+
+    def acquire(self, cost: int = 1) -> Optional[str]:
+        """
+        Reserve `cost` units on the key with the most remaining budget.
+        Returns None when no key can afford the request.
+        """
+        self._roll_quota_day()
+
+        candidates = [s for s in self._keys if self._remaining(s) >= cost]
+        if not candidates:
+            return None
+
+        state = max(candidates, key=self._remaining)
+        state["units_used"] += cost
+        state["requests"] += 1
+        return state["key"]
+
+    def mark_exhausted(self, key: str):
+        """Take a key out of rotation until the next quota day (YouTube returned quotaExceeded)"""
+        for state in self._keys:
+            if state["key"] == key and not state["exhausted"]:
+                state["exhausted"] = True
+                state["exhausted_at"] = datetime.now(timezone.utc).isoformat()
+                logger.warning(f"YouTube API key {self._mask(key)} exhausted after {state['units_used']} units")
+
+    @property
+    def size(self) -> int:
+        return len(self._keys)
+
+    @property
+    def total_daily_quota(self) -> int:
+        return self.daily_quota * len(self._keys)
+
+    @staticmethod
+    def _mask(key: str) -> str:
+        return f"...{key[-4:]}" if len(key) > 4 else "****"
+
+    def get_usage(self) -> Dict:
+        """Per-key usage report (keys are masked)"""
+        self._roll_quota_day()
+
+        keys = []
+        for state in self._keys:
+            keys.append({
+                "key": self._mask(state["key"]),
+                "units_used": state["units_used"],
+                "units_remaining": self._remaining(state),
+                "requests": state["requests"],
+                "exhausted": state["exhausted"],
+                "exhausted_at": state["exhausted_at"]
+            })
+
+        return {
+            "quota_day": self._quota_day,
+            "daily_quota_per_key": self.daily_quota,
+            "total_daily_quota": self.total_daily_quota,
+            "total_units_used": sum(s["units_used"] for s in self._keys),
+            "total_units_remaining": sum(self._remaining(s) for s in self._keys),
+            "keys": keys
+        }
+
+
+def load_api_key_pool() -> ApiKeyPool:
+    """
+    Build the pool from YOUTUBE_API_KEYS (comma-separated) and/or YOUTUBE_API_KEY.
+    YOUTUBE_DAILY_QUOTA overrides the per-key daily budget.
+    """
+    keys = [k.strip() for k in os.environ.get('YOUTUBE_API_KEYS', '').split(',')]
+    keys.append(os.environ.get('YOUTUBE_API_KEY', '').strip())
+    daily_quota = int(os.environ.get('YOUTUBE_DAILY_QUOTA', DEFAULT_DAILY_QUOTA))
+
+    pool = ApiKeyPool(keys, daily_quota=daily_quota)
+    logger.info(f"Loaded YouTube API key pool with {pool.size} keys ({pool.total_daily_quota} units/day)")
+    return pool
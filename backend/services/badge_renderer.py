@@ -0,0 +1,280 @@
+"""
+Badge Renderer - Shields-style subscriber badges (SVG, PNG when Pillow is installed)
+
+Badges are rendered once per (channel, options, data version) and cached in memory
+and on disk, both bounded LRUs; the change bus drops a channel's badges when its counts
+change. Only badges with a standard label go to disk, so free-text labels can't fill it.
+"""
+import asyncio
+import io
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # PNG badges are optional
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+BADGE_CACHE_DIR = Path(os.environ.get("BADGE_CACHE_DIR", "/tmp/toptube-badges"))
+MAX_MEMORY_BADGES = 5000
+MAX_DISK_BADGES = 50000
+
+# Labels whose badges are also cached on disk; others are rendered and kept in memory only
+DISK_CACHED_LABELS = frozenset({"subscribers", "subs", "YouTube", "youtube", "YouTube subscribers"})
+
+BADGE_HEIGHT = 20
+BADGE_FONT_SIZE = 11
+BADGE_PADDING = 6
+BADGE_COLORS = {"label": "#555", "value": "#e05d44", "growth": "#4c1"}
+
+# Fallback text widths (px at 11px Verdana-like) when Pillow isn't available
+_NARROW_CHARS = set("ijlt.,:;!|' ")
+_WIDE_CHARS = set("mwMW@%")
+
+
+def png_supported() -> bool:
+    return Image is not None
+
+
+class BadgeRenderer:
+    def __init__(self, db: AsyncIOMotorDatabase, cache_dir: Path = BADGE_CACHE_DIR):
+        self.db = db
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        # Badge files on disk, least recently used first
+        self._disk: "OrderedDict[str, None]" = OrderedDict()
+        # Cached badge names (memory or disk) per channel file prefix, for invalidation
+        self._names: Dict[str, Set[str]] = {}
+        self._unsubscribe = None
+        self._font = ImageFont.load_default(size=BADGE_FONT_SIZE) if Image else None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0}
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Badge disk cache disabled ({self.cache_dir}): {e}")
+            self.cache_dir = None
+        if self.cache_dir:
+            self._load_disk_index()
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, ["channels"])
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    # ==================== CACHE ====================
+
+    @staticmethod
+    def _file_prefix(channel_id: str) -> str:
+        return hashlib.sha1(channel_id.encode("utf-8")).hexdigest()[:16]
+
+    def _cache_name(self, channel_id: str, version: str, fmt: str, options: Tuple) -> str:
+        digest = hashlib.sha1(repr((version, options)).encode("utf-8")).hexdigest()[:16]
+        return f"{self._file_prefix(channel_id)}-{digest}.{fmt}"
+
+    def _load_disk_index(self):
+        """Index badge files left by a previous process, oldest first, trimmed to MAX_DISK_BADGES"""
+        try:
+            paths = sorted(
+                (p for p in self.cache_dir.iterdir() if not p.name.startswith(".")),
+                key=lambda p: p.stat().st_mtime
+            )
+        except OSError as e:
+            logger.warning(f"Could not index badge cache {self.cache_dir}: {e}")
+            return
+        for path in paths:
+            self._disk[path.name] = None
+            self._names.setdefault(path.name.split("-", 1)[0], set()).add(path.name)
+        self._unlink(self._evict_disk())
+
+    def _forget(self, name: str):
+        if name not in self._memory and name not in self._disk:
+            names = self._names.get(name.split("-", 1)[0])
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._names[name.split("-", 1)[0]]
+
+    def _evict_disk(self) -> List[str]:
+        evicted = []
+        while len(self._disk) > MAX_DISK_BADGES:
+            name, _ = self._disk.popitem(last=False)
+            self._forget(name)
+            evicted.append(name)
+        return evicted
+
+    def _unlink(self, names: Iterable[str]):
+        for name in names:
+            try:
+                (self.cache_dir / name).unlink()
+            except OSError:
+                pass
+
+    def _on_change(self, event: ChangeEvent):
+        if event.key is not None and not event.touches("subscriber_count", "daily_subscriber_gain"):
+            return
+
+        if event.key is None:
+            self._memory.clear()
+            self._names.clear()
+            stale = list(self._disk)
+            self._disk.clear()
+        else:
+            stale = []
+            for name in self._names.pop(self._file_prefix(event.key), ()):
+                self._memory.pop(name, None)
+                if self._disk.pop(name, False) is None:
+                    stale.append(name)
+
+        # File deletes happen off the event loop
+        if stale and self.cache_dir:
+            asyncio.get_running_loop().run_in_executor(None, self._unlink, stale)
+
+    async def _cache_get(self, name: str) -> Optional[bytes]:
+        if name in self._memory:
+            self._memory.move_to_end(name)
+            self._stats["memory_hits"] += 1
+            return self._memory[name]
+
+        if name in self._disk:
+            try:
+                body = await asyncio.to_thread((self.cache_dir / name).read_bytes)
+            except OSError:
+                if self._disk.pop(name, False) is None:
+                    self._forget(name)
+                return None
+            # The channel may have changed during the read; keep its index untouched then
+            if name in self._disk:
+                self._disk.move_to_end(name)
+                self._remember(name, body)
+            self._stats["disk_hits"] += 1
+            return body
+        return None
+
+    def _remember(self, name: str, body: bytes):
+        self._memory[name] = body
+        self._names.setdefault(name.split("-", 1)[0], set()).add(name)
+        if len(self._memory) > MAX_MEMORY_BADGES:
+            evicted, _ = self._memory.popitem(last=False)
+            self._forget(evicted)
+
+    def _write_file(self, name: str, body: bytes):
+        tmp = self.cache_dir / f".{name}.tmp"
+        tmp.write_bytes(body)
+        tmp.replace(self.cache_dir / name)
+
+    async def _cache_put(self, name: str, body: bytes, to_disk: bool = True):
+        self._remember(name, body)
+        if self.cache_dir and to_disk:
+            try:
+                await asyncio.to_thread(self._write_file, name, body)
+            except OSError as e:
+                logger.warning(f"Could not write badge {name}: {e}")
+                return
+            self._disk[name] = None
+            self._names.setdefault(name.split("-", 1)[0], set()).add(name)
+            evicted = self._evict_disk()
+            if evicted:
+                await asyncio.to_thread(self._unlink, evicted)
+
+    # ==================== RENDERING ====================
+
+    def _text_width(self, text: str) -> int:
+        if self._font:
+            return int(self._font.getlength(text)) + 1
+        return sum(4 if c in _NARROW_CHARS else 10 if c in _WIDE_CHARS else 7 for c in text)
+
+    def _layout(self, label: str, value: str, growth: Optional[str]):
+        segments = [(label, BADGE_COLORS["label"]), (value, BADGE_COLORS["value"])]
+        if growth:
+            segments.append((growth, BADGE_COLORS["growth"]))
+        return [(text, color, self._text_width(text) + 2 * BADGE_PADDING) for text, color in segments]
+
+    def _render_svg(self, label: str, value: str, growth: Optional[str]) -> bytes:
+        segments = self._layout(label, value, growth)
+        total = sum(w for _, _, w in segments)
+        title = escape(" ".join(text for text, _, _ in segments))
+
+        rects, texts, x = [], [], 0
+        for text, color, width in segments:
+            center = x + width / 2
+            rects.append(f'<rect x="{x}" width="{width}" height="{BADGE_HEIGHT}" fill="{color}"/>')
+            texts.append(
+                f'<text x="{center}" y="15" fill="#010101" fill-opacity=".3">{escape(text)}</text>'
+                f'<text x="{center}" y="14">{escape(text)}</text>'
+            )
+            x += width
+
+        svg = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{total}" height="{BADGE_HEIGHT}" role="img" aria-label="{title}">'
+            f'<title>{title}</title>'
+            f'<linearGradient id="s" x2="0" y2="100%"><stop offset="0" stop-color="#bbb" stop-opacity=".1"/><stop offset="1" stop-opacity=".1"/></linearGradient>'
+            f'<clipPath id="r"><rect width="{total}" height="{BADGE_HEIGHT}" rx="3" fill="#fff"/></clipPath>'
+            f'<g clip-path="url(#r)">{"".join(rects)}<rect width="{total}" height="{BADGE_HEIGHT}" fill="url(#s)"/></g>'
+            f'<g fill="#fff" text-anchor="middle" font-family="Verdana,Geneva,DejaVu Sans,sans-serif" font-size="{BADGE_FONT_SIZE}">'
+            f'{"".join(texts)}</g></svg>'
+        )
+        return svg.encode("utf-8")
+
+    def _render_png(self, label: str, value: str, growth: Optional[str]) -> bytes:
+        scale = 2  # render at 2x so the badge stays sharp on high-DPI screens
+        segments = self._layout(label, value, growth)
+        size = (sum(w for _, _, w in segments) * scale, BADGE_HEIGHT * scale)
+        font = ImageFont.load_default(size=BADGE_FONT_SIZE * scale)
+
+        image = Image.new("RGBA", size)
+        draw = ImageDraw.Draw(image)
+        x = 0
+        for text, color, width in segments:
+            draw.rectangle((x * scale, 0, (x + width) * scale, size[1]), fill=color)
+            center = ((x + width / 2) * scale, size[1] / 2)
+            draw.text(center, text, font=font, fill="#fff", anchor="mm")
+            x += width
+
+        mask = Image.new("L", size, 0)
+        ImageDraw.Draw(mask).rounded_rectangle((0, 0, size[0] - 1, size[1] - 1), radius=3 * scale, fill=255)
+        image.putalpha(mask)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    async def render(self, channel_id: str, version: str, fmt: str, label: str, value: str, growth: Optional[str] = None) -> Tuple[str, bytes]:
+        """(etag, body) for a badge; fmt is svg or png (png requires Pillow)"""
+        name = self._cache_name(channel_id, version, fmt, (label, value, growth))
+        etag = f'"{name.replace(".", "-")}"'
+
+        body = await self._cache_get(name)
+        if body is None:
+            # Pillow drawing and PNG optimization take milliseconds; keep them off the loop
+            render = self._render_png if fmt == "png" else self._render_svg
+            body = await asyncio.to_thread(render, label, value, growth)
+            await self._cache_put(name, body, to_disk=label in DISK_CACHED_LABELS)
+            self._stats["renders"] += 1
+        return etag, body
+
+    def get_stats(self) -> Dict:
+        return {"memory": len(self._memory), "disk": len(self._disk), "png_supported": png_supported(), **self._stats}
+
+
+# Singleton instance
+_badge_renderer = None
+
+def get_badge_renderer(db: AsyncIOMotorDatabase) -> BadgeRenderer:
+    global _badge_renderer
+    if _badge_renderer is None:
+        _badge_renderer = BadgeRenderer(db)
+    return _badge_renderer
@@ -0,0 +1,243 @@
+"""
+Change Bus - Publishes channel/country/blog post changes to in-process subscribers
+
+Tails a MongoDB change stream when the server is a replica set member and falls back
+to polling updated_at-style watermarks on standalone servers, so caches can invalidate
+on real writes no matter which route, job or script made them.
+"""
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Watched collections and the field that identifies a document to subscribers
+WATCHED_COLLECTIONS = {
+    "channels": "channel_id",
+    "countries": "code",
+    "blog_posts": "slug"
+}
+
+# Timestamp fields written alongside updates, used by the polling fallback; the app
+# writes ISO strings, imports may write Dates, and the poller matches both
+POLL_WATERMARK_FIELDS = {
+    "channels": ["updated_at", "snippet_updated_at", "rank_updated_at", "metrics_updated_at"],
+    "countries": [],
+    "blog_posts": ["updated_at"]
+}
+
+POLL_INTERVAL_SECONDS = 5
+RESTART_DELAY_SECONDS = 5
+
+# OperationFailure code for "change streams are only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    One write seen by the bus. operation is insert, update, replace, delete or reload.
+    key is the channel_id/code/slug, or None when it isn't known (deletes, reloads) -
+    subscribers should then drop everything they hold for the collection.
+    fields lists the updated top-level fields when the change stream reports them.
+    """
+    collection: str
+    operation: str
+    key: Optional[str] = None
+    fields: FrozenSet[str] = field(default_factory=frozenset)
+    timestamp: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def touches(self, *names: str) -> bool:
+        """Whether the change may affect any of the given fields"""
+        if self.operation != "update" or not self.fields:
+            return True
+        return any(name in self.fields for name in names)
+
+
+Subscriber = Callable[[ChangeEvent], object]
+
+
+class ChangeBus:
+    def __init__(self, db: AsyncIOMotorDatabase, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.db = db
+        self.poll_interval = poll_interval
+        self.mode = "stopped"
+        self._subscribers: List[tuple] = []
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+        self._stats = {"events": {name: 0 for name in WATCHED_COLLECTIONS}, "subscriber_errors": 0, "last_event_at": None}
+
+    # ==================== SUBSCRIPTIONS ====================
+
+    def subscribe(self, callback: Subscriber, collections: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Register callback(event) (sync or async) for the given collections; returns an unsubscribe function"""
+        entry = (callback, frozenset(collections) if collections else None)
+        self._subscribers.append(entry)
+
+        def unsubscribe():
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+        return unsubscribe
+
+    async def publish(self, event: ChangeEvent):
+        """Deliver an event to every matching subscriber; one failing subscriber doesn't stop the rest"""
+        self._stats["events"][event.collection] = self._stats["events"].get(event.collection, 0) + 1
+        self._stats["last_event_at"] = event.timestamp
+
+        for callback, collections in list(self._subscribers):
+            if collections is not None and event.collection not in collections:
+                continue
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self._stats["subscriber_errors"] += 1
+                logger.error(f"Change bus subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+    async def publish_reload(self):
+        """Tell every subscriber to drop everything (changes may have been missed)"""
+        for collection in WATCHED_COLLECTIONS:
+            await self.publish(ChangeEvent(collection=collection, operation="reload"))
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "stopped"
+
+    async def _run(self):
+        polling = False
+        while True:
+            try:
+                await (self._poll() if polling else self._watch())
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if not polling and e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info(f"Change streams unavailable, polling every {self.poll_interval}s instead")
+                    polling = True
+                    continue
+                # e.g. the resume token fell off the oplog: start over and let caches drop everything
+                logger.error(f"Change bus failed: {e}; restarting in {RESTART_DELAY_SECONDS}s")
+                self._resume_token = None
+                await self.publish_reload()
+                await asyncio.sleep(RESTART_DELAY_SECONDS)
+            except Exception as e:
+                logger.error(f"Change bus interrupted: {e}; restarting in {RESTART_DELAY_SECONDS}s")
+                await asyncio.sleep(RESTART_DELAY_SECONDS)
+
+    # ==================== CHANGE STREAM ====================
+
+    async def _watch(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(WATCHED_COLLECTIONS)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]}
+        }}]
+        async with self.db.watch(pipeline, full_document="updateLookup", resume_after=self._resume_token) as stream:
+            self.mode = "change_stream"
+            logger.info("Change bus tailing MongoDB change stream")
+            async for change in stream:
+                self._resume_token = stream.resume_token
+                await self.publish(self._event_from_change(change))
+
+    def _event_from_change(self, change: Dict) -> ChangeEvent:
+        collection = change["ns"]["coll"]
+        key_field = WATCHED_COLLECTIONS[collection]
+        document = change.get("fullDocument") or {}
+        updated = change.get("updateDescription", {})
+        fields = set(updated.get("updatedFields", {})) | set(updated.get("removedFields", []))
+        return ChangeEvent(
+            collection=collection,
+            operation=change["operationType"],
+            key=document.get(key_field),
+            fields=frozenset(f.split(".")[0] for f in fields)
+        )
+
+    # ==================== POLLING FALLBACK ====================
+
+    async def _poll(self):
+        self.mode = "polling"
+        watermarks = {name: datetime.now(timezone.utc) for name in WATCHED_COLLECTIONS}
+        counts = {name: await self.db[name].estimated_document_count() for name in WATCHED_COLLECTIONS}
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for collection, key_field in WATCHED_COLLECTIONS.items():
+                try:
+                    watermarks[collection] = await self._poll_collection(collection, key_field, watermarks[collection])
+
+                    # Deletes and inserts without a watermark field only show up in the count
+                    count = await self.db[collection].estimated_document_count()
+                    if count != counts[collection]:
+                        await self.publish(ChangeEvent(collection=collection, operation="reload"))
+                    counts[collection] = count
+                except PyMongoError as e:
+                    logger.error(f"Change bus poll of {collection} failed: {e}")
+
+    @staticmethod
+    def _stamp(value) -> Optional[datetime]:
+        """A watermark field's value as an aware datetime, whether stored as ISO string or Date"""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+        if not isinstance(value, datetime):
+            return None
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+    async def _poll_collection(self, collection: str, key_field: str, watermark: datetime) -> datetime:
+        fields = POLL_WATERMARK_FIELDS[collection]
+        if not fields:
+            return watermark
+
+        # $gt only matches values of the same BSON type, so each field is compared as both
+        cursor = self.db[collection].find(
+            {"$or": [
+                {f: {"$gt": bound}} for f in fields for bound in (watermark.isoformat(), watermark)
+            ]},
+            {"_id": 0, key_field: 1, **{f: 1 for f in fields}}
+        ).batch_size(1000)
+
+        # Polling can't tell which fields changed, so events carry no field list
+        newest = watermark
+        async for doc in cursor:
+            stamps = [stamp for stamp in (self._stamp(doc.get(f)) for f in fields) if stamp]
+            newest = max([newest] + stamps)
+            await self.publish(ChangeEvent(collection=collection, operation="update", key=doc.get(key_field)))
+        return newest
+
+    def get_stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "subscribers": len(self._subscribers),
+            "events": dict(self._stats["events"]),
+            "subscriber_errors": self._stats["subscriber_errors"],
+            "last_event_at": self._stats["last_event_at"]
+        }
+
+
+# Singleton instance
+_change_bus = None
+
+def get_change_bus(db: AsyncIOMotorDatabase) -> ChangeBus:
+    global _change_bus
+    if _change_bus is None:
+        _change_bus = ChangeBus(db)
+    return _change_bus
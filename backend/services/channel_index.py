@@ -0,0 +1,318 @@
+"""
+Channel Index - Process-local, array-backed copy of the hot channel fields
+
+Sort and filter columns (country, subscribers, daily gain, daily growth %, rank and the
+active/original flags) live in NumPy arrays with one row per channel; the compact-view
+fields needed to render a list entry live in one __slots__ object per channel. Sort
+orders by subscribers, daily growth and daily gain are precomputed after every load or
+update, so leaderboards, country pages, related channels and the map are array slices
+instead of Mongo queries. The change bus keeps rows current: changed channels are
+re-read in one $in query per flush, and unknown changes trigger a rebuild.
+"""
+import sys
+import time
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+from services.channel_views import CHANNEL_VIEWS
+from services.debounced_refresher import DebouncedRefresher
+
+logger = logging.getLogger(__name__)
+
+# Fields a row can serve: the compact view
+INDEXED_FIELDS = tuple(name for name in CHANNEL_VIEWS["compact"] if name != "_id")
+INDEX_PROJECTION = {**CHANNEL_VIEWS["compact"], "is_active": 1, "original_channel_id": 1}
+
+# Repeated short strings shared between rows instead of stored once per channel
+_INTERNED_FIELDS = ("country_code", "country_name", "viral_label")
+
+FLUSH_DELAY_SECONDS = 0.5
+LOAD_BATCH_SIZE = 1000
+INITIAL_CAPACITY = 1024
+
+# Sort orders kept precomputed over active channels
+SORT_ORDERS = ("subscribers", "daily_growth", "daily_gain")
+
+_MISSING = object()
+
+
+class ChannelRow:
+    """Compact-view fields of one channel; fields the document lacks hold _MISSING"""
+    __slots__ = INDEXED_FIELDS
+
+    def __init__(self, doc: Dict):
+        for name in INDEXED_FIELDS:
+            value = doc.get(name, _MISSING)
+            if name in _INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+
+    def to_dict(self, fields: Iterable[str] = INDEXED_FIELDS) -> Dict:
+        doc = {}
+        for name in fields:
+            value = getattr(self, name)
+            if value is not _MISSING:
+                doc[name] = value
+        return doc
+
+
+def _number(value, default):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+class ChannelIndex:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._ready = False
+        self._reset(INITIAL_CAPACITY)
+        self._refresher = DebouncedRefresher(self._flush, FLUSH_DELAY_SECONDS, "Channel index")
+        self._build_task: Optional[asyncio.Task] = None
+        self._unsubscribe = None
+        self._stats = {"builds": 0, "updates": 0, "queries": 0, "build_seconds": 0.0}
+
+    def _reset(self, capacity: int):
+        self._rows: List[Optional[ChannelRow]] = []
+        self._row_of: Dict[str, int] = {}
+        self._countries: List[str] = []
+        self._country_of: Dict[str, int] = {}
+        self._country = np.full(capacity, -1, dtype=np.int16)
+        self._subs = np.zeros(capacity, dtype=np.int64)
+        self._gain = np.zeros(capacity, dtype=np.int64)
+        self._growth = np.zeros(capacity, dtype=np.float64)
+        self._rank = np.zeros(capacity, dtype=np.int32)
+        # active: is_active; original: not a country copy; present: not deleted
+        self._active = np.zeros(capacity, dtype=bool)
+        self._original = np.zeros(capacity, dtype=bool)
+        self._present = np.zeros(capacity, dtype=bool)
+        self._has_gain = np.zeros(capacity, dtype=bool)
+        self._has_growth = np.zeros(capacity, dtype=bool)
+        self._orders: Dict[str, np.ndarray] = {name: np.empty(0, dtype=np.int64) for name in SORT_ORDERS}
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, ["channels"])
+            self._schedule_build()
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    # ==================== ROWS ====================
+
+    def _grow(self):
+        capacity = len(self._subs) * 2
+        for name in ("_country", "_subs", "_gain", "_growth", "_rank",
+                     "_active", "_original", "_present", "_has_gain", "_has_growth"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype) if name != "_country" else np.full(capacity, -1, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _country_id(self, code) -> int:
+        if not isinstance(code, str):
+            return -1
+        cid = self._country_of.get(code)
+        if cid is None:
+            cid = self._country_of[code] = len(self._countries)
+            self._countries.append(sys.intern(code))
+        return cid
+
+    def _set(self, doc: Dict):
+        """Insert or overwrite the row for doc"""
+        channel_id = doc["channel_id"]
+        i = self._row_of.get(channel_id)
+        if i is None:
+            i = len(self._rows)
+            if i == len(self._subs):
+                self._grow()
+            self._rows.append(None)
+            self._row_of[channel_id] = i
+
+        self._rows[i] = ChannelRow(doc)
+        self._country[i] = self._country_id(doc.get("country_code"))
+        # Missing counts sort after every real one, as Mongo sorts nulls last descending
+        self._subs[i] = _number(doc.get("subscriber_count"), -1)
+        self._gain[i] = _number(doc.get("daily_subscriber_gain"), np.iinfo(np.int64).min)
+        self._growth[i] = _number(doc.get("daily_growth_percent"), -np.inf)
+        self._rank[i] = _number(doc.get("current_rank"), 0)
+        self._active[i] = doc.get("is_active") is True
+        self._original[i] = "original_channel_id" not in doc
+        self._present[i] = True
+        self._has_gain[i] = "daily_subscriber_gain" in doc
+        self._has_growth[i] = "daily_growth_percent" in doc
+
+    def _drop(self, channel_id: str):
+        i = self._row_of.get(channel_id)
+        if i is not None:
+            self._active[i] = self._present[i] = False
+
+    def _resort(self):
+        """Row numbers of active channels, best first, for every sort order"""
+        n = len(self._rows)
+        active = np.flatnonzero(self._active[:n])
+        # Stable sort on the negated column keeps load order among ties
+        self._orders["subscribers"] = active[np.argsort(-self._subs[active], kind="stable")]
+        growing = active[self._has_growth[active]]
+        self._orders["daily_growth"] = growing[np.argsort(-self._growth[growing], kind="stable")]
+        gaining = active[self._has_gain[active]]
+        self._orders["daily_gain"] = gaining[np.argsort(-self._gain[gaining], kind="stable")]
+
+    # ==================== BUILDING ====================
+
+    def _schedule_build(self):
+        if self._build_task is None or self._build_task.done():
+            self._build_task = asyncio.create_task(self.build())
+
+    def load(self, docs: Iterable[Dict]):
+        """Replace the index with docs (channel documents with INDEX_PROJECTION fields)"""
+        self._reset(INITIAL_CAPACITY)
+        for doc in docs:
+            self._set(doc)
+        self._resort()
+        self._ready = True
+
+    async def build(self):
+        """Load every channel and swap in the new index"""
+        started = time.monotonic()
+        docs = []
+        try:
+            cursor = self.db.channels.find({}, INDEX_PROJECTION).batch_size(LOAD_BATCH_SIZE)
+            async for doc in cursor:
+                docs.append(doc)
+        except Exception as e:
+            logger.error(f"Channel index build failed: {e}")
+            return
+
+        self.load(docs)
+        self._stats["builds"] += 1
+        self._stats["build_seconds"] = round(time.monotonic() - started, 3)
+        logger.info(f"Channel index built: {len(self._rows)} channels in {self._stats['build_seconds']}s")
+
+    # ==================== UPDATES ====================
+
+    def _on_change(self, event: ChangeEvent):
+        if event.key is None:
+            self._schedule_build()
+            return
+        if event.touches(*INDEX_PROJECTION):
+            self._refresher.add([event.key])
+
+    async def _flush(self, channel_ids: List[str]):
+        found = set()
+        async for doc in self.db.channels.find({"channel_id": {"$in": channel_ids}}, INDEX_PROJECTION):
+            found.add(doc["channel_id"])
+            self._set(doc)
+        for channel_id in set(channel_ids) - found:
+            self._drop(channel_id)
+        self._resort()
+        self._stats["updates"] += len(channel_ids)
+
+    # ==================== QUERIES ====================
+
+    @staticmethod
+    def covers(view: str, fields: Optional[Iterable[str]] = None) -> bool:
+        """Whether the index holds every field a view or explicit field list asks for"""
+        if fields:
+            return all(name in INDEXED_FIELDS for name in fields)
+        return view == "compact"
+
+    def _select(self, order: str, limit: Optional[int], country_code: Optional[str] = None,
+                originals_only: bool = False, exclude: Optional[str] = None) -> np.ndarray:
+        self._stats["queries"] += 1
+        rows = self._orders[order]
+        if country_code is not None:
+            cid = self._country_of.get(country_code)
+            if cid is None:
+                return rows[:0]
+            rows = rows[self._country[rows] == cid]
+        if originals_only:
+            rows = rows[self._original[rows]]
+        if exclude is not None and exclude in self._row_of:
+            rows = rows[rows != self._row_of[exclude]]
+        return rows if limit is None else rows[:limit]
+
+    def _docs(self, rows: np.ndarray, fields: Optional[Tuple[str, ...]], rank_field: Optional[str] = None) -> List[Dict]:
+        names = INDEXED_FIELDS if fields is None else ("channel_id",) + tuple(f for f in fields if f != "channel_id")
+        docs = [self._rows[i].to_dict(names) for i in rows]
+        if rank_field:
+            for rank, doc in enumerate(docs, start=1):
+                doc[rank_field] = rank
+        return docs
+
+    def global_leaderboard(self, limit: int, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        return self._docs(self._select("subscribers", limit, originals_only=True), fields, "global_rank")
+
+    def country_leaderboard(self, country_code: str, limit: Optional[int], fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        return self._docs(self._select("subscribers", limit, country_code), fields, "rank")
+
+    def fastest_growing(self, limit: int, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        return self._docs(self._select("daily_growth", limit, originals_only=True), fields)
+
+    def biggest_gainers(self, limit: int, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        return self._docs(self._select("daily_gain", limit, originals_only=True), fields)
+
+    def related(self, channel_id: str, country_code: str, limit: int, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        return self._docs(self._select("subscribers", limit, country_code, exclude=channel_id), fields)
+
+    def get(self, channel_id: str) -> Optional[Dict]:
+        i = self._row_of.get(channel_id)
+        return self._rows[i].to_dict() if i is not None and self._present[i] else None
+
+    def top_per_country(self) -> Dict[str, Dict]:
+        """Biggest active channel of every country"""
+        rows = self._orders["subscribers"]
+        countries = self._country[rows]
+        known = countries >= 0
+        codes, first = np.unique(countries[known], return_index=True)
+        return {self._countries[code]: self._rows[row].to_dict() for code, row in zip(codes, rows[known][first])}
+
+    def channel_counts(self) -> Dict[str, int]:
+        """Channels per country (active or not), like count_documents({"country_code": code})"""
+        n = len(self._rows)
+        countries = self._country[:n][self._present[:n]]
+        counts = np.bincount(countries[countries >= 0], minlength=len(self._countries))
+        return {code: int(counts[i]) for i, code in enumerate(self._countries)}
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Approximate footprint: NumPy columns, row objects and their (non-shared) values"""
+        n = len(self._rows)
+        arrays = sum(getattr(self, name).nbytes for name in (
+            "_country", "_subs", "_gain", "_growth", "_rank",
+            "_active", "_original", "_present", "_has_gain", "_has_growth"))
+        arrays += sum(order.nbytes for order in self._orders.values())
+        rows = sys.getsizeof(self._rows) + sys.getsizeof(self._row_of)
+        for row in self._rows:
+            rows += sys.getsizeof(row)
+            for name in INDEXED_FIELDS:
+                value = getattr(row, name)
+                if value is not _MISSING and name not in _INTERNED_FIELDS and value is not None:
+                    rows += sys.getsizeof(value)
+        return {"channels": n, "arrays": arrays, "rows": rows, "total": arrays + rows}
+
+    def get_stats(self) -> Dict:
+        n = len(self._rows)
+        return {
+            "ready": self._ready,
+            "channels": n,
+            "active": int(self._active[:n].sum()),
+            "countries": len(self._countries),
+            **self._stats
+        }
+
+
+# Singleton instance
+_channel_index = None
+
+def get_channel_index(db: AsyncIOMotorDatabase) -> ChannelIndex:
+    global _channel_index
+    if _channel_index is None:
+        _channel_index = ChannelIndex(db)
+    return _channel_index
@@ -0,0 +1,48 @@
+"""
+Channel Views - Predefined Mongo projections for channel-returning endpoints
+
+List views only render titles, thumbnails, counts and growth, so they can ask for the
+compact view (or an explicit field list) instead of full documents with descriptions,
+growth history and top videos.
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+CHANNEL_VIEWS: Dict[str, Dict[str, int]] = {
+    "compact": {
+        "_id": 0, "channel_id": 1, "title": 1, "name": 1, "custom_url": 1, "thumbnail_url": 1,
+        "country_code": 1, "country_name": 1,
+        "subscriber_count": 1, "view_count": 1, "video_count": 1,
+        "daily_subscriber_gain": 1, "weekly_subscriber_gain": 1, "monthly_subscriber_gain": 1,
+        "daily_growth_percent": 1, "weekly_growth_percent": 1, "monthly_growth_percent": 1,
+        "viral_label": 1, "viral_score": 1, "current_rank": 1, "previous_rank": 1, "updated_at": 1
+    },
+    "full": {"_id": 0},
+}
+DEFAULT_VIEW = "full"
+
+MAX_FIELDS = 40
+_FIELD_NAME = re.compile(r"^[a-z][a-z0-9_]*$")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Field names from a comma-separated fields= value; ValueError if any is invalid"""
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    if len(names) > MAX_FIELDS or not all(_FIELD_NAME.match(name) for name in names):
+        raise ValueError(f"fields must be up to {MAX_FIELDS} comma-separated lower-case field names")
+    return names
+
+
+def channel_projection(view: str = DEFAULT_VIEW, fields: Optional[Tuple[str, ...]] = None,
+                       always: Tuple[str, ...] = ()) -> Dict[str, int]:
+    """
+    Projection for explicit fields or else a named view. channel_id and the `always`
+    fields (e.g. a pagination sort key) are added to explicit field lists.
+    """
+    if fields:
+        return {"_id": 0, "channel_id": 1, **{name: 1 for name in fields + always}}
+    if view not in CHANNEL_VIEWS:
+        raise ValueError(f"view must be one of {', '.join(CHANNEL_VIEWS)}")
+    return CHANNEL_VIEWS[view]
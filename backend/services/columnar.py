@@ -0,0 +1,82 @@
+"""
+Columnar Series - Compact encodings for time-series responses
+
+Row format repeats channel_id and every field name per snapshot. The columnar format
+sends one array per field plus epoch-second timestamps; with delta encoding, integer
+columns hold the first value followed by successive differences, which turns large
+counts into small numbers that compress (and msgpack-pack) much better.
+
+Decoding a delta column: values[0] = column[0], values[i] = values[i - 1] + column[i].
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+ROW_FORMAT = "rows"
+COLUMNAR_FORMAT = "columnar"
+FORMATS = (ROW_FORMAT, COLUMNAR_FORMAT)
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def epoch_seconds(timestamp: Any) -> Optional[int]:
+    """ISO-8601 string (or datetime) as integer Unix seconds"""
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    return int(timestamp.timestamp()) if isinstance(timestamp, datetime) else None
+
+
+def delta_encode(values: List[Any]) -> Optional[List[int]]:
+    """First value then differences, or None unless every value is an int"""
+    if not values or not all(type(v) is int for v in values):
+        return None
+    return [values[0]] + [b - a for a, b in zip(values, values[1:])]
+
+
+def encode_columns(columns: Dict[str, List[Any]], delta: bool) -> Dict:
+    """{"columns": ..., "delta": [names of delta-encoded columns]}"""
+    encoded, delta_columns = {}, []
+    for name, values in columns.items():
+        packed = delta_encode(values) if delta else None
+        if packed is not None:
+            delta_columns.append(name)
+        encoded[name] = values if packed is None else packed
+    return {"columns": encoded, "delta": delta_columns}
+
+
+def rows_to_columnar(rows: Iterable[Dict], fields: Iterable[str], delta: bool = False) -> Dict:
+    """Parallel arrays for timestamp (as "t", epoch seconds) and each field of rows"""
+    rows = list(rows)
+    columns = {"t": [epoch_seconds(row.get("timestamp")) for row in rows]}
+    for name in fields:
+        columns[name] = [row.get(name) for row in rows]
+    return {"format": COLUMNAR_FORMAT, "count": len(rows), **encode_columns(columns, delta)}
+
+
+def comparison_to_columnar(comparison: Dict, delta: bool = False) -> Dict:
+    """Comparison engine output with epoch-second grid timestamps and encoded series columns"""
+    grid = encode_columns({"t": [epoch_seconds(ts) for ts in comparison["timestamps"]]}, delta)
+    series = []
+    for entry in comparison["series"]:
+        values = {name: entry[name] for name in ("values", "gap", "gap_velocity")}
+        rest = {k: v for k, v in entry.items() if k not in values}
+        series.append({**rest, **encode_columns(values, delta)})
+    rest = {k: v for k, v in comparison.items() if k not in ("timestamps", "series")}
+    return {"format": COLUMNAR_FORMAT, **rest, **grid, "series": series}
+
+
+def accepts_msgpack(accept: str) -> bool:
+    """Whether an Accept header asks for MessagePack (q > 0)"""
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        if media_type.strip().lower() in MSGPACK_MEDIA_TYPES:
+            q = params.strip()
+            if not q.startswith("q="):
+                return True
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+    return False
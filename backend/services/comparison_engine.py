@@ -0,0 +1,165 @@
+"""
+Comparison Engine - Aligned multi-channel time series for compare and race views
+
+channel_stats snapshots are written at different times per channel, so raw histories
+don't share timestamps. The engine reads every channel's window in one query and
+resamples all series onto one time grid with linear interpolation. All channels are
+laid end to end on one offset time axis, so a single searchsorted call locates every
+grid point of every series. Gaps and gap velocities are measured against a baseline
+channel (the first requested one by default).
+"""
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+COMPARABLE_METRICS = ("subscriber_count", "view_count", "video_count")
+MAX_COMPARE_CHANNELS = 10
+READ_BATCH_SIZE = 2000
+
+
+def resample(times: List[np.ndarray], values: List[np.ndarray], grid: np.ndarray) -> np.ndarray:
+    """
+    Linear interpolation of every (times, values) series at grid, shape (series, grid).
+    Series must be sorted by time; grid points outside a series' range are NaN.
+    """
+    n = len(times)
+    out = np.full((n, len(grid)), np.nan)
+    lengths = np.array([len(t) for t in times])
+    if not lengths.any():
+        return out
+
+    # Shift series k by k * span so one sorted axis holds all of them
+    t_all = np.concatenate(times)
+    lo = min(t_all.min(), grid.min())
+    span = max(t_all.max(), grid.max()) - lo + 1.0
+    owner = np.repeat(np.arange(n), lengths)
+    axis = t_all - lo + owner * span
+    v_all = np.concatenate(values).astype(float)
+
+    queries = (grid - lo)[None, :] + (np.arange(n) * span)[:, None]
+    right = np.searchsorted(axis, queries, side="left")
+
+    # Each series' own [first, last] index range on the shared axis (no extrapolation)
+    ends = np.cumsum(lengths)
+    first = np.minimum(ends - lengths, len(axis) - 1)[:, None]
+    last = np.maximum(ends - 1, 0)[:, None]
+    inside = (lengths[:, None] > 0) & (queries >= axis[first]) & (queries <= axis[last])
+
+    right = np.clip(right, first, last)
+    left = np.maximum(right - 1, first)
+    t0, t1 = axis[left], axis[right]
+    v0, v1 = v_all[left], v_all[right]
+
+    width = np.where(t1 > t0, t1 - t0, 1.0)
+    interpolated = np.where(t1 > t0, v0 + (v1 - v0) * (queries - t0) / width, v1)
+    out[inside] = interpolated[inside]
+    return out
+
+
+def _to_list(series: np.ndarray, digits: Optional[int] = None) -> List[Optional[float]]:
+    """JSON-ready list with NaN as None"""
+    rounded = np.round(series, digits) if digits is not None else np.round(series)
+    return [None if np.isnan(v) else (float(v) if digits else int(v)) for v in rounded]
+
+
+class ComparisonEngine:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def _load(self, channel_ids: List[str], metric: str, since: str):
+        """Per channel (epoch seconds, values), read with one $in query"""
+        times = {cid: [] for cid in channel_ids}
+        values = {cid: [] for cid in channel_ids}
+        cursor = self.db.channel_stats.find(
+            {"channel_id": {"$in": channel_ids}, "timestamp": {"$gte": since}, metric: {"$ne": None}},
+            {"_id": 0, "channel_id": 1, "timestamp": 1, metric: 1}
+        ).sort("timestamp", 1).batch_size(READ_BATCH_SIZE)
+
+        async for row in cursor:
+            try:
+                ts = datetime.fromisoformat(row["timestamp"]).timestamp()
+            except (TypeError, ValueError):
+                continue
+            times[row["channel_id"]].append(ts)
+            values[row["channel_id"]].append(row[metric])
+
+        return (
+            [np.asarray(times[cid], dtype=float) for cid in channel_ids],
+            [np.asarray(values[cid], dtype=float) for cid in channel_ids]
+        )
+
+    async def compare(self, channel_ids: List[str], days: int = 30, points: int = 60,
+                      metric: str = "subscriber_count", baseline: Optional[str] = None) -> Dict:
+        """
+        Series of each channel on a shared grid of `points` timestamps over the last
+        `days` days, plus the gap to the baseline channel and how fast it changes (per day).
+        """
+        if metric not in COMPARABLE_METRICS:
+            raise ValueError(f"metric must be one of {', '.join(COMPARABLE_METRICS)}")
+        baseline = baseline or channel_ids[0]
+        if baseline not in channel_ids:
+            raise ValueError("baseline must be one of the compared channels")
+
+        now = datetime.now(timezone.utc)
+        since = (now - timedelta(days=days)).isoformat()
+        times, values = await self._load(channel_ids, metric, since)
+
+        # Grid over the span every channel with data covers, so no series is extrapolated;
+        # when the spans don't overlap, over their union (values are None outside a span)
+        observed = [t for t in times if len(t)]
+        if observed:
+            lo, hi = max(t[0] for t in observed), min(t[-1] for t in observed)
+            if hi <= lo:
+                lo, hi = min(t[0] for t in observed), max(t[-1] for t in observed)
+        else:
+            lo = hi = now.timestamp()
+        grid = np.linspace(lo, hi, points) if hi > lo else np.array([hi])
+
+        matrix = resample(times, values, grid)
+        gaps = matrix[channel_ids.index(baseline)][None, :] - matrix
+        grid_days = (grid - grid[0]) / 86400.0
+        if len(grid) > 1:
+            with np.errstate(invalid="ignore"):
+                velocity = np.gradient(gaps, grid_days, axis=1)
+        else:
+            velocity = np.full_like(gaps, np.nan)
+
+        series = []
+        for i, cid in enumerate(channel_ids):
+            gap, vel = gaps[i], velocity[i]
+            latest_gap = gap[~np.isnan(gap)][-1] if (~np.isnan(gap)).any() else None
+            latest_velocity = vel[~np.isnan(vel)][-1] if (~np.isnan(vel)).any() else None
+            # Gap shrinking toward zero: days until the channels meet at the current pace
+            days_to_close = None
+            if cid != baseline and latest_gap and latest_velocity and latest_gap * latest_velocity < 0:
+                days_to_close = round(float(abs(latest_gap / latest_velocity)), 1)
+            series.append({
+                "channel_id": cid,
+                "samples": int(len(times[i])),
+                "values": _to_list(matrix[i]),
+                "gap": _to_list(gap),
+                "gap_velocity": _to_list(vel, 2),
+                "days_to_close": days_to_close
+            })
+
+        return {
+            "metric": metric,
+            "baseline": baseline,
+            "days": days,
+            "timestamps": [datetime.fromtimestamp(t, timezone.utc).isoformat() for t in grid],
+            "series": series
+        }
+
+
+# Singleton instance
+_comparison_engine = None
+
+def get_comparison_engine(db: AsyncIOMotorDatabase) -> ComparisonEngine:
+    global _comparison_engine
+    if _comparison_engine is None:
+        _comparison_engine = ComparisonEngine(db)
+    return _comparison_engine
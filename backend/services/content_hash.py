@@ -0,0 +1,99 @@
+"""
+Content Hash - Per-document hashes used to diff collections between environments
+"""
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+# Collections that can be delta-synced, their unique key, fields each environment
+# computes for itself (rankings, growth metrics) which are neither hashed nor transferred,
+# fields every environment's own refresh rewrites (live counts, refresh timestamps)
+# which are transferred with a document but don't make it differ, and date fields that
+# may be stored as ISO strings on one side and Date values on the other
+SYNC_COLLECTIONS = {
+    "channels": {
+        "key": "channel_id",
+        "derived": [
+            "current_rank", "previous_rank", "rank_updated_at",
+            "daily_subscriber_gain", "daily_growth_percent",
+            "weekly_subscriber_gain", "weekly_growth_percent",
+            "monthly_subscriber_gain", "monthly_growth_percent",
+            "viral_score", "viral_label", "metrics_updated_at"
+        ],
+        "unhashed": [
+            "subscriber_count", "view_count", "video_count",
+            "updated_at", "snippet_updated_at"
+        ],
+        "dates": ["created_at"]
+    },
+    "blog_posts": {
+        "key": "slug",
+        "derived": [],
+        "unhashed": [],
+        "dates": ["published_at", "created_at", "updated_at"]
+    }
+}
+
+HASH_LENGTH = 16
+
+
+def _normalize_date(value: datetime) -> str:
+    """UTC ISO string at millisecond precision, the most a Mongo Date keeps (naive means UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return _normalize_date(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def content_hash(doc: Dict, exclude: Iterable[str] = ()) -> str:
+    """Stable hash of a document's content: key order, _id and excluded fields don't matter"""
+    skip = set(exclude) | {"_id"}
+    content = {k: v for k, v in doc.items() if k not in skip}
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+def sync_hash(collection: str, doc: Dict) -> str:
+    """
+    Manifest hash of a synced document: its content without the collection's unhashed
+    fields, with date fields hashed the same whether stored as ISO strings or Dates
+    """
+    config = SYNC_COLLECTIONS[collection]
+    doc = dict(doc)
+    for field in config["dates"]:
+        if isinstance(doc.get(field), str):
+            try:
+                doc[field] = datetime.fromisoformat(doc[field].replace('Z', '+00:00'))
+            except ValueError:
+                pass
+    return content_hash(doc, config["unhashed"])
+
+
+def sync_projection(collection: str) -> Optional[Dict]:
+    """Mongo projection returning only the synced fields of a collection (None if not syncable)"""
+    config = SYNC_COLLECTIONS.get(collection)
+    if config is None:
+        return None
+    projection = {"_id": 0}
+    projection.update({field: 0 for field in config["derived"]})
+    return projection
+
+
+def diff_manifests(source: Dict[str, str], target: Dict[str, str]) -> Dict:
+    """Compare {key: hash} manifests; returns keys to create/update and counts"""
+    new = [key for key in source if key not in target]
+    changed = [key for key, h in source.items() if key in target and target[key] != h]
+    return {
+        "new": new,
+        "changed": changed,
+        "unchanged": len(source) - len(new) - len(changed),
+        "only_in_target": sum(1 for key in target if key not in source)
+    }
@@ -0,0 +1,97 @@
+"""
+Count Cache - Cached count_documents totals for paginated list endpoints
+
+List endpoints read totals from here instead of counting on every page. The ranking
+job recounts every cached channel total; blog totals and channel totals are dropped
+when the change bus reports inserts, deletes or status changes, and recounted on the
+next request.
+"""
+import json
+import time
+import logging
+from typing import Dict, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+
+logger = logging.getLogger(__name__)
+
+# Safety net for changes the change bus can't attribute (e.g. polling without timestamps)
+MAX_COUNT_AGE_SECONDS = 900
+MAX_CACHED_COUNTS = 1000
+
+# Fields whose change can move a document in or out of a counted filter
+COUNTED_FIELDS = {
+    "channels": ("is_active", "country_code"),
+    "blog_posts": ("status", "category"),
+}
+
+
+class CountCache:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._counts: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._unsubscribe = None
+        self._stats = {"hits": 0, "counts": 0, "refreshes": 0}
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, list(COUNTED_FIELDS))
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @staticmethod
+    def _key(collection: str, query: Dict) -> Tuple[str, str]:
+        return collection, json.dumps(query, sort_keys=True, default=str)
+
+    async def count(self, collection: str, query: Dict) -> int:
+        """Cached count_documents(query) on collection"""
+        key = self._key(collection, query)
+        cached = self._counts.get(key)
+        if cached and time.time() - cached[1] < MAX_COUNT_AGE_SECONDS:
+            self._stats["hits"] += 1
+            return cached[0]
+
+        total = await self.db[collection].count_documents(query)
+        self._stats["counts"] += 1
+        if len(self._counts) >= MAX_CACHED_COUNTS:
+            self._counts.pop(next(iter(self._counts)))
+        self._counts[key] = (total, time.time())
+        return total
+
+    async def refresh(self, collection: str) -> int:
+        """Recount every cached total for collection; returns how many were refreshed"""
+        keys = [key for key in self._counts if key[0] == collection]
+        for key in keys:
+            try:
+                total = await self.db[collection].count_documents(json.loads(key[1]))
+            except Exception as e:
+                logger.error(f"Recounting {collection} {key[1]} failed: {e}")
+                self._counts.pop(key, None)
+                continue
+            self._counts[key] = (total, time.time())
+        self._stats["refreshes"] += 1
+        return len(keys)
+
+    def invalidate(self, collection: Optional[str] = None):
+        for key in [k for k in self._counts if collection is None or k[0] == collection]:
+            del self._counts[key]
+
+    def _on_change(self, event: ChangeEvent):
+        if event.touches(*COUNTED_FIELDS[event.collection]):
+            self.invalidate(event.collection)
+
+    def get_stats(self) -> Dict:
+        return {"cached": len(self._counts), **self._stats}
+
+
+# Singleton instance
+_count_cache = None
+
+def get_count_cache(db: AsyncIOMotorDatabase) -> CountCache:
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = CountCache(db)
+    return _count_cache
@@ -0,0 +1,47 @@
+"""
+Debounced Refresher - Batches change-bus keys into one refresh call per delay window
+
+Change subscribers that re-read changed channels (widget hub, search index, channel
+index) hand keys to add(). The first key starts a task that waits `delay` seconds, takes
+everything collected so far and awaits the refresh callback with it (typically one $in
+read). Keys that arrive while the callback runs start another pass once it returns, so
+the last changes of a bulk refresh are never left waiting for an unrelated event.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class DebouncedRefresher:
+    def __init__(self, refresh: Callable[[List[str]], Awaitable[None]], delay: float, name: str):
+        self._refresh = refresh
+        self.delay = delay
+        self.name = name
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, keys: Iterable[str]):
+        self._pending.update(keys)
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.delay)
+            keys = list(self._pending)
+            self._pending.clear()
+            try:
+                await self._refresh(keys)
+            except Exception as e:
+                logger.error(f"{self.name} update failed: {e}")
+
+    async def join(self):
+        """Wait until every key added so far has been refreshed"""
+        while self._task is not None and not self._task.done():
+            await self._task
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,131 @@
+"""
+Channel Discovery Service - Batched, de-duplicated discovery of new channels per country
+"""
+import asyncio
+import logging
+from typing import List, Dict, Tuple, Callable
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Concurrent YouTube searches per discovery run
+SEARCH_CONCURRENCY = 4
+
+
+class ChannelDiscoveryService:
+    def __init__(self, db: AsyncIOMotorDatabase, youtube_service):
+        self.db = db
+        self.youtube_service = youtube_service
+
+    async def get_channel_counts_by_country(self) -> Dict[str, int]:
+        """Channel count per country_code in a single aggregation"""
+        pipeline = [{"$group": {"_id": "$country_code", "count": {"$sum": 1}}}]
+        counts = await self.db.channels.aggregate(pipeline).to_list(None)
+        return {c["_id"]: c["count"] for c in counts if c["_id"]}
+
+    async def find_countries_by_coverage(self, min_count: int, max_count: int) -> List[Tuple[Dict, int]]:
+        """Countries whose channel count is within [min_count, max_count], lowest coverage first"""
+        counts = await self.get_channel_counts_by_country()
+        countries = await self.db.countries.find({}, {"_id": 0, "code": 1, "name": 1}).to_list(None)
+
+        matches = [
+            (country, counts.get(country["code"], 0))
+            for country in countries
+            if min_count <= counts.get(country["code"], 0) <= max_count
+        ]
+        matches.sort(key=lambda x: x[1])
+        return matches
+
+    async def _search_candidates(self, countries: List[Dict], query_fn: Callable[[Dict], str], max_results: int) -> Dict[str, Dict]:
+        """Run one search per country and collect candidate channel ids (first country wins)"""
+        semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+        async def search(country):
+            async with semaphore:
+                try:
+                    return country, await self.youtube_service.search_channels(
+                        query_fn(country), region_code=country["code"], max_results=max_results
+                    )
+                except Exception as e:
+                    logger.error(f"Search failed for {country.get('name')}: {e}")
+                    return country, []
+
+        candidates = {}
+        for country, results in await asyncio.gather(*(search(c) for c in countries)):
+            for result in results:
+                channel_id = result.get("channel_id")
+                if channel_id and channel_id not in candidates:
+                    candidates[channel_id] = country
+        return candidates
+
+    async def discover(
+        self,
+        countries: List[Dict],
+        query_fn: Callable[[Dict], str],
+        min_subscribers: int,
+        max_results: int = 10
+    ) -> Dict:
+        """
+        Discover channels for the given countries:
+        search all countries first, drop known ids with one $in query, fetch stats for
+        the survivors 50 at a time and insert them with a single insert_many.
+        """
+        candidates = await self._search_candidates(countries, query_fn, max_results)
+        if not candidates:
+            return {"searched": len(countries), "candidates": 0, "new": 0, "inserted": 0}
+
+        known = await self.db.channels.find(
+            {"channel_id": {"$in": list(candidates)}},
+            {"_id": 0, "channel_id": 1}
+        ).to_list(None)
+        known_ids = {c["channel_id"] for c in known}
+        new_ids = [cid for cid in candidates if cid not in known_ids]
+
+        stats = await self.youtube_service.get_batch_channel_stats(new_ids) if new_ids else []
+
+        now = datetime.now(timezone.utc).isoformat()
+        docs = []
+        for yt_data in stats:
+            if yt_data.get("subscriber_count", 0) < min_subscribers:
+                continue
+            country = candidates[yt_data["channel_id"]]
+            docs.append({
+                "channel_id": yt_data["channel_id"],
+                "title": yt_data.get("title", ""),
+                "name": yt_data.get("title", ""),
+                "description": yt_data.get("description", "")[:500],
+                "custom_url": yt_data.get("custom_url", ""),
+                "country_code": country["code"],
+                "country_name": country.get("name", country["code"]),
+                "subscriber_count": yt_data.get("subscriber_count", 0),
+                "view_count": yt_data.get("view_count", 0),
+                "video_count": yt_data.get("video_count", 0),
+                "thumbnail_url": yt_data.get("thumbnail_url", ""),
+                "published_at": yt_data.get("published_at", ""),
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now
+            })
+
+        inserted = 0
+        if docs:
+            try:
+                result = await self.db.channels.insert_many(docs, ordered=False)
+                inserted = len(result.inserted_ids)
+            except BulkWriteError as e:
+                # Unordered insert keeps going past duplicates; count what made it in
+                inserted = e.details.get("nInserted", 0)
+                logger.error(f"Discovery insert_many partially failed: {e}")
+
+        return {
+            "searched": len(countries),
+            "candidates": len(candidates),
+            "new": len(new_ids),
+            "inserted": inserted
+        }
+
+
+def get_discovery_service(db: AsyncIOMotorDatabase, youtube_service) -> ChannelDiscoveryService:
+    return ChannelDiscoveryService(db, youtube_service)
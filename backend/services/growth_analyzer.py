@@ -142,6 +142,35 @@ class GrowthAnalyzer:
         
         return stats
     
+    async def get_aligned_growth_histories(self, channel_ids: List[str], days: int = 30) -> Dict:
+        """
+        Daily subscriber/view/video counts for several channels from one aggregation.
+        Each channel gets one point (its last snapshot) per UTC day, keyed by the same
+        dates, so the histories line up for comparison charts.
+        """
+        start_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        pipeline = [
+            {"$match": {"channel_id": {"$in": channel_ids}, "timestamp": {"$gte": start_date}}},
+            {"$sort": {"timestamp": 1}},
+            {"$group": {
+                "_id": {"channel_id": "$channel_id", "date": {"$substr": ["$timestamp", 0, 10]}},
+                "timestamp": {"$last": "$timestamp"},
+                "subscriber_count": {"$last": "$subscriber_count"},
+                "view_count": {"$last": "$view_count"},
+                "video_count": {"$last": "$video_count"}
+            }},
+            {"$sort": {"_id.date": 1}}
+        ]
+        
+        histories = {channel_id: [] for channel_id in channel_ids}
+        dates = set()
+        async for row in self.db.channel_stats.aggregate(pipeline):
+            date = row.pop("_id")
+            dates.add(date["date"])
+            histories[date["channel_id"]].append({"date": date["date"], **row})
+        
+        return {"dates": sorted(dates), "histories": histories}
+    
     async def calculate_viral_score(self, channel_id: str) -> Dict:
         """
         Calculate viral score and prediction label
@@ -0,0 +1,152 @@
+"""
+History Downsampler Service - Chart-sized channel histories via Largest-Triangle-Three-Buckets
+
+Raw channel_stats windows hold every snapshot (about 12 a day), far more points than a
+chart can show. LTTB keeps the first and last snapshot and, from each bucket in between,
+the one forming the largest triangle with the previous pick and the next bucket's mean,
+which preserves peaks and slope changes. Results are cached per channel, window and
+point count, and dropped when the change bus reports new counts for the channel.
+"""
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional, Set, Tuple
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = 600
+MAX_CACHED_SERIES = 2000
+READ_BATCH_SIZE = 1000
+
+# Channel fields written together with a new channel_stats snapshot
+SNAPSHOT_FIELDS = ("subscriber_count", "view_count", "video_count")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps out of len(x) (x ascending). Bucket edges and every
+    bucket mean (from cumulative sums) are computed up front, and each bucket's triangle
+    areas are one vectorized expression. Only the pick itself is sequential, since every
+    bucket's triangle is anchored on the previous bucket's pick.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # threshold - 2 buckets over the points between the fixed first and last ones
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    starts, ends = edges[:-1], edges[1:]
+
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = ends - starts
+    mean_x = (cx[ends] - cx[starts]) / counts
+    mean_y = (cy[ends] - cy[starts]) / counts
+    # Triangle's third vertex: the next bucket's mean, or the last point for the final bucket
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        s, e = starts[i], ends[i]
+        area = np.abs((x[a] - next_x[i]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (next_y[i] - y[a]))
+        a = s + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+class HistoryDownsampler:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._cache: "OrderedDict[Tuple[str, int, int], Tuple[float, Dict]]" = OrderedDict()
+        # Cached keys per channel_id, so invalidation doesn't scan the whole cache
+        self._keys: Dict[str, Set[Tuple[str, int, int]]] = {}
+        self._unsubscribe = None
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, ["channels"])
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    async def get_history(self, channel_id: str, days: int = 30, points: int = 200) -> Dict:
+        """{"history": at most `points` snapshots chosen by LTTB on subscriber_count, "raw_points": n}"""
+        key = (channel_id, days, points)
+        cached = self._cache.get(key)
+        if cached and time.time() < cached[0]:
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+            return cached[1]
+
+        self._stats["misses"] += 1
+        start_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        cursor = self.db.channel_stats.find(
+            {"channel_id": channel_id, "timestamp": {"$gte": start_date}},
+            {"_id": 0}
+        ).sort("timestamp", 1).batch_size(READ_BATCH_SIZE)
+        rows = [row async for row in cursor]
+
+        if len(rows) > points:
+            x = np.array([datetime.fromisoformat(r["timestamp"]).timestamp() for r in rows])
+            y = np.array([r.get("subscriber_count") or 0 for r in rows], dtype=float)
+            history = [rows[i] for i in lttb_indices(x, y, points)]
+        else:
+            history = rows
+        result = {"history": history, "raw_points": len(rows)}
+
+        self._cache[key] = (time.time() + CACHE_TTL_SECONDS, result)
+        self._cache.move_to_end(key)
+        self._keys.setdefault(channel_id, set()).add(key)
+        while len(self._cache) > MAX_CACHED_SERIES:
+            evicted, _ = self._cache.popitem(last=False)
+            self._discard_key(evicted)
+        return result
+
+    def _discard_key(self, key: Tuple[str, int, int]):
+        keys = self._keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys[key[0]]
+
+    def invalidate(self, channel_id: Optional[str] = None):
+        if channel_id is None:
+            count = len(self._cache)
+            self._cache.clear()
+            self._keys.clear()
+        else:
+            keys = self._keys.pop(channel_id, ())
+            for key in keys:
+                del self._cache[key]
+            count = len(keys)
+        self._stats["invalidations"] += count
+
+    def _on_change(self, event: ChangeEvent):
+        if event.touches(*SNAPSHOT_FIELDS):
+            self.invalidate(event.key)
+
+    def get_stats(self) -> Dict:
+        return {"cached": len(self._cache), **self._stats}
+
+
+# Singleton instance
+_history_downsampler = None
+
+def get_history_downsampler(db: AsyncIOMotorDatabase) -> HistoryDownsampler:
+    global _history_downsampler
+    if _history_downsampler is None:
+        _history_downsampler = HistoryDownsampler(db)
+    return _history_downsampler
@@ -0,0 +1,153 @@
+"""
+Bulk Import Service - Streamed NDJSON upserts for syncing data between environments
+"""
+import json
+import time
+import zlib
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10000
+
+# Errors reported back per import (the counts stay exact)
+MAX_REPORTED_ERRORS = 100
+
+# Blog post fields stored as datetimes, as the JSON import does
+BLOG_POST_DATE_FIELDS = ("published_at", "created_at", "updated_at")
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], gzipped: bool = False) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without buffering more than one partial line
+
+    Raises zlib.error if a gzipped stream is corrupt or cut short.
+    """
+    decompressor = zlib.decompressobj(wbits=31) if gzipped else None
+    pending = b""
+
+    async for chunk in chunks:
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+
+    if decompressor:
+        pending += decompressor.flush()
+        if not decompressor.eof:
+            raise zlib.error("incomplete gzip stream")
+    for line in pending.split(b"\n"):
+        yield line
+
+
+class NdjsonBulkImporter:
+    """Upserts NDJSON documents into a collection keyed by a unique field, batch by batch"""
+
+    def __init__(self, collection, key: str, batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                 datetime_fields: Iterable[str] = ()):
+        self.collection = collection
+        self.key = key
+        # ISO string values of these fields are stored as datetimes
+        self.datetime_fields = tuple(datetime_fields)
+        self.batch_size = max(1, min(batch_size, MAX_IMPORT_BATCH_SIZE))
+        self.errors: List[Dict] = []
+        self.error_count = 0
+
+    def _error(self, line_no: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def _parse(self, line_no: int, line: bytes) -> Optional[Dict]:
+        try:
+            doc = json.loads(line)
+        except ValueError as e:
+            self._error(line_no, f"Invalid JSON: {e}")
+            return None
+
+        if not isinstance(doc, dict) or not doc.get(self.key):
+            self._error(line_no, f"Missing {self.key}")
+            return None
+
+        doc.pop("_id", None)
+        for field in self.datetime_fields:
+            if isinstance(doc.get(field), str):
+                try:
+                    doc[field] = datetime.fromisoformat(doc[field].replace('Z', '+00:00'))
+                except ValueError:
+                    pass
+        return doc
+
+    async def _write(self, ops: List[UpdateOne], line_numbers: List[int]) -> Dict:
+        report = {"received": len(ops), "upserted": 0, "modified": 0, "matched": 0, "errors": 0}
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                self._error(line_numbers[error["index"]], error.get("errmsg", "write error"))
+            report["errors"] = len(details.get("writeErrors", []))
+
+        report["upserted"] = details.get("nUpserted", 0)
+        report["modified"] = details.get("nModified", 0)
+        report["matched"] = details.get("nMatched", 0)
+        return report
+
+    async def run(self, chunks: AsyncIterator[bytes], gzipped: bool = False) -> Dict:
+        """Consume the stream and return per-batch counts, totals and the first errors"""
+        started = time.monotonic()
+        batches = []
+        ops, line_numbers = [], []
+        line_no = 0
+
+        async def flush():
+            write_started = time.monotonic()
+            report = await self._write(ops, line_numbers)
+            report["batch"] = len(batches) + 1
+            report["write_seconds"] = round(time.monotonic() - write_started, 3)
+            batches.append(report)
+
+        try:
+            async for line in iter_ndjson_lines(chunks, gzipped):
+                line_no += 1
+                if not line.strip():
+                    continue
+                doc = self._parse(line_no, line)
+                if doc is None:
+                    continue
+
+                ops.append(UpdateOne({self.key: doc[self.key]}, {"$set": doc}, upsert=True))
+                line_numbers.append(line_no)
+                if len(ops) >= self.batch_size:
+                    await flush()
+                    ops, line_numbers = [], []
+        except zlib.error as e:
+            # Keep the lines decoded before the corruption; the rest of the body is lost
+            self._error(line_no + 1, f"Invalid gzip data: {e}")
+
+        if ops:
+            await flush()
+
+        totals = {
+            field: sum(b[field] for b in batches)
+            for field in ("received", "upserted", "modified", "matched")
+        }
+        logger.info(
+            f"NDJSON import into {self.collection.name}: {totals['received']} docs in "
+            f"{len(batches)} batches, {self.error_count} errors"
+        )
+        return {
+            **totals,
+            "lines": line_no,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "batches": batches,
+            "seconds": round(time.monotonic() - started, 3)
+        }
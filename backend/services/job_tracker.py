@@ -0,0 +1,107 @@
+"""
+Job Tracker - Runs long admin/scheduler operations as tracked background jobs
+"""
+import uuid
+import asyncio
+import logging
+from typing import Dict, Optional, Callable, Awaitable, List
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept in memory per process (the jobs collection keeps everything)
+MAX_FINISHED_JOBS = 100
+
+JobFn = Callable[[str], Awaitable[Dict]]
+
+
+class JobTracker:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._jobs: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _new_job(self, kind: str, params: Optional[Dict]) -> Dict:
+        job = {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}",
+            "kind": kind,
+            "params": params or {},
+            "status": "running",
+            "progress": {},
+            "result": None,
+            "error": None,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None
+        }
+        self._jobs[job["job_id"]] = job
+        return job
+
+    async def _persist(self, job: Dict):
+        try:
+            await self.db.jobs.update_one({"job_id": job["job_id"]}, {"$set": job}, upsert=True)
+        except Exception as e:
+            logger.error(f"Could not persist job {job['job_id']}: {e}")
+
+    async def _execute(self, job: Dict, fn: JobFn) -> Dict:
+        await self._persist(job)
+        try:
+            job["result"] = await fn(job["job_id"])
+            job["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} ({job['kind']}) failed: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.now(timezone.utc).isoformat()
+            await self._persist(job)
+            self._tasks.pop(job["job_id"], None)
+            self._trim()
+        return job
+
+    async def update_progress(self, job_id: str, progress: Dict):
+        job = self._jobs.get(job_id)
+        if job:
+            job["progress"] = progress
+            await self._persist(job)
+
+    async def run(self, kind: str, fn: JobFn, params: Optional[Dict] = None) -> Dict:
+        """Run fn(job_id) to completion as a tracked job and return the finished job"""
+        return await self._execute(self._new_job(kind, params), fn)
+
+    def start(self, kind: str, fn: JobFn, params: Optional[Dict] = None) -> str:
+        """Start fn(job_id) in the background and return its job id immediately"""
+        job = self._new_job(kind, params)
+        self._tasks[job["job_id"]] = asyncio.create_task(self._execute(job, fn))
+        return job["job_id"]
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j["status"] != "running"]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(job["job_id"], None)
+
+    def running(self, kind: str) -> Optional[Dict]:
+        """The running job of this kind in this process, if any"""
+        for job in self._jobs.values():
+            if job["kind"] == kind and job["status"] == "running":
+                return job
+        return None
+
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+        return await self.db.jobs.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def list_jobs(self, kind: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        query = {"kind": kind} if kind else {}
+        return await self.db.jobs.find(query, {"_id": 0}).sort("started_at", -1).limit(limit).to_list(limit)
+
+
+# Singleton instance
+_job_tracker = None
+
+def get_job_tracker(db: AsyncIOMotorDatabase) -> JobTracker:
+    global _job_tracker
+    if _job_tracker is None:
+        _job_tracker = JobTracker(db)
+    return _job_tracker
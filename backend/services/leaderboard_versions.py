@@ -0,0 +1,158 @@
+"""
+Leaderboard Versions - Versioned global leaderboard with stored diffs between ranking runs
+
+Every ranking run compares the global leaderboard with the previous run's state and,
+when anything moved, stores the difference (rank moves, subscriber count changes,
+entries and exits) under the next version number. Clients holding version N fetch
+only what changed since N; once N is older than the kept diffs they reload in full.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.channel_views import CHANNEL_VIEWS
+
+logger = logging.getLogger(__name__)
+
+# The global leaderboard: original (non country-copy) active channels by subscribers
+GLOBAL_LEADERBOARD_QUERY = {"is_active": True, "original_channel_id": {"$exists": False}}
+GLOBAL_LEADERBOARD_SIZE = 1000
+
+# Diffs kept for catching up (a day of 5-minute ranking runs)
+MAX_STORED_DIFFS = 288
+
+STATE_ID = "global"
+
+
+def diff_leaderboards(previous: List[List], current: List[Dict]) -> Dict:
+    """
+    Difference between the previous state ([channel_id, subscriber_count] in rank order)
+    and the current leaderboard (compact channel docs in rank order)
+    """
+    before = {cid: (rank, subs) for rank, (cid, subs) in enumerate(previous, start=1)}
+    after_ids = set()
+    moves, counts, entries = [], [], []
+
+    for rank, channel in enumerate(current, start=1):
+        cid = channel["channel_id"]
+        after_ids.add(cid)
+        subs = channel.get("subscriber_count")
+        if cid not in before:
+            entries.append({**channel, "global_rank": rank})
+            continue
+        old_rank, old_subs = before[cid]
+        if old_rank != rank:
+            moves.append({"channel_id": cid, "old_rank": old_rank, "new_rank": rank})
+        if old_subs != subs:
+            counts.append({"channel_id": cid, "subscriber_count": subs})
+
+    exits = [cid for cid in before if cid not in after_ids]
+    return {"moves": moves, "counts": counts, "entries": entries, "exits": exits}
+
+
+def merge_diffs(diffs: List[Dict]) -> Dict:
+    """Net effect of consecutive diffs, oldest first"""
+    ranks: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+    entries: Dict[str, Dict] = {}
+    exits: Dict[str, None] = {}
+
+    for diff in diffs:
+        for cid in diff["exits"]:
+            entries.pop(cid, None)
+            ranks.pop(cid, None)
+            counts.pop(cid, None)
+            exits[cid] = None
+        for entry in diff["entries"]:
+            exits.pop(entry["channel_id"], None)
+            ranks.pop(entry["channel_id"], None)
+            counts.pop(entry["channel_id"], None)
+            entries[entry["channel_id"]] = dict(entry)
+        for move in diff["moves"]:
+            if move["channel_id"] in entries:
+                entries[move["channel_id"]]["global_rank"] = move["new_rank"]
+            else:
+                ranks[move["channel_id"]] = move["new_rank"]
+        for count in diff["counts"]:
+            if count["channel_id"] in entries:
+                entries[count["channel_id"]]["subscriber_count"] = count["subscriber_count"]
+            else:
+                counts[count["channel_id"]] = count["subscriber_count"]
+
+    return {
+        "moves": [{"channel_id": cid, "global_rank": rank} for cid, rank in ranks.items()],
+        "counts": [{"channel_id": cid, "subscriber_count": subs} for cid, subs in counts.items()],
+        "entries": list(entries.values()),
+        "exits": list(exits)
+    }
+
+
+class LeaderboardVersions:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._lock = asyncio.Lock()
+
+    async def current_version(self) -> int:
+        state = await self.db.leaderboard_state.find_one({"_id": STATE_ID}, {"version": 1})
+        return state["version"] if state else 0
+
+    async def record(self) -> Optional[int]:
+        """Diff the global leaderboard against the last recorded state; new version or None if unchanged"""
+        async with self._lock:
+            current = await self.db.channels.find(
+                GLOBAL_LEADERBOARD_QUERY, CHANNEL_VIEWS["compact"]
+            ).sort("subscriber_count", -1).limit(GLOBAL_LEADERBOARD_SIZE).to_list(GLOBAL_LEADERBOARD_SIZE)
+            state = await self.db.leaderboard_state.find_one({"_id": STATE_ID}) or {"version": 0, "entries": []}
+
+            diff = diff_leaderboards(state["entries"], current)
+            if state["version"] and not any(diff.values()):
+                return None
+
+            version = state["version"] + 1
+            now = datetime.now(timezone.utc).isoformat()
+            # The first version is a baseline: there is nothing to diff it against
+            if state["version"]:
+                await self.db.leaderboard_diffs.insert_one({"version": version, "created_at": now, **diff})
+                await self.db.leaderboard_diffs.delete_many({"version": {"$lte": version - MAX_STORED_DIFFS}})
+            await self.db.leaderboard_state.update_one(
+                {"_id": STATE_ID},
+                {"$set": {
+                    "version": version,
+                    "updated_at": now,
+                    "entries": [[c["channel_id"], c.get("subscriber_count")] for c in current]
+                }},
+                upsert=True
+            )
+
+        logger.info(
+            f"Leaderboard version {version}: {len(diff['moves'])} moves, {len(diff['counts'])} count changes, "
+            f"{len(diff['entries'])} entries, {len(diff['exits'])} exits"
+        )
+        return version
+
+    async def changes_since(self, since: int) -> Dict:
+        """Merged changes after version `since`, or full_reload when they are no longer all stored"""
+        version = await self.current_version()
+        result = {"since": since, "version": version, "full_reload": False}
+        if since == version:
+            return {**result, "moves": [], "counts": [], "entries": [], "exits": []}
+        if since <= 0 or since > version:
+            return {**result, "full_reload": True}
+
+        diffs = await self.db.leaderboard_diffs.find(
+            {"version": {"$gt": since, "$lte": version}}, {"_id": 0}
+        ).sort("version", 1).to_list(MAX_STORED_DIFFS)
+        if [d["version"] for d in diffs] != list(range(since + 1, version + 1)):
+            return {**result, "full_reload": True}
+        return {**result, **merge_diffs(diffs)}
+
+
+# Singleton instance
+_leaderboard_versions = None
+
+def get_leaderboard_versions(db: AsyncIOMotorDatabase) -> LeaderboardVersions:
+    global _leaderboard_versions
+    if _leaderboard_versions is None:
+        _leaderboard_versions = LeaderboardVersions(db)
+    return _leaderboard_versions
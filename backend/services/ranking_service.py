@@ -2,49 +2,67 @@
 Ranking Service - Handles ranking calculations and updates
 """
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from services.response_cache import purge_tags
+from services.single_flight import single_flight
+from services.count_cache import get_count_cache
+from services.channel_views import DEFAULT_VIEW, channel_projection
+from services.leaderboard_versions import get_leaderboard_versions, GLOBAL_LEADERBOARD_QUERY, GLOBAL_LEADERBOARD_SIZE
+from services.channel_index import get_channel_index, ChannelIndex
 
 logger = logging.getLogger(__name__)
 
+# Channels read per cursor batch, and rank updates sent per bulk_write, by the ranking jobs
+RANKING_BATCH_SIZE = 1000
+
+# Rank order; ties broken by channel_id so every run ranks equal counts the same way.
+# Backed by the (country_code,) is_active, subscriber_count, channel_id indexes
+RANK_SORT = [("subscriber_count", -1), ("channel_id", 1)]
+
 class RankingService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
     
+    def _index(self, view: str, fields: Optional[Tuple[str, ...]]) -> Optional[ChannelIndex]:
+        """The in-memory channel index when it is loaded and holds every requested field"""
+        index = get_channel_index(self.db)
+        return index if index.ready and index.covers(view, fields) else None
+    
     async def calculate_country_rankings(self, country_code: str) -> List[Dict]:
         """Calculate rankings for channels in a specific country"""
-        channels = await self.db.channels.find(
+        cursor = self.db.channels.find(
             {"country_code": country_code, "is_active": True}
-        ).to_list(1000)
-        
-        # Sort by subscriber count
-        channels.sort(key=lambda x: x.get("subscriber_count", 0), reverse=True)
+        ).sort(RANK_SORT).batch_size(RANKING_BATCH_SIZE)
         
         # Assign ranks
-        for idx, channel in enumerate(channels):
-            channel["rank"] = idx + 1
+        channels = []
+        async for channel in cursor:
+            channel["rank"] = len(channels) + 1
+            channels.append(channel)
         
         return channels
     
     async def update_rankings(self, country_code: str) -> Dict:
-        """Update rankings for a country and detect changes"""
-        channels = await self.db.channels.find(
+        """
+        Update rankings for a country and detect changes. Channels are streamed in rank
+        order and their new ranks written one bulk_write per RANKING_BATCH_SIZE channels
+        """
+        cursor = self.db.channels.find(
             {"country_code": country_code, "is_active": True},
-            {"_id": 0}
-        ).to_list(1000)
-        
-        if not channels:
-            return {"updated": 0, "changes": []}
-        
-        # Sort by subscriber count
-        channels.sort(key=lambda x: x.get("subscriber_count", 0), reverse=True)
+            {"_id": 0, "channel_id": 1, "title": 1, "current_rank": 1}
+        ).sort(RANK_SORT).batch_size(RANKING_BATCH_SIZE)
         
         changes = []
         now = datetime.now(timezone.utc).isoformat()
+        updated = 0
+        updates, history = [], []
         
-        for idx, channel in enumerate(channels):
-            new_rank = idx + 1
+        async for channel in cursor:
+            updated += 1
+            new_rank = updated
             old_rank = channel.get("current_rank", new_rank)
             channel_id = channel["channel_id"]
             
@@ -59,7 +77,7 @@ class RankingService:
                 })
                 
                 # Log rank history
-                await self.db.rank_history.insert_one({
+                history.append({
                     "channel_id": channel_id,
                     "country_code": country_code,
                     "old_rank": old_rank,
@@ -68,7 +86,7 @@ class RankingService:
                 })
             
             # Update channel rank
-            await self.db.channels.update_one(
+            updates.append(UpdateOne(
                 {"channel_id": channel_id},
                 {
                     "$set": {
@@ -77,29 +95,50 @@ class RankingService:
                         "rank_updated_at": now
                     }
                 }
-            )
+            ))
+            if len(updates) >= RANKING_BATCH_SIZE:
+                await self.write_ranks(updates, history)
+                updates, history = [], []
         
-        return {"updated": len(channels), "changes": changes}
+        await self.write_ranks(updates, history)
+        return {"updated": updated, "changes": changes}
+    
+    async def write_ranks(self, updates: List[UpdateOne], history: List[Dict]):
+        """One unordered bulk_write of rank updates and one insert_many of rank_history rows (also used by the global ranking job)"""
+        if updates:
+            await self.db.channels.bulk_write(updates, ordered=False)
+        if history:
+            await self.db.rank_history.insert_many(history, ordered=False)
     
-    async def get_global_top_100(self) -> List[Dict]:
+    @single_flight("leaderboard.global")
+    async def get_global_top_100(self, view: str = DEFAULT_VIEW, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
         """Get all channels globally sorted by subscribers (excludes country copies)"""
+        index = self._index(view, fields)
+        if index:
+            return index.global_leaderboard(GLOBAL_LEADERBOARD_SIZE, fields)
+        
         # Exclude country-specific copies (those with original_channel_id field)
         channels = await self.db.channels.find(
-            {"is_active": True, "original_channel_id": {"$exists": False}},
-            {"_id": 0}
-        ).sort("subscriber_count", -1).limit(1000).to_list(1000)
+            GLOBAL_LEADERBOARD_QUERY,
+            channel_projection(view, fields)
+        ).sort("subscriber_count", -1).limit(GLOBAL_LEADERBOARD_SIZE).to_list(GLOBAL_LEADERBOARD_SIZE)
         
         for idx, channel in enumerate(channels):
             channel["global_rank"] = idx + 1
         
         return channels
     
-    async def get_fastest_growing(self, limit: int = 20) -> List[Dict]:
+    @single_flight("leaderboard.fastest_growing")
+    async def get_fastest_growing(self, limit: int = 20, view: str = DEFAULT_VIEW, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
         """Get fastest growing channels by daily growth percentage"""
-        channels = await self.db.channels.find(
-            {"is_active": True, "daily_growth_percent": {"$exists": True}, "original_channel_id": {"$exists": False}},
-            {"_id": 0}
-        ).sort("daily_growth_percent", -1).limit(limit).to_list(limit)
+        index = self._index(view, fields)
+        if index:
+            channels = index.fastest_growing(limit, fields)
+        else:
+            channels = await self.db.channels.find(
+                {"is_active": True, "daily_growth_percent": {"$exists": True}, "original_channel_id": {"$exists": False}},
+                channel_projection(view, fields)
+            ).sort("daily_growth_percent", -1).limit(limit).to_list(limit)
         
         # Normalize title field
         for channel in channels:
@@ -108,12 +147,17 @@ class RankingService:
         
         return channels
     
-    async def get_biggest_gainers_24h(self, limit: int = 20) -> List[Dict]:
+    @single_flight("leaderboard.biggest_gainers")
+    async def get_biggest_gainers_24h(self, limit: int = 20, view: str = DEFAULT_VIEW, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
         """Get channels with biggest subscriber gain in 24h"""
-        channels = await self.db.channels.find(
-            {"is_active": True, "daily_subscriber_gain": {"$exists": True}, "original_channel_id": {"$exists": False}},
-            {"_id": 0}
-        ).sort("daily_subscriber_gain", -1).limit(limit).to_list(limit)
+        index = self._index(view, fields)
+        if index:
+            channels = index.biggest_gainers(limit, fields)
+        else:
+            channels = await self.db.channels.find(
+                {"is_active": True, "daily_subscriber_gain": {"$exists": True}, "original_channel_id": {"$exists": False}},
+                channel_projection(view, fields)
+            ).sort("daily_subscriber_gain", -1).limit(limit).to_list(limit)
         
         # Normalize title field
         for channel in channels:
@@ -122,11 +166,17 @@ class RankingService:
         
         return channels
     
-    async def get_country_leaderboard(self, country_code: str, limit: int = 50) -> List[Dict]:
+    @single_flight("leaderboard.country")
+    async def get_country_leaderboard(self, country_code: str, limit: int = 50, view: str = DEFAULT_VIEW,
+                                      fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
         """Get leaderboard for a specific country"""
+        index = self._index(view, fields)
+        if index:
+            return index.country_leaderboard(country_code, limit, fields)
+        
         channels = await self.db.channels.find(
             {"country_code": country_code, "is_active": True},
-            {"_id": 0}
+            channel_projection(view, fields)
         ).sort("subscriber_count", -1).limit(limit).to_list(limit)
         
         for idx, channel in enumerate(channels):
@@ -161,15 +211,18 @@ class RankingService:
         countries = await self.db.countries.find({}, {"code": 1}).to_list(300)
         
         total_updated = 0
-        total_changes = []
+        total_changes = 0
         
         for country in countries:
             result = await self.update_rankings(country["code"])
             total_updated += result.get("updated", 0)
-            total_changes.extend(result.get("changes", []))
+            total_changes += len(result.get("changes", []))
         
         logger.info(f"Updated rankings for {len(countries)} countries, {total_updated} channels")
-        return {"countries": len(countries), "channels_updated": total_updated, "changes": len(total_changes)}
+        await get_leaderboard_versions(self.db).record()
+        purge_tags("leaderboard")
+        await get_count_cache(self.db).refresh("channels")
+        return {"countries": len(countries), "channels_updated": total_updated, "changes": total_changes}
 
 
 def get_ranking_service(db: AsyncIOMotorDatabase) -> RankingService:
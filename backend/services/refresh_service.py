@@ -0,0 +1,170 @@
+"""
+Channel Refresh Service - Bulk write path for refreshing tracked channels from YouTube
+"""
+import time
+import logging
+from typing import List, Dict, Optional, AsyncIterator
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from services.job_tracker import get_job_tracker
+from services.response_cache import purge_tags
+
+logger = logging.getLogger(__name__)
+
+# Channels fetched and written per batch (YouTube is still called 50 ids at a time)
+REFRESH_BATCH_SIZE = 500
+
+REFRESH_JOB_KIND = "channel_refresh"
+
+
+class ChannelRefreshService:
+    def __init__(self, db: AsyncIOMotorDatabase, youtube_service, ranking_service, batch_size: int = REFRESH_BATCH_SIZE):
+        self.db = db
+        self.youtube_service = youtube_service
+        self.ranking_service = ranking_service
+        self.batch_size = batch_size
+        self.job_tracker = get_job_tracker(db)
+
+    async def _channel_id_batches(self) -> AsyncIterator[List[str]]:
+        cursor = self.db.channels.find(
+            {"is_active": True},
+            {"_id": 0, "channel_id": 1}
+        ).batch_size(self.batch_size)
+
+        batch = []
+        async for channel in cursor:
+            batch.append(channel["channel_id"])
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def write_batch(self, results: List[Dict], include_snippet: bool) -> Dict:
+        """Write one batch of YouTube results: one unordered bulk_write + one insert_many"""
+        now = datetime.now(timezone.utc).isoformat()
+        updates = []
+        snapshots = []
+
+        for yt_data in results:
+            counts = {
+                "subscriber_count": yt_data.get("subscriber_count", 0),
+                "view_count": yt_data.get("view_count", 0),
+                "video_count": yt_data.get("video_count", 0)
+            }
+            update_data = {**counts, "updated_at": now}
+            if include_snippet:
+                update_data.update({
+                    "title": yt_data.get("title", ""),
+                    "description": yt_data.get("description", ""),
+                    "custom_url": yt_data.get("custom_url", ""),
+                    "thumbnail_url": yt_data.get("thumbnail_url", ""),
+                    "snippet_updated_at": now
+                })
+
+            updates.append(UpdateOne({"channel_id": yt_data["channel_id"]}, {"$set": update_data}))
+            snapshots.append({"channel_id": yt_data["channel_id"], **counts, "timestamp": now})
+
+        report = {"channels": len(results), "channels_updated": 0, "stats_inserted": 0, "errors": 0}
+        if not updates:
+            return report
+
+        try:
+            result = await self.db.channels.bulk_write(updates, ordered=False)
+            report["channels_updated"] = result.modified_count
+        except BulkWriteError as e:
+            report["channels_updated"] = e.details.get("nModified", 0)
+            report["errors"] += len(e.details.get("writeErrors", []))
+            logger.error(f"Refresh bulk_write partially failed: {e}")
+
+        try:
+            result = await self.db.channel_stats.insert_many(snapshots, ordered=False)
+            report["stats_inserted"] = len(result.inserted_ids)
+        except BulkWriteError as e:
+            report["stats_inserted"] = e.details.get("nInserted", 0)
+            report["errors"] += len(e.details.get("writeErrors", []))
+            logger.error(f"Refresh insert_many partially failed: {e}")
+
+        return report
+
+    async def refresh(self, include_snippet: bool = False, rank_after: bool = False, job_id: Optional[str] = None) -> Dict:
+        """
+        Refresh all active channels batch by batch.
+        include_snippet also rewrites title/description/thumbnail; rank_after runs one
+        update_all_rankings once every batch has been written.
+        """
+        started = time.monotonic()
+        batches = []
+        totals = {"channels": 0, "channels_updated": 0, "stats_inserted": 0, "errors": 0}
+
+        async for channel_ids in self._channel_id_batches():
+            fetch_started = time.monotonic()
+            results = await self.youtube_service.get_batch_channel_stats(channel_ids, include_snippet=include_snippet)
+            write_started = time.monotonic()
+            report = await self.write_batch(results, include_snippet)
+
+            report.update({
+                "batch": len(batches) + 1,
+                "requested": len(channel_ids),
+                "fetch_seconds": round(write_started - fetch_started, 3),
+                "write_seconds": round(time.monotonic() - write_started, 3)
+            })
+            batches.append(report)
+            for key in totals:
+                totals[key] += report[key]
+
+            logger.info(
+                f"Refresh batch {report['batch']}: {report['channels_updated']} channels, "
+                f"{report['stats_inserted']} stats rows, fetch {report['fetch_seconds']}s, write {report['write_seconds']}s"
+            )
+            if job_id:
+                await self.job_tracker.update_progress(job_id, {"batches_done": len(batches), **totals})
+
+        rankings = await self.ranking_service.update_all_rankings() if rank_after else None
+        purge_tags("leaderboard", "countries")
+
+        return {
+            **totals,
+            "include_snippet": include_snippet,
+            "batches": batches,
+            "rankings": rankings,
+            "seconds": round(time.monotonic() - started, 3)
+        }
+
+    def _job_fn(self, include_snippet: bool, rank_after: bool):
+        async def fn(job_id: str) -> Dict:
+            return await self.refresh(include_snippet=include_snippet, rank_after=rank_after, job_id=job_id)
+        return fn
+
+    def is_running(self) -> bool:
+        return self.job_tracker.running(REFRESH_JOB_KIND) is not None
+
+    def start_job(self, include_snippet: bool = False, rank_after: bool = False, trigger: str = "admin") -> Dict:
+        """Start a refresh in the background; reuses the running job instead of starting a second one"""
+        running = self.job_tracker.running(REFRESH_JOB_KIND)
+        if running:
+            return {"job_id": running["job_id"], "started": False}
+
+        params = {"include_snippet": include_snippet, "rank_after": rank_after, "trigger": trigger}
+        job_id = self.job_tracker.start(REFRESH_JOB_KIND, self._job_fn(include_snippet, rank_after), params)
+        return {"job_id": job_id, "started": True}
+
+    async def run_job(self, include_snippet: bool = False, rank_after: bool = False, trigger: str = "scheduler") -> Optional[Dict]:
+        """Run a tracked refresh to completion; returns None if one is already running"""
+        if self.is_running():
+            return None
+
+        params = {"include_snippet": include_snippet, "rank_after": rank_after, "trigger": trigger}
+        return await self.job_tracker.run(REFRESH_JOB_KIND, self._job_fn(include_snippet, rank_after), params)
+
+
+# Singleton instance
+_refresh_service = None
+
+def get_refresh_service(db: AsyncIOMotorDatabase, youtube_service, ranking_service) -> ChannelRefreshService:
+    global _refresh_service
+    if _refresh_service is None:
+        _refresh_service = ChannelRefreshService(db, youtube_service, ranking_service)
+    return _refresh_service
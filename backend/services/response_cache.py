@@ -0,0 +1,215 @@
+"""
+Response Cache - In-process cache of public GET responses with surrogate-key tags
+
+Handlers opt in by setting a Surrogate-Key header (space separated tags such as
+"leaderboard country:US"). Bodies are stored gzip-compressed; entries are served fresh
+for the response's max-age, then stale for stale-while-revalidate while one background
+request refreshes them. Jobs and the change bus purge entries by tag.
+"""
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from services.change_bus import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_STALE_SECONDS = 300
+MAX_ENTRIES = 5000
+MAX_BYTES = 64 * 1024 * 1024
+
+SURROGATE_KEY_HEADER = "surrogate-key"
+
+
+class CacheEntry:
+    __slots__ = ("status", "headers", "body", "tags", "route", "created", "fresh_until", "stale_until")
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, tags: Set[str],
+                 route: str, ttl: float, stale: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.tags = tags
+        self.route = route
+        self.created = time.time()
+        self.fresh_until = self.created + ttl
+        self.stale_until = self.fresh_until + stale
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+
+class PurgeGenerations:
+    """
+    Purge counter per tag. A result computed while a purge ran must not be stored: read
+    `current` before computing and skip the store when purged_since(tags, that value).
+    """
+
+    def __init__(self):
+        self.current = 0
+        self._cleared = 0
+        self._tags: Dict[str, int] = {}
+
+    def bump(self, tags: Optional[Iterable[str]] = None):
+        """Record a purge of the tags (of everything when tags is None)"""
+        self.current += 1
+        if tags is None:
+            self._cleared = self.current
+        else:
+            for tag in tags:
+                self._tags[tag] = self.current
+
+    def purged_since(self, tags: Iterable[str], generation: int) -> bool:
+        return self._cleared > generation or any(self._tags.get(tag, 0) > generation for tag in tags)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._purged = 0
+        self.generations = PurgeGenerations()
+        self._purge_listeners: List[Callable[[Optional[Set[str]]], object]] = []
+        self._unsubscribe = None
+
+    # ==================== ENTRIES ====================
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Fresh or stale-but-servable entry for key"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.stale_until:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry, generation: Optional[int] = None) -> bool:
+        """
+        Store an entry; with the purge generation read before the response was computed,
+        an entry whose tags were purged meanwhile is stale already and isn't stored
+        """
+        if generation is not None and self.generations.purged_since(entry.tags, generation):
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+        return True
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def purge(self, *tags: str) -> int:
+        """Drop every entry carrying any of the tags; returns the number removed"""
+        keys = set()
+        for tag in tags:
+            keys.update(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        self._purged += len(keys)
+        self.generations.bump(tags)
+        self._notify(set(tags))
+        return len(keys)
+
+    def clear(self) -> int:
+        count = len(self._entries)
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+        self._purged += count
+        self.generations.bump()
+        self._notify(None)
+        return count
+
+    def add_purge_listener(self, callback: Callable[[Optional[Set[str]]], object]):
+        """Call callback(tags) on every purge, or callback(None) when everything is cleared"""
+        self._purge_listeners.append(callback)
+
+    def _notify(self, tags: Optional[Set[str]]):
+        for callback in self._purge_listeners:
+            try:
+                callback(tags)
+            except Exception as e:
+                logger.error(f"Response cache purge listener failed: {e}")
+
+    # ==================== INVALIDATION ====================
+
+    def start(self, change_bus):
+        if self._unsubscribe is None:
+            self._unsubscribe = change_bus.subscribe(self._on_change)
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_change(self, event: ChangeEvent):
+        if event.collection == "blog_posts":
+            self.purge("blog")
+        elif event.collection == "countries":
+            self.purge("countries", *([f"country:{event.key}"] if event.key else []))
+        elif event.key is None:
+            self.clear()
+        else:
+            self.purge(f"channel:{event.key}")
+
+    # ==================== STATS ====================
+
+    def record(self, route: str, outcome: str):
+        """Count a hit, stale hit or miss for a route template"""
+        counts = self._routes.setdefault(route, {"hit": 0, "stale": 0, "miss": 0})
+        counts[outcome] += 1
+
+    def get_stats(self) -> Dict:
+        routes = {}
+        for route, counts in sorted(self._routes.items()):
+            served = counts["hit"] + counts["stale"]
+            total = served + counts["miss"]
+            routes[route] = {**counts, "hit_ratio": round(served / total, 3) if total else 0.0}
+
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "tags": len(self._tags),
+            "purged": self._purged,
+            "routes": routes
+        }
+
+
+# Singleton instance
+_response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def purge_tags(*tags: str) -> int:
+    """Purge hook for jobs that rewrite cached data (rankings, refreshes, growth metrics)"""
+    count = get_response_cache().purge(*tags)
+    if count:
+        logger.info(f"Purged {count} cached responses for tags {', '.join(tags)}")
+    return count
@@ -8,9 +8,19 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from services.discovery_service import get_discovery_service
+from services.refresh_service import get_refresh_service
+from services.response_cache import purge_tags
+from services.count_cache import get_count_cache
+from services.leaderboard_versions import get_leaderboard_versions
+from services.ranking_service import RANK_SORT
 
 logger = logging.getLogger(__name__)
 
+# Channels read per cursor batch (and written per bulk write) by the all-channel jobs
+CHANNEL_BATCH_SIZE = 1000
+
 class SchedulerService:
     def __init__(self, db: AsyncIOMotorDatabase, youtube_service, ranking_service, growth_analyzer):
         self.db = db
@@ -18,9 +28,10 @@ class SchedulerService:
         self.ranking_service = ranking_service
         self.growth_analyzer = growth_analyzer
         self.scheduler = AsyncIOScheduler()
-        self._is_refreshing = False
         self._is_ranking = False
         self._auto_blog_service = None
+        self.discovery_service = get_discovery_service(db, youtube_service)
+        self.refresh_service = get_refresh_service(db, youtube_service, ranking_service)
         
     def start(self):
         """Start the background scheduler with all jobs"""
@@ -37,6 +48,16 @@ class SchedulerService:
             replace_existing=True
         )
         
+        # Job 1b: Refresh titles, descriptions and thumbnails once a day
+        # (the 2-hourly refresh only downloads statistics)
+        self.scheduler.add_job(
+            self.refresh_channel_snippets,
+            trigger=IntervalTrigger(hours=24),
+            id='refresh_snippets',
+            name='Refresh channel titles, descriptions and thumbnails',
+            replace_existing=True
+        )
+        
         # Job 2: Update rankings every 10 minutes
         self.scheduler.add_job(
             self.update_all_rankings,
@@ -93,7 +114,7 @@ class SchedulerService:
         )
         
         self.scheduler.start()
-        logger.info("Background scheduler started with 7 jobs: refresh_channels (2h), update_rankings (10m), calculate_growth (1h), record_stats (2h), daily_blog_post (9am), discover_channels (3h), expand_channels (4h)")
+        logger.info("Background scheduler started with 8 jobs: refresh_channels (2h), refresh_snippets (24h), update_rankings (10m), calculate_growth (1h), record_stats (2h), daily_blog_post (9am), discover_channels (3h), expand_channels (4h)")
     
     async def generate_daily_blog_post(self):
         """Generate the daily ranking blog post"""
@@ -112,80 +133,55 @@ class SchedulerService:
             logger.info("Background scheduler stopped")
     
     async def refresh_all_channels(self):
-        """Refresh all tracked channels from YouTube API"""
-        if self._is_refreshing:
+        """Refresh subscriber/view/video counts for all tracked channels (statistics-only pass)"""
+        if self.refresh_service.is_running():
             logger.warning("Channel refresh already in progress, skipping...")
             return
             
-        self._is_refreshing = True
         logger.info("Starting scheduled channel refresh...")
         
-        try:
-            # Get all active channels
-            channels = await self.db.channels.find(
-                {"is_active": True}, 
-                {"channel_id": 1}
-            ).to_list(1000)
-            
-            if not channels:
-                logger.info("No channels to refresh")
-                return
-                
-            channel_ids = [c["channel_id"] for c in channels]
-            logger.info(f"Refreshing {len(channel_ids)} channels...")
-            
-            # Batch fetch from YouTube API
-            results = await self.youtube_service.get_batch_channel_stats(channel_ids)
-            
-            updated_count = 0
-            for yt_data in results:
-                channel_id = yt_data["channel_id"]
-                
-                # Update channel document
-                update_data = {
-                    "title": yt_data.get("title", ""),
-                    "description": yt_data.get("description", ""),
-                    "thumbnail_url": yt_data.get("thumbnail_url", ""),
-                    "subscriber_count": yt_data.get("subscriber_count", 0),
-                    "view_count": yt_data.get("view_count", 0),
-                    "video_count": yt_data.get("video_count", 0),
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                await self.db.channels.update_one(
-                    {"channel_id": channel_id}, 
-                    {"$set": update_data}
-                )
-                
-                # Store stats snapshot for historical tracking
-                stats_doc = {
-                    "channel_id": channel_id,
-                    "subscriber_count": yt_data.get("subscriber_count", 0),
-                    "view_count": yt_data.get("view_count", 0),
-                    "video_count": yt_data.get("video_count", 0),
-                    "timestamp": datetime.now(timezone.utc).isoformat()
+        # Counts only - snippets are refreshed by refresh_channel_snippets
+        job = await self.refresh_service.run_job(include_snippet=False, trigger="scheduler")
+        if not job or job["status"] != "completed":
+            logger.error(f"Channel refresh failed: {job.get('error') if job else 'already running'}")
+            return
+        
+        result = job["result"]
+        
+        # Update last refresh timestamp
+        await self.db.system_status.update_one(
+            {"_id": "scheduler"},
+            {
+                "$set": {
+                    "last_channel_refresh": datetime.now(timezone.utc).isoformat(),
+                    "channels_refreshed": result["channels"],
+                    "last_refresh_job": job["job_id"]
                 }
-                await self.db.channel_stats.insert_one(stats_doc)
-                updated_count += 1
-            
-            # Update last refresh timestamp
-            await self.db.system_status.update_one(
-                {"_id": "scheduler"},
-                {
-                    "$set": {
-                        "last_channel_refresh": datetime.now(timezone.utc).isoformat(),
-                        "channels_refreshed": updated_count
-                    }
-                },
-                upsert=True
-            )
-            
-            logger.info(f"Channel refresh completed: {updated_count} channels updated")
-            
-        except Exception as e:
-            logger.error(f"Error during channel refresh: {e}")
-        finally:
-            self._is_refreshing = False
+            },
+            upsert=True
+        )
+        
+        logger.info(
+            f"Channel refresh completed: {result['channels']} channels in "
+            f"{len(result['batches'])} batches ({result['seconds']}s)"
+        )
+    
+    async def refresh_channel_snippets(self):
+        """Refresh titles, descriptions and thumbnails for all tracked channels (slow cadence)"""
+        logger.info("Starting channel snippet refresh...")
+        
+        job = await self.refresh_service.run_job(include_snippet=True, trigger="scheduler_snippets")
+        if not job or job["status"] != "completed":
+            logger.error(f"Channel snippet refresh failed: {job.get('error') if job else 'refresh already running'}")
+            return
+        
+        await self.db.system_status.update_one(
+            {"_id": "scheduler"},
+            {"$set": {"last_snippet_refresh": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+        
+        logger.info(f"Channel snippet refresh completed: {job['result']['channels']} channels updated")
     
     async def update_all_rankings(self):
         """Update rankings for all countries and globally"""
@@ -219,6 +215,9 @@ class SchedulerService:
             )
             
             logger.info(f"Ranking update completed for {len(countries)} countries")
+            await get_leaderboard_versions(self.db).record()
+            purge_tags("leaderboard")
+            await get_count_cache(self.db).refresh("channels")
             
         except Exception as e:
             logger.error(f"Error during ranking update: {e}")
@@ -226,54 +225,67 @@ class SchedulerService:
             self._is_ranking = False
     
     async def _update_global_rankings(self):
-        """Update global rankings across all channels"""
+        """Update global rankings across all channels, streamed in rank order and written in bulk batches"""
         # Get all active channels sorted by subscriber count
-        channels = await self.db.channels.find(
+        cursor = self.db.channels.find(
             {"is_active": True},
-            {"channel_id": 1, "current_rank": 1, "subscriber_count": 1}
-        ).sort("subscriber_count", -1).to_list(1000)
+            {"_id": 0, "channel_id": 1, "current_rank": 1}
+        ).sort(RANK_SORT).batch_size(CHANNEL_BATCH_SIZE)
         
-        for idx, channel in enumerate(channels):
-            new_rank = idx + 1
+        ranked = 0
+        updates, history = [], []
+        now = datetime.now(timezone.utc).isoformat()
+        async for channel in cursor:
+            ranked += 1
+            new_rank = ranked
             old_rank = channel.get("current_rank", new_rank)
             
             # Check if rank changed
             if old_rank != new_rank:
                 # Store rank change history
-                rank_change_doc = {
+                history.append({
                     "channel_id": channel["channel_id"],
                     "old_rank": old_rank,
                     "new_rank": new_rank,
                     "change": old_rank - new_rank,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                }
-                await self.db.rank_history.insert_one(rank_change_doc)
+                    "timestamp": now
+                })
             
             # Update channel with new rank
-            await self.db.channels.update_one(
+            updates.append(UpdateOne(
                 {"channel_id": channel["channel_id"]},
                 {
                     "$set": {
                         "previous_rank": old_rank,
-                        "current_rank": new_rank
+                        "current_rank": new_rank,
+                        "rank_updated_at": now
                     }
                 }
-            )
+            ))
+            if len(updates) >= CHANNEL_BATCH_SIZE:
+                await self.ranking_service.write_ranks(updates, history)
+                updates, history = [], []
+        
+        await self.ranking_service.write_ranks(updates, history)
+        return ranked
     
     async def calculate_growth_metrics(self):
         """Calculate growth metrics for all channels"""
         logger.info("Starting growth metrics calculation...")
         
         try:
-            channels = await self.db.channels.find(
+            cursor = self.db.channels.find(
                 {"is_active": True}, 
-                {"channel_id": 1}
-            ).to_list(1000)
+                {"_id": 0, "channel_id": 1}
+            ).batch_size(CHANNEL_BATCH_SIZE)
             
-            for channel in channels:
+            calculated = 0
+            async for channel in cursor:
                 await self.growth_analyzer.update_channel_growth_metrics(channel["channel_id"])
+                calculated += 1
             
-            logger.info(f"Growth metrics calculated for {len(channels)} channels")
+            logger.info(f"Growth metrics calculated for {calculated} channels")
+            purge_tags("leaderboard")
             
         except Exception as e:
             logger.error(f"Error calculating growth metrics: {e}")
@@ -283,24 +295,32 @@ class SchedulerService:
         logger.info("Recording stats snapshot...")
         
         try:
-            # Get all active channels with their current stats
-            channels = await self.db.channels.find(
+            # Stream all active channels with their current stats
+            cursor = self.db.channels.find(
                 {"is_active": True},
-                {"channel_id": 1, "subscriber_count": 1, "view_count": 1, "video_count": 1}
-            ).to_list(1000)
+                {"_id": 0, "channel_id": 1, "subscriber_count": 1, "view_count": 1, "video_count": 1}
+            ).batch_size(CHANNEL_BATCH_SIZE)
             
             timestamp = datetime.now(timezone.utc).isoformat()
+            recorded = 0
+            snapshots = []
             
-            for channel in channels:
-                # Insert a new stats snapshot
-                stats_doc = {
+            async for channel in cursor:
+                # Queue a new stats snapshot; inserted CHANNEL_BATCH_SIZE at a time
+                snapshots.append({
                     "channel_id": channel["channel_id"],
                     "subscriber_count": channel.get("subscriber_count", 0),
                     "view_count": channel.get("view_count", 0),
                     "video_count": channel.get("video_count", 0),
                     "timestamp": timestamp
-                }
-                await self.db.channel_stats.insert_one(stats_doc)
+                })
+                if len(snapshots) >= CHANNEL_BATCH_SIZE:
+                    await self.db.channel_stats.insert_many(snapshots, ordered=False)
+                    recorded += len(snapshots)
+                    snapshots = []
+            if snapshots:
+                await self.db.channel_stats.insert_many(snapshots, ordered=False)
+                recorded += len(snapshots)
             
             # Update system status
             await self.db.system_status.update_one(
@@ -309,7 +329,7 @@ class SchedulerService:
                 upsert=True
             )
             
-            logger.info(f"Stats snapshot recorded for {len(channels)} channels")
+            logger.info(f"Stats snapshot recorded for {recorded} channels")
             
         except Exception as e:
             logger.error(f"Error recording stats snapshot: {e}")
@@ -330,7 +350,7 @@ class SchedulerService:
         
         return {
             "is_running": self.scheduler.running,
-            "is_refreshing": self._is_refreshing,
+            "is_refreshing": self.refresh_service.is_running(),
             "is_ranking": self._is_ranking,
             "jobs": jobs,
             "last_channel_refresh": status.get("last_channel_refresh") if status else None,
@@ -345,71 +365,16 @@ class SchedulerService:
         logger.info("Starting channel discovery for empty countries...")
         
         try:
-            # Get countries with 0 channels
-            countries = await self.db.countries.find({}, {"code": 1, "name": 1}).to_list(300)
-            
-            empty_countries = []
-            for country in countries:
-                count = await self.db.channels.count_documents({"country_code": country["code"]})
-                if count == 0:
-                    empty_countries.append(country)
-            
+            empty_countries = await self.discovery_service.find_countries_by_coverage(0, 0)
             logger.info(f"Found {len(empty_countries)} countries with 0 channels")
             
-            # Process up to 10 countries per run (~1000 API units for search)
-            discovered_total = 0
-            for country in empty_countries[:10]:
-                try:
-                    code = country["code"]
-                    name = country["name"]
-                    
-                    # Search for popular YouTubers from this country
-                    search_queries = [
-                        f"popular YouTubers from {name}",
-                        f"{name} YouTube channel",
-                        f"top YouTubers {name}"
-                    ]
-                    
-                    for query in search_queries[:1]:  # 1 search per country = 100 units
-                        results = await self.youtube_service.search_channels(query, region_code=code, max_results=10)
-                        
-                        for result in results:
-                            channel_id = result.get("channel_id")
-                            if not channel_id:
-                                continue
-                            
-                            # Check if already exists
-                            existing = await self.db.channels.find_one({"channel_id": channel_id})
-                            if existing:
-                                continue
-                            
-                            # Fetch full channel data
-                            yt_data = await self.youtube_service.get_channel_stats(channel_id)
-                            if not yt_data or yt_data.get("subscriber_count", 0) < 1000:
-                                continue
-                            
-                            # Add to database
-                            channel_doc = {
-                                "channel_id": channel_id,
-                                "name": yt_data.get("title", ""),
-                                "description": yt_data.get("description", "")[:500],
-                                "country_code": code,
-                                "subscriber_count": yt_data.get("subscriber_count", 0),
-                                "view_count": yt_data.get("view_count", 0),
-                                "video_count": yt_data.get("video_count", 0),
-                                "thumbnail_url": yt_data.get("thumbnail_url", ""),
-                                "is_active": True,
-                                "created_at": datetime.now(timezone.utc).isoformat(),
-                                "updated_at": datetime.now(timezone.utc).isoformat()
-                            }
-                            
-                            await self.db.channels.insert_one(channel_doc)
-                            discovered_total += 1
-                            logger.info(f"Discovered: {yt_data.get('title')} for {name}")
-                        
-                except Exception as e:
-                    logger.error(f"Error discovering channels for {country.get('name')}: {e}")
-                    continue
+            # Process up to 10 countries per run (1 search per country = ~1000 API units)
+            result = await self.discovery_service.discover(
+                [country for country, _ in empty_countries[:10]],
+                query_fn=lambda country: f"popular YouTubers from {country['name']}",
+                min_subscribers=1000
+            )
+            discovered_total = result["inserted"]
             
             # Update system status
             await self.db.system_status.update_one(
@@ -424,7 +389,7 @@ class SchedulerService:
                 upsert=True
             )
             
-            logger.info(f"Channel discovery completed: {discovered_total} new channels added")
+            logger.info(f"Channel discovery completed: {discovered_total} new channels added ({result})")
             
         except Exception as e:
             logger.error(f"Error during channel discovery: {e}")
@@ -434,73 +399,17 @@ class SchedulerService:
         logger.info("Starting channel expansion for low-coverage countries...")
         
         try:
-            # Get countries with 1-5 channels
-            countries = await self.db.countries.find({}, {"code": 1, "name": 1}).to_list(300)
-            
-            low_coverage = []
-            for country in countries:
-                count = await self.db.channels.count_documents({"country_code": country["code"]})
-                if 1 <= count <= 5:
-                    low_coverage.append((country, count))
-            
-            # Sort by lowest count first
-            low_coverage.sort(key=lambda x: x[1])
-            
+            low_coverage = await self.discovery_service.find_countries_by_coverage(1, 5)
             logger.info(f"Found {len(low_coverage)} countries with 1-5 channels")
             
             # Process up to 15 countries per run (~1500 API units for search)
-            expanded_total = 0
-            for country, current_count in low_coverage[:15]:
-                try:
-                    code = country["code"]
-                    name = country["name"]
-                    
-                    # Search for more channels
-                    results = await self.youtube_service.search_channels(
-                        f"most subscribed YouTubers {name}",
-                        region_code=code,
-                        max_results=10
-                    )
-                    
-                    for result in results:
-                        channel_id = result.get("channel_id")
-                        if not channel_id:
-                            continue
-                        
-                        # Check if already exists
-                        existing = await self.db.channels.find_one({"channel_id": channel_id})
-                        if existing:
-                            continue
-                        
-                        # Fetch full channel data
-                        yt_data = await self.youtube_service.get_channel_stats(channel_id)
-                        if not yt_data or yt_data.get("subscriber_count", 0) < 10000:
-                            continue
-                        
-                        # Add to database
-                        channel_doc = {
-                            "channel_id": channel_id,
-                            "name": yt_data.get("title", ""),
-                            "description": yt_data.get("description", "")[:500],
-                            "country_code": code,
-                            "subscriber_count": yt_data.get("subscriber_count", 0),
-                            "view_count": yt_data.get("view_count", 0),
-                            "video_count": yt_data.get("video_count", 0),
-                            "thumbnail_url": yt_data.get("thumbnail_url", ""),
-                            "is_active": True,
-                            "created_at": datetime.now(timezone.utc).isoformat(),
-                            "updated_at": datetime.now(timezone.utc).isoformat()
-                        }
-                        
-                        await self.db.channels.insert_one(channel_doc)
-                        expanded_total += 1
-                        logger.info(f"Expanded: {yt_data.get('title')} for {name}")
-                        
-                except Exception as e:
-                    logger.error(f"Error expanding channels for {country.get('name')}: {e}")
-                    continue
+            result = await self.discovery_service.discover(
+                [country for country, _ in low_coverage[:15]],
+                query_fn=lambda country: f"most subscribed YouTubers {country['name']}",
+                min_subscribers=10000
+            )
             
-            logger.info(f"Channel expansion completed: {expanded_total} new channels added")
+            logger.info(f"Channel expansion completed: {result['inserted']} new channels added ({result})")
             
         except Exception as e:
             logger.error(f"Error during channel expansion: {e}")
@@ -0,0 +1,331 @@
+"""
+Search Index - In-memory prefix index over tracked channel titles and custom URLs
+
+Titles and custom URLs are folded (diacritics stripped, case-folded) and split into
+words. Words and their suffixes of at least MIN_INFIX_LENGTH characters are kept in
+sorted term lists, so a query token is a bisect range rather than a collection scan.
+Matches rank word-prefix hits first, then by subscriber count. The change bus keeps
+the index current: changed channels are re-read in one $in query per flush.
+"""
+import re
+import time
+import asyncio
+import heapq
+import logging
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+from services.debounced_refresher import DebouncedRefresher
+
+logger = logging.getLogger(__name__)
+
+# Channel fields kept in the index (and returned by autocomplete)
+SEARCH_FIELDS = {"_id": 0, "channel_id": 1, "title": 1, "custom_url": 1, "thumbnail_url": 1,
+                 "subscriber_count": 1, "country_code": 1, "country_name": 1, "is_active": 1}
+
+# Suffixes shorter than this aren't indexed, so 1-2 character queries only match word starts
+MIN_INFIX_LENGTH = 3
+
+# Collect change events for this long before re-reading channels
+FLUSH_DELAY_SECONDS = 0.5
+
+LOAD_BATCH_SIZE = 1000
+
+# Match sets covering more than 1/WALK_DENSITY of channels are ranked by walking the
+# subscriber order instead of heap-selecting over the whole set
+WALK_DENSITY = 32
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def fold(text: Optional[str]) -> str:
+    """Lower-case text with diacritics removed ("Pokémon" -> "pokemon")"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _WORD.findall(fold(text))
+
+
+class _TermIndex:
+    """Postings per term plus the terms in sorted order for prefix ranges"""
+
+    def __init__(self, postings: Optional[Dict[str, Set[str]]] = None):
+        self.postings = postings or {}
+        self.terms = sorted(self.postings)
+
+    def add(self, term: str, channel_id: str):
+        ids = self.postings.get(term)
+        if ids is None:
+            self.postings[term] = ids = set()
+            insort(self.terms, term)
+        ids.add(channel_id)
+
+    def discard(self, term: str, channel_id: str):
+        ids = self.postings.get(term)
+        if ids is None:
+            return
+        ids.discard(channel_id)
+        if not ids:
+            del self.postings[term]
+            del self.terms[bisect_left(self.terms, term)]
+
+    def prefix(self, token: str) -> Set[str]:
+        """Channels with a term starting with token"""
+        lo = bisect_left(self.terms, token)
+        hi = bisect_left(self.terms, token + "\U0010ffff", lo)
+        if hi - lo == 1:
+            return self.postings[self.terms[lo]]
+        ids = set()
+        for term in self.terms[lo:hi]:
+            ids.update(self.postings[term])
+        return ids
+
+
+class SearchIndex:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._channels: Dict[str, Dict] = {}
+        self._subscribers: Dict[str, int] = {}
+        # (-subscriber_count, channel_id) of every channel, ascending: biggest channels first
+        self._ranked: List[Tuple[int, str]] = []
+        self._words: Dict[str, Tuple[str, ...]] = {}
+        self._word_terms = _TermIndex()
+        self._infix_terms = _TermIndex()
+        self._ready = False
+        self._refresher = DebouncedRefresher(self._flush, FLUSH_DELAY_SECONDS, "Search index")
+        self._build_task: Optional[asyncio.Task] = None
+        # Channels flushed while a build reads the collection, re-read once it's swapped in
+        self._flushed_during_build: Optional[Set[str]] = None
+        self._unsubscribe = None
+        self._stats = {"builds": 0, "updates": 0, "queries": 0, "build_seconds": 0.0}
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, ["channels"])
+            self._schedule_build()
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    # ==================== BUILDING ====================
+
+    @staticmethod
+    def _index_words(channel: Dict) -> Tuple[str, ...]:
+        """Title words, the run-together title and custom URL words of a channel"""
+        title_words = tokenize(channel.get("title"))
+        words = title_words + tokenize(channel.get("custom_url"))
+        if len(title_words) > 1:
+            words.append("".join(title_words))
+        return tuple(dict.fromkeys(words))
+
+    @staticmethod
+    def _infixes(words: Tuple[str, ...]) -> Set[str]:
+        """Suffixes of the words (excluding the words themselves) of at least MIN_INFIX_LENGTH characters"""
+        return {word[i:] for word in words for i in range(1, len(word) - MIN_INFIX_LENGTH + 1)}
+
+    def _schedule_build(self):
+        if self._build_task is None or self._build_task.done():
+            self._build_task = asyncio.create_task(self.build())
+
+    async def build(self):
+        """Load every active channel and swap in a freshly built index"""
+        started = time.monotonic()
+        channels, subscribers, words = {}, {}, {}
+        word_postings, infix_postings = {}, {}
+        self._flushed_during_build = set()
+        try:
+            cursor = self.db.channels.find({"is_active": True}, SEARCH_FIELDS).batch_size(LOAD_BATCH_SIZE)
+            async for channel in cursor:
+                channel_id = channel["channel_id"]
+                channels[channel_id] = channel
+                subscribers[channel_id] = channel.get("subscriber_count") or 0
+                words[channel_id] = self._index_words(channel)
+                for word in words[channel_id]:
+                    word_postings.setdefault(word, set()).add(channel_id)
+                for infix in self._infixes(words[channel_id]):
+                    infix_postings.setdefault(infix, set()).add(channel_id)
+        except Exception as e:
+            logger.error(f"Search index build failed: {e}")
+            self._flushed_during_build = None
+            return
+
+        self._channels, self._subscribers, self._words = channels, subscribers, words
+        self._ranked = sorted((-count, channel_id) for channel_id, count in subscribers.items())
+        self._word_terms = _TermIndex(word_postings)
+        self._infix_terms = _TermIndex(infix_postings)
+        self._ready = True
+        # The build may have read these channels before their flush; read them again
+        replay, self._flushed_during_build = self._flushed_during_build, None
+        if replay:
+            self._refresher.add(replay)
+        self._stats["builds"] += 1
+        self._stats["build_seconds"] = round(time.monotonic() - started, 3)
+        logger.info(
+            f"Search index built: {len(channels)} channels, {len(word_postings)} words, "
+            f"{len(infix_postings)} infixes in {self._stats['build_seconds']}s"
+        )
+
+    def _add(self, channel: Dict):
+        channel_id = channel["channel_id"]
+        words = self._index_words(channel)
+        if self._words.get(channel_id) != words:
+            self._remove(channel_id)
+            for word in words:
+                self._word_terms.add(word, channel_id)
+            for infix in self._infixes(words):
+                self._infix_terms.add(infix, channel_id)
+            self._words[channel_id] = words
+        self._channels[channel_id] = channel
+        self._set_subscribers(channel_id, channel.get("subscriber_count") or 0)
+
+    def _remove(self, channel_id: str):
+        words = self._words.pop(channel_id, None)
+        self._channels.pop(channel_id, None)
+        self._set_subscribers(channel_id, None)
+        if words is None:
+            return
+        for word in words:
+            self._word_terms.discard(word, channel_id)
+        for infix in self._infixes(words):
+            self._infix_terms.discard(infix, channel_id)
+
+    def _set_subscribers(self, channel_id: str, count: Optional[int]):
+        """Move a channel within _ranked (count None removes it) without re-sorting the rest"""
+        old = self._subscribers.get(channel_id)
+        if old == count:
+            return
+        if old is not None:
+            del self._ranked[bisect_left(self._ranked, (-old, channel_id))]
+        if count is None:
+            del self._subscribers[channel_id]
+        else:
+            self._subscribers[channel_id] = count
+            insort(self._ranked, (-count, channel_id))
+
+    # ==================== UPDATES ====================
+
+    def _on_change(self, event: ChangeEvent):
+        if event.key is None:
+            self._schedule_build()
+            return
+        if event.touches(*SEARCH_FIELDS):
+            self._refresher.add([event.key])
+
+    async def _flush(self, channel_ids: List[str]):
+        if self._flushed_during_build is not None:
+            self._flushed_during_build.update(channel_ids)
+        found = set()
+        async for channel in self.db.channels.find({"channel_id": {"$in": channel_ids}}, SEARCH_FIELDS):
+            found.add(channel["channel_id"])
+            if channel.get("is_active"):
+                self._add(channel)
+            else:
+                self._remove(channel["channel_id"])
+        for channel_id in set(channel_ids) - found:
+            self._remove(channel_id)
+        self._stats["updates"] += len(channel_ids)
+
+    # ==================== QUERIES ====================
+
+    def _hit(self, channel_id: str, token: str) -> int:
+        """2 if a word of the channel starts with token, 1 if it occurs inside one, else 0"""
+        words = self._words[channel_id]
+        if any(word.startswith(token) for word in words):
+            return 2
+        if len(token) >= MIN_INFIX_LENGTH and any(token in word for word in words):
+            return 1
+        return 0
+
+    def _candidates(self, tokens: List[str], infix: bool, country_code: Optional[str]):
+        """
+        (ids matched by the longest token's postings, filter for the remaining tokens and
+        country); other tokens are checked against each candidate's words.
+        """
+        first, rest = tokens[0], tokens[1:]
+        ids = self._word_terms.prefix(first)
+        if infix and len(first) >= MIN_INFIX_LENGTH:
+            ids = ids | self._infix_terms.prefix(first)
+        minimum = 1 if infix else 2
+
+        def accept(cid: str) -> bool:
+            if country_code and self._channels[cid].get("country_code") != country_code:
+                return False
+            return all(self._hit(cid, t) >= minimum for t in rest)
+        return ids, accept
+
+    def _top_by_subscribers(self, ids: Set[str], accept, limit: int) -> List[str]:
+        if len(ids) * WALK_DENSITY > len(self._ranked):
+            # Common prefix: walking channels biggest-first finds k matches within a few steps
+            top = []
+            for _, cid in self._ranked:
+                if cid in ids and accept(cid):
+                    top.append(cid)
+                    if len(top) == limit:
+                        break
+            return top
+        return heapq.nlargest(limit, filter(accept, ids), key=self._subscribers.__getitem__)
+
+    @staticmethod
+    def _tokens(query: str) -> List[str]:
+        """Distinct query tokens, longest (most selective) first"""
+        return sorted(dict.fromkeys(tokenize(query)), key=len, reverse=True)
+
+    def sort_key(self, channel_id: str) -> Tuple[int, str]:
+        """Order of match() results: subscriber count descending, then channel id"""
+        return -self._subscribers.get(channel_id, 0), channel_id
+
+    def match(self, query: str, country_code: Optional[str] = None) -> List[str]:
+        """Ids of every channel matching all query tokens, in sort_key order"""
+        tokens = self._tokens(query)
+        if not tokens:
+            return []
+        self._stats["queries"] += 1
+        ids, accept = self._candidates(tokens, True, country_code)
+        return sorted(filter(accept, ids), key=self.sort_key)
+
+    def autocomplete(self, query: str, limit: int = 8, country_code: Optional[str] = None) -> List[Dict]:
+        """Top matches; channels where a word starts with every token rank above infix hits"""
+        tokens = self._tokens(query)
+        if not tokens:
+            return []
+        self._stats["queries"] += 1
+
+        # Enough channels match every token at a word start: infix hits can't make the top k
+        top = self._top_by_subscribers(*self._candidates(tokens, False, country_code), limit)
+        if len(top) < limit:
+            def score(cid):
+                return sum(self._hit(cid, t) for t in tokens), self._subscribers[cid]
+
+            ids, accept = self._candidates(tokens, True, country_code)
+            top = heapq.nlargest(limit, filter(accept, ids), key=score)
+
+        return [{k: v for k, v in self._channels[cid].items() if k != "is_active"} for cid in top]
+
+    def get_stats(self) -> Dict:
+        return {
+            "ready": self._ready,
+            "channels": len(self._channels),
+            "words": len(self._word_terms.terms),
+            "infixes": len(self._infix_terms.terms),
+            **self._stats
+        }
+
+
+# Singleton instance
+_search_index = None
+
+def get_search_index(db: AsyncIOMotorDatabase) -> SearchIndex:
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex(db)
+    return _search_index
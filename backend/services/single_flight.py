@@ -0,0 +1,79 @@
+"""
+Single Flight - Coalesce concurrent identical calls into one in-flight awaitable
+
+While a call for a key is running, further callers with the same key await the same
+task instead of starting their own query. Results are shared between callers, so
+they must be treated as read-only.
+"""
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs), joining a call already in flight for key"""
+        self._stats["calls"] += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+            self._stats["executions"] += 1
+        else:
+            self._stats["coalesced"] += 1
+
+        # Shielded so one caller disconnecting doesn't cancel the query for the others
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["errors"] += 1
+
+    def get_stats(self) -> Dict:
+        calls = self._stats["calls"]
+        return {
+            **self._stats,
+            "in_flight": len(self._calls),
+            "coalesced_ratio": round(self._stats["coalesced"] / calls, 3) if calls else 0.0
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+def get_single_flight(name: str) -> SingleFlight:
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+
+def single_flight(name: str, method: bool = True):
+    """
+    Decorator coalescing concurrent calls with equal arguments.
+
+    Keys ignore the instance for methods (method=True): services are created per module,
+    so calls from different instances of the same service are coalesced too.
+    """
+    group = get_single_flight(name)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key_args = args[1:] if method else args
+            return await group.do((key_args, tuple(sorted(kwargs.items()))), fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_single_flight_stats() -> Dict[str, Dict]:
+    return {name: group.get_stats() for name, group in sorted(_groups.items())}
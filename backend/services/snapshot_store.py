@@ -0,0 +1,173 @@
+"""
+Snapshot Store - Pre-compressed response bodies for large, frequently read endpoints
+
+A snapshot keeps the raw body plus gzip and (when the brotli package is installed)
+brotli variants, compressed once per rebuild off the event loop. Endpoints pick the
+variant from Accept-Encoding themselves and send it with Content-Encoding set, which
+the gzip middleware passes through untouched.
+"""
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from services.response_cache import PurgeGenerations, get_response_cache
+from services.single_flight import get_single_flight
+
+try:
+    import brotli
+except ImportError:  # brotli variants are optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MAX_SNAPSHOTS = 64
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+class Snapshot:
+    __slots__ = ("raw", "variants", "etag", "media_type", "tags", "created", "expires")
+
+    def __init__(self, raw: bytes, media_type: str, ttl: float, tags: Iterable[str]):
+        self.raw = raw
+        self.variants = {"gzip": gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(raw, quality=BROTLI_QUALITY)
+        self.etag = hashlib.sha1(raw).hexdigest()[:16]
+        self.media_type = media_type
+        self.tags = set(tags)
+        self.created = time.time()
+        self.expires = self.created + ttl
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """Best of br/gzip the client accepts (q > 0) and we have, else None for identity"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class SnapshotStore:
+    def __init__(self, max_snapshots: int = MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._generations = PurgeGenerations()
+        self._flight = get_single_flight("snapshots")
+        self._stats = {"hits": 0, "builds": 0, "not_modified": 0, "served": {"br": 0, "gzip": 0, "identity": 0}}
+        # Purging a tag in the response cache drops snapshots with the same tag
+        get_response_cache().add_purge_listener(self.purge)
+
+    async def get(self, name: str, build: Callable[[], Awaitable[bytes]], media_type: str,
+                  ttl: float, tags: Iterable[str] = ()) -> Snapshot:
+        """Current snapshot for name, rebuilt (once, however many callers wait) when missing or expired"""
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None and time.time() < snapshot.expires:
+            self._snapshots.move_to_end(name)
+            self._stats["hits"] += 1
+            return snapshot
+        return await self._flight.do(name, self._build, name, build, media_type, ttl, tuple(tags))
+
+    async def get_json(self, name: str, build: Callable[[], Awaitable[Any]], ttl: float, tags: Iterable[str] = ()) -> Snapshot:
+        """Snapshot of a JSON document, encoded the way FastAPI's JSONResponse would"""
+        async def build_bytes() -> bytes:
+            content = jsonable_encoder(await build())
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        return await self.get(name, build_bytes, "application/json", ttl, tags)
+
+    async def _build(self, name: str, build, media_type: str, ttl: float, tags: tuple) -> Snapshot:
+        started = time.monotonic()
+        generation = self._generations.current
+        raw = await build()
+        # Compression at high levels takes tens of ms on large bodies; keep it off the loop
+        snapshot = await asyncio.to_thread(Snapshot, raw, media_type, ttl, tags)
+
+        # Data read before a purge of these tags is served to the waiting callers only
+        if self._generations.purged_since(tags, generation):
+            logger.info(f"Snapshot {name} was purged while building; not stored")
+            return snapshot
+
+        self._snapshots[name] = snapshot
+        self._snapshots.move_to_end(name)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        self._stats["builds"] += 1
+
+        sizes = ", ".join(f"{k} {len(v):,}" for k, v in snapshot.variants.items())
+        logger.info(f"Built snapshot {name}: raw {len(raw):,}, {sizes} bytes in {time.monotonic() - started:.2f}s")
+        return snapshot
+
+    def purge(self, tags: Optional[Iterable[str]] = None) -> int:
+        """Drop snapshots carrying any of the tags (all of them when tags is None)"""
+        tags = None if tags is None else set(tags)
+        self._generations.bump(tags)
+        if tags is None:
+            names = list(self._snapshots)
+        else:
+            names = [name for name, snap in self._snapshots.items() if snap.tags & tags]
+        for name in names:
+            del self._snapshots[name]
+        return len(names)
+
+    def response(self, snapshot: Snapshot, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Response for the encoding the client prefers, or 304 when its ETag matches"""
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), snapshot.variants)
+        etag = f'"{snapshot.etag}-{encoding or "identity"}"'
+        response_headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Last-Modified": formatdate(snapshot.created, usegmt=True),
+            **(headers or {})
+        }
+
+        if etag in request.headers.get("if-none-match", ""):
+            self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=response_headers)
+
+        self._stats["served"][encoding or "identity"] += 1
+        if encoding is None:
+            return Response(content=snapshot.raw, media_type=snapshot.media_type, headers=response_headers)
+        response_headers["Content-Encoding"] = encoding
+        return Response(content=snapshot.variants[encoding], media_type=snapshot.media_type, headers=response_headers)
+
+    def get_stats(self) -> Dict:
+        return {
+            "brotli_supported": brotli is not None,
+            "snapshots": {
+                name: {
+                    "raw": len(snap.raw),
+                    **{coding: len(body) for coding, body in snap.variants.items()},
+                    "age_seconds": int(time.time() - snap.created)
+                }
+                for name, snap in self._snapshots.items()
+            },
+            **self._stats
+        }
+
+
+# Singleton instance
+_snapshot_store = None
+
+def get_snapshot_store() -> SnapshotStore:
+    global _snapshot_store
+    if _snapshot_store is None:
+        _snapshot_store = SnapshotStore()
+    return _snapshot_store
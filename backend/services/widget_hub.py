@@ -0,0 +1,126 @@
+"""
+Widget Hub - One broadcast hub per process for live subscriber count widgets
+
+Open widget streams register the channel ids they show. When the change bus reports
+that subscribed channels changed, the hub re-reads all of them with a single $in query
+and pushes an update only to streams whose channel's subscriber count actually moved.
+"""
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Set
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+from services.debounced_refresher import DebouncedRefresher
+
+logger = logging.getLogger(__name__)
+
+# Fields shown by widgets; changes to anything else are ignored
+WIDGET_FIELDS = {"_id": 0, "channel_id": 1, "title": 1, "subscriber_count": 1,
+                 "daily_subscriber_gain": 1, "thumbnail_url": 1, "updated_at": 1}
+
+# Collect change events for this long before reading, so a bulk refresh is one read
+FLUSH_DELAY_SECONDS = 0.5
+
+# Updates buffered per stream before the oldest is dropped (slow clients)
+STREAM_QUEUE_SIZE = 16
+
+
+class WidgetHub:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._streams: Dict[str, Set[asyncio.Queue]] = {}
+        self._latest: Dict[str, Dict] = {}
+        self._refresher = DebouncedRefresher(self._flush, FLUSH_DELAY_SECONDS, "Widget hub")
+        self._unsubscribe = None
+        self._stats = {"db_reads": 0, "updates_pushed": 0, "updates_dropped": 0}
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, ["channels"])
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    # ==================== STREAMS ====================
+
+    async def open_stream(self, channel_ids: Iterable[str]) -> asyncio.Queue:
+        """Register a stream for the given channels; the queue starts with their current data"""
+        channel_ids = list(dict.fromkeys(channel_ids))
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        for channel_id in channel_ids:
+            self._streams.setdefault(channel_id, set()).add(queue)
+
+        missing = [cid for cid in channel_ids if cid not in self._latest]
+        if missing:
+            await self._load(missing)
+        for channel_id in channel_ids:
+            if channel_id in self._latest:
+                self._put(queue, self._latest[channel_id])
+        return queue
+
+    def close_stream(self, channel_ids: Iterable[str], queue: asyncio.Queue):
+        for channel_id in channel_ids:
+            queues = self._streams.get(channel_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self._streams[channel_id]
+                self._latest.pop(channel_id, None)
+
+    def _put(self, queue: asyncio.Queue, payload: Dict):
+        if queue.full():
+            queue.get_nowait()
+            self._stats["updates_dropped"] += 1
+        queue.put_nowait(payload)
+
+    # ==================== UPDATES ====================
+
+    def _on_change(self, event: ChangeEvent):
+        if event.key is None:
+            self._refresher.add(self._streams)
+        elif event.key in self._streams and event.touches(*WIDGET_FIELDS):
+            self._refresher.add([event.key])
+
+    async def _flush(self, channel_ids: List[str]):
+        channel_ids = [cid for cid in channel_ids if cid in self._streams]
+        if not channel_ids:
+            return
+
+        previous = {cid: self._latest.get(cid) for cid in channel_ids}
+        await self._load(channel_ids)
+
+        for channel_id in channel_ids:
+            payload = self._latest.get(channel_id)
+            old = previous[channel_id]
+            if payload is None or (old and old.get("subscriber_count") == payload.get("subscriber_count")):
+                continue
+            for queue in self._streams.get(channel_id, ()):
+                self._put(queue, payload)
+                self._stats["updates_pushed"] += 1
+
+    async def _load(self, channel_ids: List[str]):
+        self._stats["db_reads"] += 1
+        cursor = self.db.channels.find({"channel_id": {"$in": channel_ids}}, WIDGET_FIELDS)
+        async for channel in cursor:
+            if channel["channel_id"] in self._streams:
+                self._latest[channel["channel_id"]] = channel
+
+    def get_stats(self) -> Dict:
+        return {
+            "streams": len({id(q) for queues in self._streams.values() for q in queues}),
+            "channels": len(self._streams),
+            **self._stats
+        }
+
+
+# Singleton instance
+_widget_hub = None
+
+def get_widget_hub(db: AsyncIOMotorDatabase) -> WidgetHub:
+    global _widget_hub
+    if _widget_hub is None:
+        _widget_hub = WidgetHub(db)
+    return _widget_hub
@@ -0,0 +1,163 @@
+"""
+Widget Renderer - Pre-rendered, cached widget HTML keyed by channel data version
+"""
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.change_bus import ChangeEvent, get_change_bus
+from services.content_hash import content_hash
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+# Channel fields a widget can show; the data version is a hash of these
+WIDGET_DATA_FIELDS = {"_id": 0, "channel_id": 1, "title": 1, "subscriber_count": 1,
+                      "daily_subscriber_gain": 1, "thumbnail_url": 1}
+
+MAX_RENDERED_WIDGETS = 5000
+
+WIDGET_THEMES = {
+    "dark": {
+        "bg": "#0a0a0a",
+        "text": "#ffffff",
+        "subtext": "#9ca3af",
+        "accent": "#ef4444",
+        "border": "#333333"
+    },
+    "light": {
+        "bg": "#ffffff",
+        "text": "#111827",
+        "subtext": "#6b7280",
+        "accent": "#dc2626",
+        "border": "#e5e7eb"
+    },
+    "transparent": {
+        "bg": "transparent",
+        "text": "#ffffff",
+        "subtext": "#9ca3af",
+        "accent": "#ef4444",
+        "border": "transparent"
+    }
+}
+
+WIDGET_SIZES = {
+    "small": {"width": 280, "height": 70, "font_size": 18, "thumbnail": 36, "padding": 12},
+    "medium": {"width": 360, "height": 90, "font_size": 24, "thumbnail": 48, "padding": 16},
+    "large": {"width": 450, "height": 120, "font_size": 32, "thumbnail": 64, "padding": 20}
+}
+
+
+class WidgetRenderer:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.env = Environment(
+            loader=FileSystemLoader(str(TEMPLATES_DIR)),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False
+        )
+        # Compile once at startup rather than on first request
+        self.live_template = self.env.get_template("widgets/live.html")
+
+        self._channels: Dict[str, Tuple[str, Dict]] = {}
+        self._rendered: "OrderedDict[tuple, Tuple[str, str]]" = OrderedDict()
+        self._unsubscribe = None
+        self._stats = {"hits": 0, "renders": 0, "invalidations": 0}
+
+    def start(self):
+        if self._unsubscribe is None:
+            self._unsubscribe = get_change_bus(self.db).subscribe(self._on_change, ["channels"])
+
+    def stop(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_change(self, event: ChangeEvent):
+        if event.key is None:
+            self._channels.clear()
+            self._rendered.clear()
+            self._stats["invalidations"] += 1
+        elif event.key in self._channels and event.touches(*WIDGET_DATA_FIELDS):
+            del self._channels[event.key]
+            for cache_key in [k for k in self._rendered if k[0] == event.key]:
+                del self._rendered[cache_key]
+            self._stats["invalidations"] += 1
+
+    async def get_channel(self, channel_id: str) -> Optional[Tuple[str, Dict]]:
+        """(data version, widget fields) for a channel, read from Mongo only after an invalidation"""
+        cached = self._channels.get(channel_id)
+        if cached:
+            return cached
+
+        channel = await self.db.channels.find_one({"channel_id": channel_id}, WIDGET_DATA_FIELDS)
+        if not channel:
+            return None
+        cached = (content_hash(channel), channel)
+        self._channels[channel_id] = cached
+        return cached
+
+    async def render_live(
+        self,
+        channel_id: str,
+        theme: str,
+        size: str,
+        show_name: bool,
+        show_thumbnail: bool,
+        show_growth: bool,
+        animate: bool
+    ) -> Optional[Tuple[str, str]]:
+        """(etag, html) of the live widget, or None if the channel doesn't exist"""
+        data = await self.get_channel(channel_id)
+        if data is None:
+            return None
+        version, channel = data
+
+        theme = theme if theme in WIDGET_THEMES else "dark"
+        size = size if size in WIDGET_SIZES else "medium"
+        cache_key = (channel_id, theme, size, show_name, show_thumbnail, show_growth, animate, version)
+
+        rendered = self._rendered.get(cache_key)
+        if rendered:
+            self._rendered.move_to_end(cache_key)
+            self._stats["hits"] += 1
+            return rendered
+
+        html = self.live_template.render(
+            channel=channel,
+            colors=WIDGET_THEMES[theme],
+            s=WIDGET_SIZES[size],
+            subs=channel.get("subscriber_count", 0),
+            growth=channel.get("daily_subscriber_gain", 0) or 0,
+            show_name=show_name,
+            show_thumbnail=show_thumbnail,
+            show_growth=show_growth,
+            animate=animate,
+            data_url=f"/api/widgets/data/{quote(channel_id)}",
+            stream_url=f"/api/widgets/stream?channels={quote(channel_id)}"
+        )
+        flags = "".join("1" if f else "0" for f in (show_name, show_thumbnail, show_growth, animate))
+        rendered = (f'"{version}-{theme}-{size}-{flags}"', html)
+
+        self._rendered[cache_key] = rendered
+        if len(self._rendered) > MAX_RENDERED_WIDGETS:
+            self._rendered.popitem(last=False)
+        self._stats["renders"] += 1
+        return rendered
+
+    def get_stats(self) -> Dict:
+        return {"channels": len(self._channels), "rendered": len(self._rendered), **self._stats}
+
+
+# Singleton instance
+_widget_renderer = None
+
+def get_widget_renderer(db: AsyncIOMotorDatabase) -> WidgetRenderer:
+    global _widget_renderer
+    if _widget_renderer is None:
+        _widget_renderer = WidgetRenderer(db)
+    return _widget_renderer
@@ -2,30 +2,140 @@
 YouTube Service - Handles all YouTube Data API v3 interactions using direct HTTP requests
 """
 import os
+import json
+import asyncio
 import logging
 import aiohttp
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
+from services.api_key_pool import ApiKeyPool, load_api_key_pool
 
 logger = logging.getLogger(__name__)
 
-YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
+# Point at the local emulator (python -m emulator.youtube_api) for offline work
+YOUTUBE_API_BASE = os.environ.get('YOUTUBE_API_BASE', "https://www.googleapis.com/youtube/v3").rstrip('/')
+
+# Quota cost in units per request for each endpoint we call
+QUOTA_COSTS = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "search": 100
+}
+
+# `fields` masks per call site - only download what we actually store
+CHANNEL_STATISTICS_FIELDS = "statistics(subscriberCount,viewCount,videoCount,hiddenSubscriberCount)"
+CHANNEL_SNIPPET_FIELDS = "snippet(title,description,customUrl,country,publishedAt,thumbnails/high/url)"
+FIELDS_CHANNEL_FULL = f"etag,items(id,{CHANNEL_SNIPPET_FIELDS},{CHANNEL_STATISTICS_FIELDS})"
+FIELDS_CHANNEL_STATISTICS = f"etag,items(id,{CHANNEL_STATISTICS_FIELDS})"
+FIELDS_UPLOADS_PLAYLIST = "etag,items/contentDetails/relatedPlaylists/uploads"
+FIELDS_PLAYLIST_VIDEO_IDS = "etag,items/contentDetails/videoId"
+FIELDS_VIDEOS = "etag,items(id,snippet(title,description,publishedAt,thumbnails/medium/url),statistics(viewCount,likeCount,commentCount))"
+FIELDS_SEARCH_CHANNELS = "items(id/channelId,snippet(title,description,thumbnails/default/url))"
+
+# Upper bound on remembered ETags (one per distinct request)
+MAX_ETAGS = 5000
+
+# Retries for transient 5xx responses (backendError), with exponential backoff
+MAX_SERVER_ERROR_RETRIES = 2
+
+
+class YouTubeAPIError(Exception):
+    """Non-200 response from the YouTube Data API"""
+    def __init__(self, status: int, error_text: str = "", message: Optional[str] = None):
+        super().__init__(message or f"YouTube API error: {status}")
+        self.status = status
+        self.error_text = error_text
+
+
+class YouTubeQuotaExceeded(YouTubeAPIError):
+    """Every key in the pool is out of quota for today"""
+    def __init__(self, error_text: str = ""):
+        super().__init__(403, error_text, "YouTube API quota exceeded")
+
 
 class YouTubeService:
     def __init__(self):
-        self._api_key = None
+        self._key_pool = None
         self._cache = {}
         self._cache_ttl = 300  # 5 minutes cache
+        self._etags = {}
+        self._transfer_stats = {"requests": 0, "not_modified": 0, "bytes_received": 0}
     
     @property
-    def api_key(self):
-        # Load API key fresh each time to handle env updates
-        if self._api_key is None:
+    def key_pool(self) -> ApiKeyPool:
+        # Load API keys lazily so env updates before first use are picked up
+        if self._key_pool is None:
             from dotenv import load_dotenv
             from pathlib import Path
             load_dotenv(Path(__file__).parent.parent / '.env')
-            self._api_key = os.environ.get('YOUTUBE_API_KEY')
-        return self._api_key
+            self._key_pool = load_api_key_pool()
+        return self._key_pool
+    
+    def get_quota_usage(self) -> Dict:
+        """Per-key quota usage for the current quota day"""
+        return {**self.key_pool.get_usage(), "transfer": self.get_transfer_stats()}
+    
+    def get_transfer_stats(self) -> Dict:
+        """Requests made, 304 responses and response bytes received since startup"""
+        return dict(self._transfer_stats)
+    
+    def _remember_etag(self, resource_key: str, etag: str, data: Dict):
+        if resource_key not in self._etags and len(self._etags) >= MAX_ETAGS:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._etags.pop(next(iter(self._etags)))
+        self._etags[resource_key] = {"etag": etag, "data": data}
+    
+    async def _api_get(self, endpoint: str, params: Dict, conditional: bool = False) -> Dict:
+        """
+        GET a YouTube Data API endpoint using the key with the most remaining quota.
+        Keys that report quotaExceeded are marked exhausted and the request is retried on the next key.
+        With `conditional`, the last ETag for this exact request is sent as If-None-Match and
+        a 304 response returns the previously downloaded payload.
+        """
+        cost = QUOTA_COSTS.get(endpoint, 1)
+        url = f"{YOUTUBE_API_BASE}/{endpoint}"
+        resource_key = f"{endpoint}?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+        known = self._etags.get(resource_key) if conditional else None
+        headers = {"If-None-Match": known["etag"]} if known else {}
+        server_errors = 0
+        
+        while True:
+            api_key = self.key_pool.acquire(cost)
+            if api_key is None:
+                raise YouTubeQuotaExceeded("All YouTube API keys are out of quota")
+            
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, params={**params, "key": api_key}, headers=headers) as response:
+                    body = await response.read()
+                    self._transfer_stats["requests"] += 1
+                    self._transfer_stats["bytes_received"] += len(body)
+                    
+                    if response.status == 304 and known:
+                        self._transfer_stats["not_modified"] += 1
+                        return known["data"]
+                    
+                    if response.status == 200:
+                        data = json.loads(body)
+                        etag = response.headers.get("ETag") or data.get("etag")
+                        if conditional and etag:
+                            self._remember_etag(resource_key, etag, data)
+                        return data
+                    
+                    error_text = body.decode("utf-8", errors="replace")
+            
+            if "quotaExceeded" in error_text or "dailyLimitExceeded" in error_text:
+                self.key_pool.mark_exhausted(api_key)
+                continue
+            
+            if response.status >= 500 and server_errors < MAX_SERVER_ERROR_RETRIES:
+                server_errors += 1
+                logger.warning(f"YouTube API {response.status} on {endpoint}, retry {server_errors}/{MAX_SERVER_ERROR_RETRIES}")
+                await asyncio.sleep(0.5 * 2 ** server_errors)
+                continue
+            
+            logger.error(f"YouTube API error on {endpoint}: {response.status} - {error_text}")
+            raise YouTubeAPIError(response.status, error_text)
     
     def _get_cache_key(self, prefix: str, identifier: str) -> str:
         return f"{prefix}:{identifier}"
@@ -50,6 +160,31 @@ class YouTubeService:
             return self._cache[cache_key]['data']
         return None
 
+    @staticmethod
+    def _parse_channel_item(item: Dict, include_snippet: bool = True) -> Dict:
+        stats = item.get("statistics", {})
+        channel_data = {
+            "channel_id": item["id"],
+            "subscriber_count": int(stats.get("subscriberCount", 0)),
+            "view_count": int(stats.get("viewCount", 0)),
+            "video_count": int(stats.get("videoCount", 0)),
+            "hidden_subscriber_count": stats.get("hiddenSubscriberCount", False),
+            "fetched_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+        if include_snippet:
+            snippet = item.get("snippet", {})
+            channel_data.update({
+                "title": snippet.get("title", ""),
+                "description": snippet.get("description", ""),
+                "custom_url": snippet.get("customUrl", ""),
+                "country": snippet.get("country", ""),
+                "published_at": snippet.get("publishedAt", ""),
+                "thumbnail_url": snippet.get("thumbnails", {}).get("high", {}).get("url", "")
+            })
+        
+        return channel_data
+
     async def get_channel_stats(self, channel_id: str) -> Optional[Dict]:
         """Fetch channel statistics from YouTube API"""
         cache_key = self._get_cache_key('channel_stats', channel_id)
@@ -59,46 +194,18 @@ class YouTubeService:
             return cached
         
         try:
-            url = f"{YOUTUBE_API_BASE}/channels"
-            params = {
-                "key": self.api_key,
-                "part": "statistics,snippet,contentDetails",
-                "id": channel_id
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"YouTube API error: {response.status} - {error_text}")
-                        if "quotaExceeded" in error_text:
-                            raise Exception("YouTube API quota exceeded")
-                        raise Exception(f"YouTube API error: {response.status}")
-                    
-                    data = await response.json()
+            data = await self._api_get("channels", {
+                "part": "statistics,snippet",
+                "id": channel_id,
+                "fields": FIELDS_CHANNEL_FULL
+            }, conditional=True)
             
             if not data.get("items"):
                 logger.warning(f"Channel not found: {channel_id}")
                 return None
             
-            item = data["items"][0]
-            stats = item.get("statistics", {})
-            snippet = item.get("snippet", {})
-            
-            channel_data = {
-                "channel_id": channel_id,
-                "title": snippet.get("title", ""),
-                "description": snippet.get("description", ""),
-                "custom_url": snippet.get("customUrl", ""),
-                "country": snippet.get("country", ""),
-                "published_at": snippet.get("publishedAt", ""),
-                "thumbnail_url": snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
-                "subscriber_count": int(stats.get("subscriberCount", 0)),
-                "view_count": int(stats.get("viewCount", 0)),
-                "video_count": int(stats.get("videoCount", 0)),
-                "hidden_subscriber_count": stats.get("hiddenSubscriberCount", False),
-                "fetched_at": datetime.now(timezone.utc).isoformat()
-            }
+            channel_data = self._parse_channel_item(data["items"][0])
+            channel_data["channel_id"] = channel_id
             
             self._set_cache(cache_key, channel_data)
             return channel_data
@@ -110,10 +217,17 @@ class YouTubeService:
             logger.error(f"Error fetching channel stats: {str(e)}")
             raise
 
-    async def get_batch_channel_stats(self, channel_ids: List[str]) -> List[Dict]:
-        """Fetch multiple channel statistics in batch (up to 50 per request)"""
+    async def get_batch_channel_stats(self, channel_ids: List[str], include_snippet: bool = True) -> List[Dict]:
+        """
+        Fetch multiple channel statistics in batch (up to 50 per request).
+        With include_snippet=False only counts are requested - the cheap pass used by the
+        scheduled refresh. Chunks are sent with If-None-Match so unchanged batches return 304.
+        """
         results = []
         chunk_size = 50
+        cache_prefix = 'channel_stats' if include_snippet else 'channel_counts'
+        part = "statistics,snippet" if include_snippet else "statistics"
+        fields = FIELDS_CHANNEL_FULL if include_snippet else FIELDS_CHANNEL_STATISTICS
         
         for i in range(0, len(channel_ids), chunk_size):
             chunk = channel_ids[i:i + chunk_size]
@@ -123,7 +237,7 @@ class YouTubeService:
             uncached_ids = []
             
             for cid in chunk:
-                cache_key = self._get_cache_key('channel_stats', cid)
+                cache_key = self._get_cache_key(cache_prefix, cid)
                 cached = self._get_cached(cache_key)
                 if cached:
                     cached_results.append(cached)
@@ -136,42 +250,16 @@ class YouTubeService:
                 continue
             
             try:
-                url = f"{YOUTUBE_API_BASE}/channels"
-                params = {
-                    "key": self.api_key,
-                    "part": "statistics,snippet",
-                    "id": ",".join(uncached_ids)
-                }
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, params=params) as response:
-                        if response.status != 200:
-                            error_text = await response.text()
-                            logger.error(f"YouTube API batch error: {error_text}")
-                            continue
-                        
-                        data = await response.json()
+                data = await self._api_get("channels", {
+                    "part": part,
+                    "id": ",".join(uncached_ids),
+                    "fields": fields
+                }, conditional=True)
                 
                 for item in data.get("items", []):
-                    stats = item.get("statistics", {})
-                    snippet = item.get("snippet", {})
+                    channel_data = self._parse_channel_item(item, include_snippet)
                     
-                    channel_data = {
-                        "channel_id": item["id"],
-                        "title": snippet.get("title", ""),
-                        "description": snippet.get("description", ""),
-                        "custom_url": snippet.get("customUrl", ""),
-                        "country": snippet.get("country", ""),
-                        "published_at": snippet.get("publishedAt", ""),
-                        "thumbnail_url": snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
-                        "subscriber_count": int(stats.get("subscriberCount", 0)),
-                        "view_count": int(stats.get("viewCount", 0)),
-                        "video_count": int(stats.get("videoCount", 0)),
-                        "hidden_subscriber_count": stats.get("hiddenSubscriberCount", False),
-                        "fetched_at": datetime.now(timezone.utc).isoformat()
-                    }
-                    
-                    cache_key = self._get_cache_key('channel_stats', item["id"])
+                    cache_key = self._get_cache_key(cache_prefix, item["id"])
                     self._set_cache(cache_key, channel_data)
                     results.append(channel_data)
                     
@@ -190,18 +278,11 @@ class YouTubeService:
         
         try:
             # First get the uploads playlist ID
-            url = f"{YOUTUBE_API_BASE}/channels"
-            params = {
-                "key": self.api_key,
+            channel_data = await self._api_get("channels", {
                 "part": "contentDetails",
-                "id": channel_id
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        return []
-                    channel_data = await response.json()
+                "id": channel_id,
+                "fields": FIELDS_UPLOADS_PLAYLIST
+            }, conditional=True)
             
             if not channel_data.get("items"):
                 return []
@@ -209,19 +290,12 @@ class YouTubeService:
             uploads_playlist_id = channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
             
             # Get videos from uploads playlist
-            url = f"{YOUTUBE_API_BASE}/playlistItems"
-            params = {
-                "key": self.api_key,
+            playlist_data = await self._api_get("playlistItems", {
                 "part": "contentDetails",
                 "playlistId": uploads_playlist_id,
-                "maxResults": 50
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        return []
-                    playlist_data = await response.json()
+                "maxResults": 50,
+                "fields": FIELDS_PLAYLIST_VIDEO_IDS
+            }, conditional=True)
             
             video_ids = [item["contentDetails"]["videoId"] for item in playlist_data.get("items", [])]
             
@@ -229,18 +303,11 @@ class YouTubeService:
                 return []
             
             # Get video statistics
-            url = f"{YOUTUBE_API_BASE}/videos"
-            params = {
-                "key": self.api_key,
+            videos_data = await self._api_get("videos", {
                 "part": "snippet,statistics",
-                "id": ",".join(video_ids[:50])
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        return []
-                    videos_data = await response.json()
+                "id": ",".join(video_ids[:50]),
+                "fields": FIELDS_VIDEOS
+            }, conditional=True)
             
             videos = []
             for item in videos_data.get("items", []):
@@ -272,26 +339,18 @@ class YouTubeService:
     async def search_channels(self, query: str, region_code: str = "", max_results: int = 10) -> List[Dict]:
         """Search for channels"""
         try:
-            url = f"{YOUTUBE_API_BASE}/search"
             params = {
-                "key": self.api_key,
                 "part": "snippet",
                 "q": query,
                 "type": "channel",
-                "maxResults": max_results
+                "maxResults": max_results,
+                "fields": FIELDS_SEARCH_CHANNELS
             }
             
             if region_code:
                 params["regionCode"] = region_code
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"YouTube search error: {error_text}")
-                        raise Exception(f"YouTube API error: {response.status}")
-                    
-                    data = await response.json()
+            data = await self._api_get("search", params)
             
             results = []
             for item in data.get("items", []):
@@ -10,6 +10,9 @@ This script will:
 1. Read the exported blog posts from blog_posts_export.json
 2. Send them to your production API endpoint
 3. Report success/failure
+
+To copy only new or changed posts between two running environments use
+scripts/delta_sync.py --collection blog_posts instead.
 """
 
 import requests
@@ -0,0 +1,113 @@
+"""
+Test cases for YouTube API key rotation (services/api_key_pool.py)
+"""
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import services.api_key_pool as api_key_pool
+from services.api_key_pool import ApiKeyPool
+
+
+def freeze_time(monkeypatch, instant: datetime):
+    """Make the pool's datetime.now() return instant (an aware UTC datetime), converted to the asked zone"""
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return instant.astimezone(tz) if tz else instant.replace(tzinfo=None)
+    monkeypatch.setattr(api_key_pool, "datetime", FrozenDatetime)
+
+
+class TestKeySelection:
+    """Tests that requests go to the key with the most remaining quota"""
+
+    def test_acquire_prefers_most_remaining_quota(self):
+        pool = ApiKeyPool(["key-a", "key-b"], daily_quota=100)
+        assert pool.acquire(60) == "key-a"
+        # key-a has 40 left, key-b 100
+        assert pool.acquire(10) == "key-b"
+        assert pool.acquire(50) == "key-b"
+        # 40 left on both: the first key wins the tie
+        assert pool.acquire(40) == "key-a"
+        print("✓ Keys chosen by remaining quota")
+
+    def test_acquire_returns_none_when_no_key_can_afford(self):
+        pool = ApiKeyPool(["key-a", "key-b"], daily_quota=100)
+        pool.acquire(90)
+        pool.acquire(90)
+        assert pool.acquire(20) is None
+        assert pool.acquire(10) in ("key-a", "key-b")
+        assert pool.get_usage()["total_units_used"] == 190
+        print("✓ No key returned when every key is short of the cost")
+
+    def test_duplicate_and_empty_keys_are_dropped(self):
+        pool = ApiKeyPool(["key-a", "", "key-b", "key-a"], daily_quota=100)
+        assert pool.size == 2
+        assert pool.total_daily_quota == 200
+        print("✓ Duplicate and empty keys ignored")
+
+
+class TestExhaustion:
+    """Tests that keys YouTube reports as over quota leave the rotation"""
+
+    def test_exhausted_key_is_skipped(self):
+        pool = ApiKeyPool(["key-a", "key-b"], daily_quota=100)
+        pool.mark_exhausted("key-a")
+        assert [pool.acquire(10) for _ in range(3)] == ["key-b"] * 3
+
+        usage = pool.get_usage()
+        assert usage["keys"][0]["exhausted"] and usage["keys"][0]["exhausted_at"]
+        assert usage["keys"][0]["units_remaining"] == 0
+        assert usage["total_units_remaining"] == 70
+        print("✓ Exhausted key skipped and reported")
+
+    def test_all_keys_exhausted(self):
+        pool = ApiKeyPool(["key-a"], daily_quota=100)
+        pool.mark_exhausted("key-a")
+        assert pool.acquire(1) is None
+        print("✓ No key returned when every key is exhausted")
+
+    def test_usage_masks_keys(self):
+        pool = ApiKeyPool(["AIzaSecret1234", "abc"], daily_quota=100)
+        assert [k["key"] for k in pool.get_usage()["keys"]] == ["...1234", "****"]
+        print("✓ Usage report masks keys")
+
+
+class TestQuotaDay:
+    """Tests that usage resets at midnight Pacific Time, not UTC"""
+
+    def test_usage_resets_at_pacific_midnight(self, monkeypatch):
+        # 2025-01-14 23:59 PST
+        freeze_time(monkeypatch, datetime(2025, 1, 15, 7, 59, tzinfo=timezone.utc))
+        pool = ApiKeyPool(["key-a", "key-b"], daily_quota=100)
+        pool.acquire(100)
+        pool.mark_exhausted("key-b")
+        assert pool.acquire(1) is None
+        assert pool.get_usage()["quota_day"] == "2025-01-14"
+
+        # 2025-01-15 00:00 PST
+        freeze_time(monkeypatch, datetime(2025, 1, 15, 8, 0, tzinfo=timezone.utc))
+        # Both keys are back at full quota
+        assert [pool.acquire(100), pool.acquire(100)] == ["key-a", "key-b"]
+        usage = pool.get_usage()
+        assert usage["quota_day"] == "2025-01-15"
+        assert usage["total_units_used"] == 200
+        assert not any(k["exhausted"] for k in usage["keys"])
+        print("✓ Usage and exhaustion reset at Pacific midnight")
+
+    def test_utc_midnight_does_not_reset(self, monkeypatch):
+        # 2025-07-14 16:59 PDT, then 17:00 PDT (UTC midnight)
+        freeze_time(monkeypatch, datetime(2025, 7, 14, 23, 59, tzinfo=timezone.utc))
+        pool = ApiKeyPool(["key-a"], daily_quota=100)
+        pool.acquire(100)
+
+        freeze_time(monkeypatch, datetime(2025, 7, 15, 0, 0, tzinfo=timezone.utc))
+        assert pool.acquire(1) is None
+        assert pool.get_usage()["quota_day"] == "2025-07-14"
+
+        # 2025-07-15 00:00 PDT is 07:00 UTC
+        freeze_time(monkeypatch, datetime(2025, 7, 15, 7, 0, tzinfo=timezone.utc))
+        assert pool.acquire(1) == "key-a"
+        print("✓ UTC midnight leaves the quota day unchanged")
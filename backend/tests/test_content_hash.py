@@ -0,0 +1,71 @@
+"""
+Test cases for delta-sync content hashes (services/content_hash.py)
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.content_hash import diff_manifests, sync_hash
+
+CHANNEL = {
+    "channel_id": "UC_SYNC_TEST",
+    "title": "Sync Test",
+    "description": "A channel",
+    "country_code": "US",
+    "subscriber_count": 1000,
+    "view_count": 50000,
+    "video_count": 10,
+    "updated_at": "2025-01-01T00:00:00+00:00",
+    "snippet_updated_at": "2025-01-01T00:00:00+00:00",
+}
+
+
+class TestSyncHash:
+    """Tests that manifests only differ on content both environments should share"""
+
+    def test_refreshed_counts_and_timestamps_produce_no_diff(self):
+        # Each environment's own refresh rewrites counts and timestamps
+        refreshed = {
+            **CHANNEL,
+            "subscriber_count": 1234,
+            "view_count": 60000,
+            "video_count": 11,
+            "updated_at": "2025-01-02T02:00:00+00:00",
+            "snippet_updated_at": "2025-01-02T00:00:00+00:00",
+        }
+        source = {CHANNEL["channel_id"]: sync_hash("channels", CHANNEL)}
+        target = {CHANNEL["channel_id"]: sync_hash("channels", refreshed)}
+        diff = diff_manifests(source, target)
+        assert diff["new"] == [] and diff["changed"] == []
+        assert diff["unchanged"] == 1
+        print("✓ Counts and refresh timestamps don't make channels differ")
+
+    def test_content_change_produces_diff(self):
+        edited = {**CHANNEL, "title": "Sync Test (renamed)"}
+        diff = diff_manifests(
+            {CHANNEL["channel_id"]: sync_hash("channels", edited)},
+            {CHANNEL["channel_id"]: sync_hash("channels", CHANNEL)}
+        )
+        assert diff["changed"] == [CHANNEL["channel_id"]]
+        print("✓ Title change makes the channel differ")
+
+    def test_string_and_date_typed_blog_dates_hash_alike(self):
+        # The app writes ISO strings; the import routes store naive Dates (millisecond precision)
+        source = {
+            "slug": "sync-test",
+            "title": "Sync Test",
+            "created_at": "2025-03-04T05:06:07.891234+00:00",
+            "updated_at": "2025-03-04T05:06:07Z",
+            "published_at": "2025-03-04T07:06:07.891+02:00",
+        }
+        target = {
+            **source,
+            "created_at": datetime(2025, 3, 4, 5, 6, 7, 891000),
+            "updated_at": datetime(2025, 3, 4, 5, 6, 7),
+            "published_at": datetime(2025, 3, 4, 5, 6, 7, 891000),
+        }
+        assert sync_hash("blog_posts", source) == sync_hash("blog_posts", target)
+        assert sync_hash("blog_posts", source) != sync_hash("blog_posts", {**target, "updated_at": datetime(2025, 3, 5)})
+        print("✓ String and Date blog dates produce the same sync hash")
@@ -5,6 +5,7 @@ Tests: Search, Compare, Blog, Favorites, Real-time indicators, PWA support
 import pytest
 import requests
 import os
+import json
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
@@ -74,6 +75,19 @@ class TestSearchFunctionality:
         assert "channels" in data
         assert len(data["channels"]) == 0
         print("✓ Search correctly returns empty for no matches")
+    
+    def test_autocomplete_prefix_and_diacritics(self):
+        """Test autocomplete matches word prefixes regardless of case and accents"""
+        response = requests.get(f"{BASE_URL}/api/search/autocomplete?q=mrbe&limit=5")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["results"]) > 0
+        assert "mrbeast" in data["results"][0]["title"].lower().replace(" ", "")
+        counts = [c.get("subscriber_count", 0) for c in data["results"]]
+        
+        folded = requests.get(f"{BASE_URL}/api/search/autocomplete?q=MRBÉ&limit=5").json()
+        assert [c["channel_id"] for c in folded["results"]] == [c["channel_id"] for c in data["results"]]
+        print(f"✓ Autocomplete returned {len(data['results'])} results in {data['took_ms']}ms (top {counts[0]:,} subs)")
 
 
 class TestCompareFeature:
@@ -299,5 +313,69 @@ class TestMapData:
         print(f"✓ Map data returned {len(data['map_data'])} countries with top channels")
 
 
+class TestWidgetStream:
+    """Tests for the Server-Sent Events widget feed"""
+    
+    def test_stream_sends_current_counts_on_connect(self):
+        """Test that a widget stream starts with the channel's current data"""
+        channels = requests.get(f"{BASE_URL}/api/widgets/channels?limit=1").json()["channels"]
+        channel_id = channels[0]["channel_id"]
+        
+        with requests.get(f"{BASE_URL}/api/widgets/stream", params={"channels": channel_id}, stream=True, timeout=10) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert "gzip" not in response.headers.get("content-encoding", "")
+            
+            data_line = next(line for line in response.iter_lines(decode_unicode=True) if line.startswith("data:"))
+            payload = json.loads(data_line[len("data:"):])
+            assert payload["channel_id"] == channel_id
+            assert "subscriber_count" in payload
+        
+        print(f"✓ Widget stream pushed initial count for {channel_id}")
+    
+    def test_stream_requires_channels(self):
+        """Test that an empty channel list is rejected"""
+        response = requests.get(f"{BASE_URL}/api/widgets/stream", params={"channels": ""})
+        assert response.status_code == 400
+        print("✓ Widget stream rejects empty channel list")
+
+
+class TestLiveWidgetCache:
+    """Tests for cached live widget pages"""
+    
+    def test_live_widget_etag_and_304(self):
+        """Test that the live widget is served with an ETag and honours If-None-Match"""
+        channels = requests.get(f"{BASE_URL}/api/widgets/channels?limit=1").json()["channels"]
+        url = f"{BASE_URL}/api/widgets/live/{channels[0]['channel_id']}?theme=light&size=small"
+        
+        response = requests.get(url)
+        assert response.status_code == 200
+        etag = response.headers.get("etag")
+        assert etag
+        assert "max-age" in response.headers.get("cache-control", "")
+        
+        cached = requests.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        
+        other_theme = requests.get(url.replace("theme=light", "theme=dark"))
+        assert other_theme.headers.get("etag") != etag
+        
+        print(f"✓ Live widget ETag {etag} revalidates with 304")
+    
+    def test_subscriber_badge_svg(self):
+        """Test that the SVG badge is a cacheable image with the subscriber count"""
+        channels = requests.get(f"{BASE_URL}/api/widgets/channels?limit=1").json()["channels"]
+        response = requests.get(f"{BASE_URL}/api/widgets/badge/{channels[0]['channel_id']}.svg")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("image/svg+xml")
+        assert response.text.startswith("<svg")
+        assert "subscribers" in response.text
+        
+        cached = requests.get(response.url, headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+        
+        print(f"✓ SVG badge served ({len(response.content)} bytes) and revalidates with 304")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
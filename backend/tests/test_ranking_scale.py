@@ -0,0 +1,105 @@
+"""
+Scale tests for the all-channel jobs (ranking, global ranking, stats snapshots, growth metrics)
+Seeds more active channels than any one cursor batch (and than the old to_list(1000) caps)
+into a scratch database and checks that every one of them is processed.
+Needs a MongoDB reachable at MONGO_URL.
+"""
+import asyncio
+import os
+import random
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.ranking_service import RankingService, RANK_SORT, RANKING_BATCH_SIZE
+from services.growth_analyzer import GrowthAnalyzer
+from services.scheduler_service import SchedulerService
+
+MONGO_URL = os.environ.get('MONGO_URL')
+
+pytestmark = pytest.mark.skipif(not MONGO_URL, reason="MONGO_URL not set")
+
+# Spread over two countries, both larger than one batch; every 50th channel is inactive
+CHANNELS = int(os.environ.get('SCALE_TEST_CHANNELS', 2 * RANKING_BATCH_SIZE + 700))
+
+
+def run_with_channels(scenario):
+    async def runner():
+        client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=3000)
+        db = client[f"test_ranking_scale_{uuid.uuid4().hex[:8]}"]
+        rng = random.Random(7)
+        try:
+            await db.countries.insert_many([{"code": "US", "name": "United States"}, {"code": "IN", "name": "India"}])
+            await db.channels.insert_many([{
+                "channel_id": f"UC{i:022d}",
+                "title": f"Channel {i}",
+                "country_code": "US" if i % 2 else "IN",
+                "subscriber_count": rng.randint(0, 10_000_000),
+                "view_count": rng.randint(0, 10**9),
+                "video_count": rng.randint(1, 5000),
+                # Ties, so ranks depend on the channel_id tie-break
+                **({"subscriber_count": 1000} if i % 97 == 0 else {}),
+                "is_active": i % 50 != 0
+            } for i in range(CHANNELS)])
+            await db.channels.create_index([("is_active", 1), ("subscriber_count", -1), ("channel_id", 1)])
+            await db.channels.create_index([("country_code", 1), ("is_active", 1), ("subscriber_count", -1), ("channel_id", 1)])
+            ranking_service = RankingService(db)
+            scheduler = SchedulerService(db, None, ranking_service, GrowthAnalyzer(db))
+            await scenario(db, ranking_service, scheduler)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+    asyncio.run(runner())
+
+
+async def ranks_in_order(db, query):
+    """current_rank of the channels matching query, in rank order"""
+    cursor = db.channels.find(query, {"_id": 0, "current_rank": 1}).sort(RANK_SORT)
+    return [channel.get("current_rank") async for channel in cursor]
+
+
+class TestRankingScale:
+    """Tests that the all-channel jobs reach every active channel"""
+
+    def test_country_rankings_cover_every_active_channel(self):
+        async def scenario(db, ranking_service, scheduler):
+            for code in ("US", "IN"):
+                active = await db.channels.count_documents({"country_code": code, "is_active": True})
+                assert active > RANKING_BATCH_SIZE
+                result = await ranking_service.update_rankings(code)
+                assert result["updated"] == active
+                assert await ranks_in_order(db, {"country_code": code, "is_active": True}) == list(range(1, active + 1))
+                assert len(await ranking_service.calculate_country_rankings(code)) == active
+            print(f"✓ Country rankings cover all {CHANNELS} seeded channels")
+        run_with_channels(scenario)
+
+    def test_global_rankings_cover_every_active_channel(self):
+        async def scenario(db, ranking_service, scheduler):
+            active = await db.channels.count_documents({"is_active": True})
+            assert await scheduler._update_global_rankings() == active
+            assert await ranks_in_order(db, {"is_active": True}) == list(range(1, active + 1))
+            assert await db.channels.count_documents({"is_active": False, "current_rank": {"$exists": True}}) == 0
+            print(f"✓ Global rankings cover {active} active channels")
+        run_with_channels(scenario)
+
+    def test_stats_snapshot_covers_every_active_channel(self):
+        async def scenario(db, ranking_service, scheduler):
+            active = await db.channels.count_documents({"is_active": True})
+            await scheduler.record_stats_snapshot()
+            assert await db.channel_stats.count_documents({}) == active
+            assert len(await db.channel_stats.distinct("channel_id")) == active
+            print(f"✓ Stats snapshot recorded for {active} active channels")
+        run_with_channels(scenario)
+
+    def test_growth_metrics_cover_every_active_channel(self):
+        async def scenario(db, ranking_service, scheduler):
+            active = await db.channels.count_documents({"is_active": True})
+            await scheduler.calculate_growth_metrics()
+            assert await db.channels.count_documents({"metrics_updated_at": {"$exists": True}}) == active
+            print(f"✓ Growth metrics calculated for {active} active channels")
+        run_with_channels(scenario)
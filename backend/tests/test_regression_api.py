@@ -5,6 +5,10 @@ Tests all backend API endpoints after server.py refactoring into 7 route modules
 import pytest
 import requests
 import os
+import json
+import gzip
+import uuid
+import base64
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://toptube-world.preview.emergentagent.com').rstrip('/')
 BLOG_ADMIN_KEY = "toptube2024admin"
@@ -41,6 +45,47 @@ class TestChannelsRoutes:
         assert len(data["channels"]) <= 5
         print(f"PASS: Get all channels - {data['total']} total, returned {len(data['channels'])}")
     
+    def test_channels_cursor_pagination(self):
+        first = requests.get(f"{BASE_URL}/api/channels?limit=10").json()
+        assert first["next_cursor"]
+        second = requests.get(f"{BASE_URL}/api/channels?limit=10&cursor={first['next_cursor']}").json()
+        by_skip = requests.get(f"{BASE_URL}/api/channels?limit=10&skip=10").json()
+        assert [c["channel_id"] for c in second["channels"]] == [c["channel_id"] for c in by_skip["channels"]]
+        assert second["total"] == first["total"]
+        
+        assert requests.get(f"{BASE_URL}/api/channels?cursor=not-a-cursor").status_code == 400
+        print(f"PASS: Cursor pagination - page 2 matches skip=10 ({len(second['channels'])} channels)")
+    
+    def test_channels_view_and_fields(self):
+        full = requests.get(f"{BASE_URL}/api/channels?limit=20")
+        compact = requests.get(f"{BASE_URL}/api/channels?limit=20&view=compact")
+        assert compact.status_code == 200
+        assert [c["channel_id"] for c in compact.json()["channels"]] == [c["channel_id"] for c in full.json()["channels"]]
+        assert all("growth_history" not in c and "description" not in c for c in compact.json()["channels"])
+        assert len(compact.content) < len(full.content)
+    
+        picked = requests.get(f"{BASE_URL}/api/leaderboard/global?limit=5&fields=title,subscriber_count").json()
+        assert all(set(c) <= {"channel_id", "title", "subscriber_count", "global_rank"} for c in picked["channels"])
+    
+        assert requests.get(f"{BASE_URL}/api/channels?view=tiny").status_code == 400
+        assert requests.get(f"{BASE_URL}/api/channels?fields=$where").status_code == 400
+        print(f"PASS: Compact view - {len(compact.content)} vs {len(full.content)} bytes")
+    
+    def test_channels_batch(self):
+        ids = [c["channel_id"] for c in requests.get(f"{BASE_URL}/api/channels?limit=3").json()["channels"]]
+        response = requests.get(f"{BASE_URL}/api/channels/batch?ids={','.join(ids + ['UC_MISSING'])}&history_days=7")
+        assert response.status_code == 200
+        data = response.json()
+        assert [c["channel_id"] for c in data["channels"]] == ids
+        assert data["missing"] == ["UC_MISSING"]
+        assert all("top_videos" not in c and "growth_history" in c for c in data["channels"])
+        assert all(p["date"] in data["dates"] for c in data["channels"] for p in c["growth_history"])
+    
+        posted = requests.post(f"{BASE_URL}/api/channels/batch", json={"ids": ids[:2], "view": "compact"}).json()
+        assert [c["channel_id"] for c in posted["channels"]] == ids[:2]
+        assert requests.get(f"{BASE_URL}/api/channels/batch?ids={','.join(['x'] * 10 + [str(i) for i in range(60)])}").status_code == 400
+        print(f"PASS: Channel batch - {len(data['channels'])} channels, {len(data['dates'])} aligned dates")
+    
     def test_get_channel_by_id(self):
         # MrBeast channel ID
         channel_id = "UCX6OQ3DkcsbYNE6H8uQQuVA"
@@ -144,6 +189,75 @@ class TestLeaderboardRoutes:
         data = response.json()
         assert "channels" in data
         print(f"PASS: Biggest gainers - {len(data['channels'])} channels")
+    
+    def test_leaderboard_response_cache(self):
+        url = f"{BASE_URL}/api/leaderboard/country/US?limit=7"
+        requests.get(url)
+        response = requests.get(url)
+        assert response.status_code == 200
+        assert response.headers.get("x-cache") in ("HIT", "STALE")
+        assert "surrogate-key" not in response.headers
+        
+        purge = requests.post(f"{BASE_URL}/api/admin/response-cache/purge?tags=country:US")
+        assert purge.json()["purged"] >= 1
+        assert requests.get(url).headers.get("x-cache") == "MISS"
+        
+        stats = requests.get(f"{BASE_URL}/api/admin/response-cache").json()
+        assert "/api/leaderboard/country/{country_code}" in stats["routes"]
+        print(f"PASS: Response cache - hit ratio {stats['routes']['/api/leaderboard/country/{country_code}']['hit_ratio']}")
+    
+    def test_global_leaderboard_precompressed(self):
+        url = f"{BASE_URL}/api/leaderboard/global?limit=100"
+        response = requests.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") == "gzip"
+        assert len(response.json()["channels"]) <= 100
+        
+        cached = requests.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+        
+        plain = requests.get(url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == response.json()
+        print(f"PASS: Pre-compressed global leaderboard - ETag {response.headers['etag']}")
+    
+    def test_global_leaderboard_changes(self):
+        version = requests.get(f"{BASE_URL}/api/leaderboard/global?limit=10").json()["version"]
+        response = requests.get(f"{BASE_URL}/api/leaderboard/global/changes?since={version}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] >= version
+        if data["version"] == version:
+            assert not data["full_reload"] and data["moves"] == [] and data["exits"] == []
+        
+        # Versions the server hasn't produced (or no version at all) need a full reload
+        assert requests.get(f"{BASE_URL}/api/leaderboard/global/changes?since={data['version'] + 100}").json()["full_reload"]
+        assert requests.get(f"{BASE_URL}/api/leaderboard/global/changes?since=0").json()["full_reload"]
+        print(f"PASS: Leaderboard changes - version {data['version']}")
+    
+    def test_single_flight_metrics(self):
+        requests.get(f"{BASE_URL}/api/leaderboard/global?limit=5")
+        stats = requests.get(f"{BASE_URL}/api/admin/single-flight").json()
+        assert "leaderboard.global" in stats
+        group = stats["leaderboard.global"]
+        assert group["calls"] == group["executions"] + group["coalesced"]
+        print(f"PASS: Single flight - global leaderboard coalesced {group['coalesced']} of {group['calls']} calls")
+    
+    def test_channel_index_leaderboards(self):
+        stats = requests.get(f"{BASE_URL}/api/admin/channel-index").json()
+        assert stats["ready"]
+        assert stats["active"] <= stats["channels"]
+        assert stats["memory_bytes"]["total"] > 0
+        
+        # Compact leaderboards come from the index: same order and ranks as the Mongo queries
+        channels = requests.get(f"{BASE_URL}/api/leaderboard/country/US?limit=20&view=compact").json()["channels"]
+        subscribers = [c.get("subscriber_count", 0) for c in channels]
+        assert subscribers == sorted(subscribers, reverse=True)
+        assert [c["rank"] for c in channels] == list(range(1, len(channels) + 1))
+        growing = requests.get(f"{BASE_URL}/api/leaderboard/fastest-growing?limit=20&view=compact").json()["channels"]
+        growth = [c["daily_growth_percent"] for c in growing]
+        assert growth == sorted(growth, reverse=True)
+        print(f"PASS: Channel index - {stats['active']} active channels, {stats['memory_bytes']['total']} bytes")
 
 
 class TestStatsRoutes:
@@ -171,6 +285,54 @@ class TestStatsRoutes:
         assert data["channel_id"] == channel_id
         assert "history" in data
         print(f"PASS: Channel stats history - {len(data['history'])} data points")
+    
+    def test_channel_stats_history_downsampled(self):
+        channel_id = "UCX6OQ3DkcsbYNE6H8uQQuVA"
+        raw = requests.get(f"{BASE_URL}/api/stats/channel/{channel_id}/history?days=90").json()["history"]
+        response = requests.get(f"{BASE_URL}/api/stats/channel/{channel_id}/history?days=90&points=20")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["points"] == len(data["history"]) <= 20
+        assert data["raw_points"] == len(raw)
+        if len(raw) > 20:
+            # LTTB keeps both ends of the window
+            assert data["history"][0] == raw[0] and data["history"][-1] == raw[-1]
+        print(f"PASS: Downsampled history - {data['points']} of {data['raw_points']} points")
+    
+    def test_channel_history_columnar(self):
+        channel_id = "UCX6OQ3DkcsbYNE6H8uQQuVA"
+        rows = requests.get(f"{BASE_URL}/api/stats/channel/{channel_id}/history?days=30").json()["history"]
+        response = requests.get(f"{BASE_URL}/api/stats/channel/{channel_id}/history?days=30&format=columnar&delta=true")
+        assert response.status_code == 200
+        history = response.json()["history"]
+        assert history["format"] == "columnar" and history["count"] == len(rows)
+        if rows:
+            # Delta columns decode back to the row values
+            subs, total = [], 0
+            for value in history["columns"]["subscriber_count"]:
+                total += value
+                subs.append(total)
+            assert subs == [r["subscriber_count"] for r in rows]
+        
+        packed = requests.get(f"{BASE_URL}/api/stats/channel/{channel_id}/rank-history?format=columnar",
+                              headers={"Accept": "application/msgpack"})
+        assert packed.status_code == 200
+        assert packed.headers["content-type"].startswith("application/msgpack")
+        print(f"PASS: Columnar history - {len(response.content)} bytes for {len(rows)} snapshots")
+    
+    def test_compare_channels_aligned(self):
+        ids = [c["channel_id"] for c in requests.get(f"{BASE_URL}/api/leaderboard/global?limit=2").json()["channels"]]
+        response = requests.get(f"{BASE_URL}/api/stats/compare?ids={','.join(ids)}&days=30&points=20")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["baseline"] == ids[0]
+        assert [s["channel_id"] for s in data["series"]] == ids
+        for s in data["series"]:
+            assert len(s["values"]) == len(s["gap"]) == len(s["gap_velocity"]) == len(data["timestamps"])
+        assert all(g in (0, None) for g in data["series"][0]["gap"])
+        
+        assert requests.get(f"{BASE_URL}/api/stats/compare?ids={ids[0]}&metric=likes").status_code == 400
+        print(f"PASS: Aligned comparison - {len(data['timestamps'])} grid points")
 
 
 class TestSEORoutes:
@@ -213,6 +375,46 @@ class TestBlogRoutes:
         assert "total" in data
         print(f"PASS: Get blog posts - {data['total']} posts")
     
+    def test_blog_posts_cursor_pages_across_date_typed_posts(self):
+        # Imported posts store created_at as Dates; admin-created ones as ISO strings
+        category = f"cursor-test-{uuid.uuid4().hex[:8]}"
+        imported = [{
+            "id": f"{category}-{i}", "slug": f"{category}-{i}", "title": f"Imported {i}", "category": category,
+            "status": "published", "content": "x", "created_at": f"2024-01-0{1 + i % 3}T00:00:00+00:00"
+        } for i in range(5)]
+        assert requests.post(f"{BASE_URL}/api/admin/import-blog-posts", json=imported).status_code == 200
+        created = [requests.post(
+            f"{BASE_URL}/api/admin/blog/posts", params={"admin_key": BLOG_ADMIN_KEY},
+            json={"title": f"Created {i}", "slug": f"{category}-new-{i}", "excerpt": "x", "content": "x",
+                  "category": category, "status": "published"}
+        ).json()["post"]["id"] for i in range(2)]
+        try:
+            expected = [p["slug"] for p in requests.get(
+                f"{BASE_URL}/api/blog/posts", params={"category": category, "limit": 100}).json()["posts"]]
+            assert len(expected) == 7
+            
+            paged, cursor = [], None
+            while True:
+                params = {"category": category, "limit": 2, **({"cursor": cursor} if cursor else {})}
+                data = requests.get(f"{BASE_URL}/api/blog/posts", params=params).json()
+                paged += [p["slug"] for p in data["posts"]]
+                cursor = data["next_cursor"]
+                if not cursor:
+                    break
+            assert paged == expected
+        finally:
+            for post_id in [p["id"] for p in imported] + created:
+                requests.delete(f"{BASE_URL}/api/admin/blog/posts/{post_id}", params={"admin_key": BLOG_ADMIN_KEY})
+        print(f"PASS: Blog cursor pages across Date and string created_at - {len(paged)} posts")
+    
+    def test_cursor_with_wrong_value_types_is_rejected(self):
+        def cursor(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+        
+        assert requests.get(f"{BASE_URL}/api/channels", params={"search": "mr", "cursor": cursor(["many", "UC"])}).status_code == 400
+        assert requests.get(f"{BASE_URL}/api/blog/posts", params={"cursor": cursor(["2024-01-01", 7])}).status_code == 400
+        print("PASS: Tampered cursors return 400")
+    
     def test_get_blog_categories(self):
         response = requests.get(f"{BASE_URL}/api/blog/categories")
         assert response.status_code == 200
@@ -321,5 +523,61 @@ class TestAutoGeneratedBlogPosts:
             print(f"PASS: Auto-generated posts - {len(data['posts'])} posts")
 
 
+class TestStreamingExport:
+    """Test NDJSON streaming exports from routes/admin.py and routes/blog.py"""
+    
+    def test_export_channels_stream_resumes_after_cursor(self):
+        response = requests.get(f"{BASE_URL}/api/admin/export-channels/stream")
+        assert response.status_code == 200
+        assert "ndjson" in response.headers.get("content-type", "")
+        channels = [json.loads(line) for line in response.text.splitlines() if line]
+        ids = [c["channel_id"] for c in channels]
+        assert ids == sorted(ids)
+        
+        resumed = requests.get(f"{BASE_URL}/api/admin/export-channels/stream", params={"after": ids[len(ids) // 2]})
+        resumed_ids = [json.loads(line)["channel_id"] for line in resumed.text.splitlines() if line]
+        assert resumed_ids == ids[len(ids) // 2 + 1:]
+        print(f"PASS: Channel NDJSON export - {len(ids)} channels, resumed with {len(resumed_ids)}")
+    
+    def test_export_blog_posts_stream_gzip(self):
+        response = requests.get(
+            f"{BASE_URL}/api/admin/blog/export/stream",
+            params={"admin_key": BLOG_ADMIN_KEY, "gzip": "true"}
+        )
+        assert response.status_code == 200
+        assert response.headers.get("content-type") == "application/gzip"
+        lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+        posts = [json.loads(line) for line in lines if line]
+        assert all("slug" in p for p in posts)
+        print(f"PASS: Blog NDJSON gzip export - {len(posts)} posts")
+    
+    def test_import_channels_stream_reports_bad_lines(self):
+        body = b'not json\n{"title": "no id"}\n\n'
+        response = requests.post(
+            f"{BASE_URL}/api/admin/import-channels/stream",
+            data=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["received"] == 0
+        assert data["error_count"] == 2
+        assert [e["line"] for e in data["errors"]] == [1, 2]
+        print(f"PASS: NDJSON import rejected {data['error_count']} bad lines")
+    
+    def test_import_channels_stream_reports_corrupt_gzip(self):
+        body = gzip.compress(b'{"title": "no id"}\n')[:-12] + b"garbage"
+        response = requests.post(
+            f"{BASE_URL}/api/admin/import-channels/stream",
+            data=body,
+            headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["received"] == 0
+        assert any("gzip" in e["error"] for e in data["errors"])
+        print("PASS: NDJSON import reported a corrupt gzip body")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
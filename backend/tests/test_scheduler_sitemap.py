@@ -204,5 +204,64 @@ class TestLeaderboardEndpoints:
         print(f"✓ Fastest growing endpoint returns {len(data.get('channels', []))} channels")
 
 
+class TestQuotaUsage:
+    """Tests for per-key YouTube API quota reporting"""
+    
+    def test_quota_usage_endpoint(self):
+        """Test that quota usage reports every key in the pool"""
+        response = requests.get(f"{BASE_URL}/api/scheduler/quota-usage")
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert "quota_day" in data
+        assert "keys" in data
+        assert data["total_daily_quota"] == data["daily_quota_per_key"] * len(data["keys"])
+        
+        for key in data["keys"]:
+            assert key["key"].startswith("..."), "API keys must be masked"
+            assert key["units_used"] + key["units_remaining"] <= data["daily_quota_per_key"] or key["exhausted"]
+        
+        print(f"✓ Quota usage: {len(data['keys'])} keys, {data['total_units_used']} units used")
+    
+    def test_quota_estimate_uses_pool_limit(self):
+        """Test that the quota estimate scales with the number of keys"""
+        usage = requests.get(f"{BASE_URL}/api/scheduler/quota-usage").json()
+        response = requests.get(f"{BASE_URL}/api/scheduler/quota-estimate")
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["daily_quota_limit"] == usage["total_daily_quota"]
+        assert data["api_keys"] == len(usage["keys"])
+        
+        print(f"✓ Quota estimate limit: {data['daily_quota_limit']} units across {data['api_keys']} keys")
+
+
+class TestAdminJobs:
+    """Tests for tracked background jobs (bulk channel refresh)"""
+    
+    def test_unknown_job_returns_404(self):
+        """Test that an unknown job id is a 404"""
+        response = requests.get(f"{BASE_URL}/api/admin/jobs/job_doesnotexist")
+        assert response.status_code == 404
+        print("✓ Unknown job returns 404")
+    
+    def test_jobs_list(self):
+        """Test that recent jobs are listed with their status"""
+        response = requests.get(f"{BASE_URL}/api/admin/jobs", params={"kind": "channel_refresh"})
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert "jobs" in data
+        for job in data["jobs"]:
+            assert job["kind"] == "channel_refresh"
+            assert job["status"] in ("running", "completed", "failed")
+            if job["status"] == "completed":
+                for batch in job["result"]["batches"]:
+                    assert "write_seconds" in batch
+                    assert "channels_updated" in batch
+        
+        print(f"✓ Jobs list: {len(data['jobs'])} refresh jobs")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,165 @@
+"""
+Test cases for the local YouTube Data API emulator (emulator/youtube_api.py)
+Field masks, ETag revalidation and quota accounting, which the refresh benchmarks rely on.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from emulator.youtube_api import EmulatorDataset, YouTubeEmulator, apply_fields, parse_fields
+
+CHANNELS = [
+    {
+        "channel_id": f"UC{i:022d}",
+        "title": f"Emulated Channel {i}",
+        "description": "Music videos",
+        "country_code": "US",
+        "subscriber_count": 1000 * (i + 1),
+        "view_count": 50000 * (i + 1),
+        "video_count": 10,
+        "thumbnail_url": f"https://yt3.ggpht.com/channel-{i}=s800"
+    }
+    for i in range(3)
+]
+CHANNEL_ID = CHANNELS[0]["channel_id"]
+
+
+def run_with_client(scenario, daily_quota: int = 10000):
+    async def runner():
+        emulator = YouTubeEmulator(EmulatorDataset(CHANNELS), daily_quota=daily_quota)
+        client = TestClient(TestServer(emulator.create_app()))
+        await client.start_server()
+        try:
+            await scenario(emulator, client)
+        finally:
+            await client.close()
+    asyncio.run(runner())
+
+
+class TestFieldMasks:
+    """Tests for parse_fields/apply_fields"""
+
+    def test_parse_nested_masks(self):
+        tree, _ = parse_fields("items(id,snippet(title,thumbnails/default/url),statistics),etag")
+        assert tree == {
+            "items": {
+                "id": None,
+                "snippet": {"title": None, "thumbnails": {"default": {"url": None}}},
+                "statistics": None
+            },
+            "etag": None
+        }
+        print("✓ Nested field mask parsed")
+
+    def test_apply_nested_mask(self):
+        payload = {
+            "kind": "youtube#channelListResponse",
+            "items": [
+                {"id": "a", "snippet": {"title": "A", "description": "long",
+                                        "thumbnails": {"default": {"url": "u", "width": 88}, "high": {"url": "h"}}},
+                 "statistics": {"viewCount": "1"}},
+                {"id": "b", "etag": "x"}
+            ]
+        }
+        tree, _ = parse_fields("items(id,snippet(title,thumbnails/default/url))")
+        assert apply_fields(payload, tree) == {
+            "items": [
+                {"id": "a", "snippet": {"title": "A", "thumbnails": {"default": {"url": "u"}}}},
+                {"id": "b"}
+            ]
+        }
+        print("✓ Nested field mask applied to a list response")
+
+    def test_fields_query_trims_response(self):
+        async def scenario(emulator, client):
+            response = await client.get("/youtube/v3/channels", params={
+                "key": "k", "part": "snippet,statistics", "id": CHANNEL_ID,
+                "fields": "items(id,statistics/subscriberCount)"
+            })
+            assert response.status == 200
+            assert await response.json() == {"items": [{"id": CHANNEL_ID, "statistics": {"subscriberCount": "1000"}}]}
+            print("✓ fields query parameter trims the channels response")
+        run_with_client(scenario)
+
+
+class TestETags:
+    """Tests for If-None-Match revalidation"""
+
+    def test_matching_etag_returns_304(self):
+        async def scenario(emulator, client):
+            params = {"key": "k", "part": "statistics", "id": CHANNEL_ID}
+            first = await client.get("/youtube/v3/channels", params=params)
+            etag = first.headers["ETag"]
+            body_bytes = emulator.stats["bytes_sent"]
+
+            cached = await client.get("/youtube/v3/channels", params=params, headers={"If-None-Match": etag})
+            assert cached.status == 304
+            assert await cached.read() == b""
+            assert emulator.stats["not_modified"] == 1
+            assert emulator.stats["bytes_sent"] == body_bytes
+
+            # Once the counts drift the same ETag no longer matches
+            emulator.dataset.drift(1.0)
+            changed = await client.get("/youtube/v3/channels", params=params, headers={"If-None-Match": etag})
+            assert changed.status == 200
+            assert changed.headers["ETag"] != etag
+            print("✓ Matching ETag answered with 304, changed data with 200")
+        run_with_client(scenario)
+
+    def test_etag_depends_on_field_mask(self):
+        async def scenario(emulator, client):
+            params = {"key": "k", "part": "snippet,statistics", "id": CHANNEL_ID}
+            full = await client.get("/youtube/v3/channels", params=params)
+            masked = await client.get("/youtube/v3/channels", params={**params, "fields": "items(id)"},
+                                      headers={"If-None-Match": full.headers["ETag"]})
+            assert masked.status == 200
+            print("✓ ETag of a masked response differs from the full one")
+        run_with_client(scenario)
+
+
+class TestQuota:
+    """Tests that quota units are charged per key like the real API"""
+
+    def test_quota_charged_per_endpoint_and_key(self):
+        async def scenario(emulator, client):
+            await client.get("/youtube/v3/channels", params={"key": "a", "part": "statistics", "id": CHANNEL_ID})
+            await client.get("/youtube/v3/search", params={"key": "a", "q": "music"})
+            await client.get("/youtube/v3/videos", params={"key": "b", "part": "statistics", "id": ""})
+            assert emulator.quota_used == {"a": 101, "b": 1}
+
+            # 304s still cost quota
+            params = {"key": "b", "part": "statistics", "id": CHANNEL_ID}
+            etag = (await client.get("/youtube/v3/channels", params=params)).headers["ETag"]
+            await client.get("/youtube/v3/channels", params=params, headers={"If-None-Match": etag})
+            assert emulator.quota_used["b"] == 3
+
+            stats = await (await client.get("/emulator/stats")).json()
+            assert stats["total_quota_used"] == 104
+            assert stats["requests"]["channels"] == 3 and stats["requests"]["search"] == 1
+            print("✓ Quota charged per endpoint cost and key")
+        run_with_client(scenario)
+
+    def test_quota_exceeded_and_missing_key(self):
+        async def scenario(emulator, client):
+            params = {"key": "a", "part": "statistics", "id": CHANNEL_ID}
+            assert (await client.get("/youtube/v3/channels", params=params)).status == 200
+            assert (await client.get("/youtube/v3/channels", params=params)).status == 200
+
+            rejected = await client.get("/youtube/v3/channels", params=params)
+            assert rejected.status == 403
+            assert (await rejected.json())["error"]["errors"][0]["reason"] == "quotaExceeded"
+            assert emulator.quota_used["a"] == 2 and emulator.stats["quota_rejections"] == 1
+
+            # A search costs 100 units, more than a fresh key's budget here
+            assert (await client.get("/youtube/v3/search", params={"key": "b", "q": "music"})).status == 403
+            assert "b" not in emulator.quota_used
+
+            missing = await client.get("/youtube/v3/channels", params={"part": "statistics", "id": CHANNEL_ID})
+            assert missing.status == 403
+            assert (await missing.json())["error"]["errors"][0]["reason"] == "forbidden"
+            print("✓ quotaExceeded once a key's budget is spent; requests without a key rejected")
+        run_with_client(scenario, daily_quota=2)
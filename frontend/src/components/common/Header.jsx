@@ -24,9 +24,19 @@ export const Header = () => {
       return;
     }
     try {
-      const response = await axios.get(`${API}/channels?search=${encodeURIComponent(query)}&limit=5`);
-      setSearchResults(response.data.channels || []);
+      const response = await axios.get(`${API}/search/autocomplete?q=${encodeURIComponent(query)}&limit=5`);
+      setSearchResults(response.data.results || []);
     } catch (error) {
+      if (error.response?.status === 503) {
+        // Search index still loading after a restart: fall back to the title search
+        try {
+          const response = await axios.get(`${API}/channels?search=${encodeURIComponent(query)}&limit=5&view=compact`);
+          setSearchResults(response.data.channels || []);
+        } catch (fallbackError) {
+          console.error("Search error:", fallbackError);
+        }
+        return;
+      }
       console.error("Search error:", error);
     }
   };
@@ -13,6 +13,7 @@ const ComparePage = () => {
   const [searchParams, setSearchParams] = useSearchParams();
   const navigate = useNavigate();
   const [channels, setChannels] = useState([]);
+  const [comparison, setComparison] = useState(null);
   const [allChannels, setAllChannels] = useState([]);
   const [searchQuery, setSearchQuery] = useState('');
   const [searchResults, setSearchResults] = useState([]);
@@ -65,7 +66,7 @@ const ComparePage = () => {
   useEffect(() => {
     const fetchAllChannels = async () => {
       try {
-        const response = await axios.get(`${API}/channels?limit=500`);
+        const response = await axios.get(`${API}/channels?limit=500&view=compact`);
         setAllChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error fetching channels:", error);
@@ -80,13 +81,18 @@ const ComparePage = () => {
     const fetchSelectedChannels = async () => {
       if (channelIds.length === 0) {
         setChannels([]);
+        setComparison(null);
         return;
       }
       
       try {
-        const promises = channelIds.map(id => axios.get(`${API}/channels/${id}`));
-        const responses = await Promise.all(promises);
-        setChannels(responses.map(r => r.data));
+        const ids = channelIds.join(',');
+        const [batchRes, compareRes] = await Promise.all([
+          axios.get(`${API}/channels/batch`, { params: { ids, view: 'compact' } }),
+          axios.get(`${API}/stats/compare`, { params: { ids, days: 30, points: 60 } })
+        ]);
+        setChannels(batchRes.data.channels || []);
+        setComparison(compareRes.data);
       } catch (error) {
         console.error("Error fetching channel details:", error);
       }
@@ -122,27 +128,19 @@ const ComparePage = () => {
 
   const shareUrl = `${BACKEND_URL}/compare?ids=${channelIds.join(',')}`;
 
-  // Prepare chart data for comparison
+  // Chart data: histories already resampled onto one time grid by the backend
   const chartData = useMemo(() => {
-    if (channels.length === 0) return [];
+    if (!comparison || channels.length === 0) return [];
+    const titles = Object.fromEntries(channels.map(ch => [ch.channel_id, ch.title]));
     
-    // Get all unique dates from growth history
-    const allDates = new Set();
-    channels.forEach(ch => {
-      ch.growth_history?.forEach(h => {
-        allDates.add(formatShortDate(h.timestamp));
-      });
-    });
-    
-    return Array.from(allDates).sort().map(date => {
-      const point = { date };
-      channels.forEach(ch => {
-        const historyPoint = ch.growth_history?.find(h => formatShortDate(h.timestamp) === date);
-        point[ch.title] = historyPoint?.subscriber_count || null;
+    return comparison.timestamps.map((timestamp, i) => {
+      const point = { date: formatShortDate(timestamp) };
+      comparison.series.forEach(s => {
+        if (titles[s.channel_id]) point[titles[s.channel_id]] = s.values[i];
       });
       return point;
     });
-  }, [channels]);
+  }, [channels, comparison]);
 
   const colors = ['#ef4444', '#3b82f6', '#22c55e', '#eab308'];
 
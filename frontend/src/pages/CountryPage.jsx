@@ -19,7 +19,7 @@ const CountryPage = () => {
     const fetchData = async () => {
       try {
         const [countryRes, neighborsRes] = await Promise.all([
-          axios.get(`${API}/countries/${countryCode}`),
+          axios.get(`${API}/countries/${countryCode}?view=compact`),
           axios.get(`${API}/countries/${countryCode}/neighbors?limit=8`).catch(() => ({ data: { neighbors: [] } }))
         ]);
         setCountry(countryRes.data);
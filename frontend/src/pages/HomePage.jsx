@@ -24,8 +24,8 @@ const HomePage = () => {
       try {
         const [mapRes, globalRes, growingRes, statsRes] = await Promise.all([
           axios.get(`${API}/stats/map-data`),
-          axios.get(`${API}/leaderboard/global?limit=5`),
-          axios.get(`${API}/leaderboard/fastest-growing?limit=5`),
+          axios.get(`${API}/leaderboard/global?limit=5&view=compact`),
+          axios.get(`${API}/leaderboard/fastest-growing?limit=5&view=compact`),
           axios.get(`${API}/admin/stats`)
         ]);
         setMapData(mapRes.data.map_data || []);
@@ -23,7 +23,7 @@ const LeaderboardPage = () => {
     const fetchData = async () => {
       try {
         const [channelsRes, countriesRes] = await Promise.all([
-          axios.get(`${API}/leaderboard/global?limit=500`),
+          axios.get(`${API}/leaderboard/global?limit=500&view=compact`),
           axios.get(`${API}/countries`)
         ]);
         setChannels(channelsRes.data.channels || []);
@@ -20,7 +20,7 @@ const RacePage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=100`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=100&view=compact`);
         const channelData = response.data.channels || [];
         setChannels(channelData);
         
@@ -232,7 +232,7 @@ const MilestonePage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=200`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=200&view=compact`);
         const channelData = response.data.channels || [];
         setChannels(channelData);
         
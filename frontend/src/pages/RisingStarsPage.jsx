@@ -16,7 +16,7 @@ const RisingStarsPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=500`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=500&view=compact`);
         const channelData = response.data.channels || [];
         
         // Filter for "rising stars" - channels under 50M (since most top channels are large) with any data
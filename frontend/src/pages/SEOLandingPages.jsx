@@ -16,7 +16,7 @@ export const TopYouTubeChannelsPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=50`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=50&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
@@ -191,7 +191,7 @@ export const MostSubscribedYouTubeChannelsPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=100`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=100&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
@@ -344,7 +344,7 @@ export const YouTubeSubscriberRankingPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=100`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=100&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
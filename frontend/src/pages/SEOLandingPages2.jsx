@@ -16,7 +16,7 @@ export const WhoHasMostSubscribersPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=20`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=20&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
@@ -237,7 +237,7 @@ export const YouTubeSubscriberCountLivePage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=30`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=30&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
@@ -364,7 +364,7 @@ export const BiggestYouTubersPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=50`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=50&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
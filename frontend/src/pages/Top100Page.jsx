@@ -15,7 +15,7 @@ const Top100Page = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await axios.get(`${API}/leaderboard/global?limit=100`);
+        const response = await axios.get(`${API}/leaderboard/global?limit=100&view=compact`);
         setChannels(response.data.channels || []);
       } catch (error) {
         console.error("Error:", error);
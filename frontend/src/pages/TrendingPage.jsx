@@ -16,8 +16,8 @@ const TrendingPage = () => {
     const fetchData = async () => {
       try {
         const [growingRes, gainersRes] = await Promise.all([
-          axios.get(`${API}/leaderboard/fastest-growing?limit=20`),
-          axios.get(`${API}/leaderboard/biggest-gainers?limit=20`)
+          axios.get(`${API}/leaderboard/fastest-growing?limit=20&view=compact`),
+          axios.get(`${API}/leaderboard/biggest-gainers?limit=20&view=compact`)
         ]);
         setFastestGrowing(growingRes.data.channels || []);
         setBiggestGainers(gainersRes.data.channels || []);
@@ -502,7 +502,7 @@ const AlertsPage = () => {
       return;
     }
     try {
-      const response = await axios.get(`${API}/channels?search=${encodeURIComponent(query)}&limit=5`);
+      const response = await axios.get(`${API}/channels?search=${encodeURIComponent(query)}&limit=5&view=compact`);
       setSearchResults(response.data.channels || []);
     } catch (error) {
       console.error('Search error:', error);
@@ -883,10 +883,14 @@ const FavoritesPage = () => {
       }
       
       try {
-        const promises = favorites.map(f => axios.get(`${API}/channels/${f.channel_id}`).catch(() => null));
-        const responses = await Promise.all(promises);
-        const details = responses.filter(r => r?.data).map(r => r.data);
-        setChannelDetails(details);
+        // The batch endpoint takes up to 50 ids per request
+        const ids = favorites.map(f => f.channel_id);
+        const chunks = [];
+        for (let i = 0; i < ids.length; i += 50) chunks.push(ids.slice(i, i + 50));
+        const responses = await Promise.all(
+          chunks.map(chunk => axios.post(`${API}/channels/batch`, { ids: chunk, view: 'compact' }))
+        );
+        setChannelDetails(responses.flatMap(r => r.data.channels || []));
       } catch (error) {
         console.error("Error:", error);
       } finally {
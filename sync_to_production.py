@@ -2,44 +2,63 @@
 """
 Run this script to sync channels to your production database.
 
+Streams channels_export.json to the production import endpoint as NDJSON in a
+single request; the server upserts them in batches of --batch-size.
+To copy only new or changed channels between two running environments use
+backend/scripts/delta_sync.py instead.
+
 Usage:
-    python3 sync_to_production.py https://mostpopularyoutubechannel.com
+    python3 sync_to_production.py https://mostpopularyoutubechannel.com [--batch-size 1000]
 """
 
+import argparse
 import json
 import requests
 import sys
 
+def ndjson_lines(channels):
+    """Encode channels one line at a time so the request body is streamed"""
+    for channel in channels:
+        yield (json.dumps(channel, ensure_ascii=False) + "\n").encode("utf-8")
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 sync_to_production.py <production_url>")
-        print("Example: python3 sync_to_production.py https://mostpopularyoutubechannel.com")
-        sys.exit(1)
-    
-    prod_url = sys.argv[1].rstrip('/')
-    
+    parser = argparse.ArgumentParser(description="Sync channels to production")
+    parser.add_argument("prod_url", help="e.g. https://mostpopularyoutubechannel.com")
+    parser.add_argument("--file", default="channels_export.json")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    prod_url = args.prod_url.rstrip('/')
+
     # Load channels
-    with open('channels_export.json', 'r') as f:
+    with open(args.file, 'r') as f:
         channels = json.load(f)
-    
+
     print(f"Importing {len(channels)} channels to {prod_url}...")
-    
-    # Import in batches of 50
-    batch_size = 50
-    for i in range(0, len(channels), batch_size):
-        batch = channels[i:i+batch_size]
-        try:
-            response = requests.post(
-                f"{prod_url}/api/admin/import-channels",
-                json=batch,
-                timeout=60
-            )
-            result = response.json()
-            print(f"Batch {i//batch_size + 1}: Added {result.get('added', 0)}, Updated {result.get('updated', 0)}")
-        except Exception as e:
-            print(f"Error importing batch: {e}")
-    
-    print("Done!")
+
+    try:
+        response = requests.post(
+            f"{prod_url}/api/admin/import-channels/stream",
+            params={"batch_size": args.batch_size},
+            data=ndjson_lines(channels),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=300
+        )
+        response.raise_for_status()
+        result = response.json()
+    except Exception as e:
+        print(f"Error importing channels: {e}")
+        sys.exit(1)
+
+    for batch in result["batches"]:
+        print(
+            f"Batch {batch['batch']}: Added {batch['upserted']}, Updated {batch['modified']}, "
+            f"Unchanged {batch['matched'] - batch['modified']}, Errors {batch['errors']} ({batch['write_seconds']}s)"
+        )
+    for error in result["errors"]:
+        print(f"  line {error['line']}: {error['error']}")
+
+    print(f"Done! {result['received']} channels in {result['seconds']}s, {result['error_count']} errors")
 
 if __name__ == "__main__":
     main()